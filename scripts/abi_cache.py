@@ -0,0 +1,115 @@
+"""
+ABI loading with an on-disk compile cache
+
+Parsing the MoneyPot ABI and hashing every error/event signature costs a
+noticeable slice of start-up for short CLI runs and serverless workers. The
+compiled form is saved as JSON under a key derived from the ABI file's SHA-256,
+so later processes skip the keccak work. It is plain data rather than a pickle:
+the cache directory is writable by more than this code, and loading it must
+never run anything. Contract factories are memoized per Web3 instance for the
+same reason.
+"""
+
+import hashlib
+import json
+import os
+import weakref
+from typing import Optional, Dict, Any
+
+# Repo-relative location of the MoneyPot ABI (scripts/ lives next to src/)
+DEFAULT_ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "abis", "MoneyPot.json")
+CACHE_DIR = os.getenv("MONEYPOT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "moneypot"))
+CACHE_FORMAT = 2
+
+
+class CompiledAbi:
+    """A parsed ABI plus precomputed error selectors and event topics"""
+
+    __slots__ = ("abi", "abi_hash", "error_selectors", "event_topics")
+
+    def __init__(self, abi: list, abi_hash: str, error_selectors: Dict[bytes, tuple], event_topics: Dict[str, str]):
+        self.abi = abi
+        self.abi_hash = abi_hash
+        self.error_selectors = error_selectors
+        self.event_topics = event_topics
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": CACHE_FORMAT,
+            "abi": self.abi,
+            "abi_hash": self.abi_hash,
+            "error_selectors": {selector.hex(): list(error) for selector, error in self.error_selectors.items()},
+            "event_topics": self.event_topics,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompiledAbi":
+        if data.get("format") != CACHE_FORMAT:
+            raise ValueError(f"Unsupported ABI cache format {data.get('format')}")
+        error_selectors = {
+            bytes.fromhex(selector): (name, list(types), list(names))
+            for selector, (name, types, names) in data["error_selectors"].items()
+        }
+        return cls(list(data["abi"]), str(data["abi_hash"]), error_selectors, dict(data["event_topics"]))
+
+
+def _compile(abi: list, abi_hash: str) -> CompiledAbi:
+    from eth_utils import event_abi_to_log_topic
+    from revert_errors import compile_error_selectors
+
+    event_topics = {
+        "0x" + event_abi_to_log_topic(entry).hex(): entry["name"]
+        for entry in abi
+        if entry.get("type") == "event"
+    }
+    return CompiledAbi(abi, abi_hash, compile_error_selectors(abi), event_topics)
+
+
+def load_compiled_abi(path: Optional[str] = None, use_cache: bool = True) -> CompiledAbi:
+    """Load an ABI artifact (a bare list or a Hardhat {"abi": [...]} file), reusing the JSON cache"""
+    path = path or os.getenv("MONEY_POT_ABI_PATH") or DEFAULT_ABI_PATH
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        raise RuntimeError(f"MoneyPot ABI not found at {os.path.normpath(path)} (set MONEY_POT_ABI_PATH)")
+
+    abi_hash = hashlib.sha256(raw).hexdigest()
+    cache_path = os.path.join(CACHE_DIR, f"abi-{CACHE_FORMAT}-{abi_hash[:16]}.json")
+
+    if use_cache:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                compiled = CompiledAbi.from_dict(json.load(f))
+            if compiled.abi_hash == abi_hash:
+                return compiled
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+    data = json.loads(raw)
+    abi = data["abi"] if isinstance(data, dict) else data
+    compiled = _compile(abi, abi_hash)
+
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(compiled.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"⚠️  Could not write ABI cache {cache_path}: {e}")
+    return compiled
+
+
+# Web3 instance -> {abi_hash: contract factory}
+_factories: "weakref.WeakKeyDictionary[Any, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def contract_factory(w3, compiled: CompiledAbi):
+    """Memoized w3.eth.contract(abi=...) factory for this Web3 instance and ABI"""
+    per_w3 = _factories.setdefault(w3, {})
+    factory = per_w3.get(compiled.abi_hash)
+    if factory is None:
+        factory = per_w3[compiled.abi_hash] = w3.eth.contract(abi=compiled.abi)
+    return factory
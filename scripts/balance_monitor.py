@@ -0,0 +1,356 @@
+"""
+Token and native-gas balances for a set of accounts
+
+BalanceMonitor refreshes every tracked account's token balance, native balance
+and the gas price in one JSON-RPC batch, which also reads the block number. It
+re-reads at most once per block: only when the chain head (if the caller
+provides it) has moved past the snapshot, or the snapshot is older than
+max_age. From successive snapshots it keeps an exponentially weighted spend
+rate per account, which gives a runway estimate (seconds until the account can
+no longer pay). Flows call ensure_funds() before sending. An account that
+cannot cover the transaction is topped up from the funder key when one is
+configured, and otherwise paused so callers can route work to another account
+with pick(). Either way the transaction is not sent into an InsufficientFee
+revert or an "insufficient funds for gas" rejection.
+
+ensure_funds() returns a FundsHold that keeps the amounts committed against the
+snapshot until release(). Once the transaction is mined, the hold is kept until
+a snapshot at or after its block shows the spend.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterable, List
+
+from tx_scheduler import PRIORITY_URGENT
+
+NATIVE_TRANSFER_GAS = 21000
+TOKEN_TRANSFER_GAS = 100000
+
+
+class RefillError(RuntimeError):
+    """A top-up transaction from the funder reverted"""
+
+
+class InsufficientFundsError(RuntimeError):
+    """An account cannot cover a transaction and no funder is configured to top it up"""
+
+    def __init__(self, address: str, token_needed: int, token_balance: int, native_needed: int, native_balance: int):
+        self.address = address
+        self.token_needed = token_needed
+        self.token_balance = token_balance
+        self.native_needed = native_needed
+        self.native_balance = native_balance
+        super().__init__(
+            f"{address} cannot pay: needs {token_needed} token units (has {token_balance}) "
+            f"and {native_needed} wei for gas (has {native_balance})"
+        )
+
+
+class FundsHold:
+    """Token and gas amounts ensure_funds() committed for one transaction"""
+
+    __slots__ = ("address", "token", "native", "block")
+
+    def __init__(self, address: str, token: int, native: int):
+        self.address = address
+        self.token = token
+        self.native = native
+        # Block the transaction was mined in, once release() learns it
+        self.block: Optional[int] = None
+
+
+class AccountFunds:
+    """Latest balances of one account plus its observed spend rates"""
+
+    __slots__ = ("address", "token", "native", "token_pending", "native_pending", "holds", "token_rate",
+                 "native_rate", "updated_at", "paused", "refill")
+
+    def __init__(self, address: str):
+        self.address = address
+        self.token = 0
+        self.native = 0
+        # Sums of the holds below: committed by ensure_funds() but not yet visible in the snapshot
+        self.token_pending = 0
+        self.native_pending = 0
+        self.holds: List[FundsHold] = []
+        # Units per second, exponentially weighted over refreshes
+        self.token_rate = 0.0
+        self.native_rate = 0.0
+        self.updated_at: Optional[float] = None
+        self.paused = False
+        self.refill: Optional[asyncio.Task] = None
+
+    def runway(self) -> float:
+        """Seconds until the first of token or native balance runs out at the current spend rates"""
+        estimates = [balance / rate for balance, rate in ((self.token, self.token_rate), (self.native, self.native_rate))
+                     if rate > 0]
+        return min(estimates) if estimates else float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        runway = self.runway()
+        return {
+            "address": self.address,
+            "token": self.token,
+            "native": self.native,
+            "token_rate": round(self.token_rate, 3),
+            "native_rate": round(self.native_rate, 3),
+            "runway_s": None if runway == float("inf") else round(runway, 1),
+            "paused": self.paused,
+        }
+
+
+class BalanceMonitor:
+    """Batched, once-per-block balance tracking with runway prediction and optional auto-refill"""
+
+    def __init__(self, w3, token, accounts: Iterable = (), scheduler=None, funder=None,
+                 refill_token: int = 0, refill_native: int = 0, gas_limit: int = 500000,
+                 reserve_txs: int = 3, horizon: float = 300.0, alpha: float = 0.3,
+                 head: Optional[Callable[[], Optional[int]]] = None, max_age: float = 2.0):
+        self.w3 = w3
+        self.token = token
+        self.scheduler = scheduler
+        # Latest known block number (e.g. ChainHeadTracker.head) and the snapshot age that forces a re-read
+        self.head = head
+        self.max_age = max_age
+        # Account (with .key) that tops up the others; requires the scheduler to send
+        self.funder = funder
+        self.refill_token = refill_token
+        self.refill_native = refill_native
+        self.gas_limit = gas_limit
+        # An account is paused when it cannot afford this many more transactions at the current gas price
+        self.reserve_txs = reserve_txs
+        # Refill proactively when the predicted runway drops below this many seconds
+        self.horizon = horizon
+        self.alpha = alpha
+        self.block_number: Optional[int] = None
+        self.refreshed_at = 0.0
+        self.gas_price = 0
+        self.accounts: Dict[str, AccountFunds] = {}
+        self._lock = threading.Lock()
+        # Guards holds separately, so release() on the event loop never waits out a batch read
+        self._holds_lock = threading.Lock()
+        for account in accounts:
+            self.track(account)
+
+    def track(self, account) -> AccountFunds:
+        """Start tracking an account (or address); picked up by the next refresh"""
+        address = getattr(account, "address", account)
+        funds = self.accounts.get(address)
+        if funds is None:
+            funds = self.accounts[address] = AccountFunds(address)
+            self.block_number = None  # force the next refresh to include it
+        return funds
+
+    # --- refresh ----------------------------------------------------------------
+
+    def _read_batch(self, addresses: List[str]) -> List[Any]:
+        try:
+            with self.w3.batch_requests() as batch:
+                batch.add(self.w3.eth.get_block_number())
+                batch.add(self.w3.eth.gas_price)
+                for address in addresses:
+                    batch.add(self.w3.eth.get_balance(address))
+                for address in addresses:
+                    batch.add(self.token.functions.balanceOf(address))
+                return list(batch.execute())
+        except Exception as e:
+            print(f"⚠️  Batched balance read failed ({e}), falling back to sequential calls")
+            return ([self.w3.eth.block_number, self.w3.eth.gas_price]
+                    + [self.w3.eth.get_balance(a) for a in addresses]
+                    + [self.token.functions.balanceOf(a).call() for a in addresses])
+
+    def _sample_rate(self, previous: int, current: int, elapsed: float, rate: float) -> float:
+        if elapsed <= 0:
+            return rate
+        spent = previous - current
+        # Deposits and refills are not spending; idle intervals decay the rate towards zero
+        observed = spent / elapsed if spent > 0 else 0.0
+        return self.alpha * observed + (1 - self.alpha) * rate
+
+    def _is_fresh(self) -> bool:
+        if self.block_number is None:
+            return False
+        head = self.head() if self.head is not None else None
+        if head is not None and head > self.block_number:
+            return False
+        return time.time() - self.refreshed_at < self.max_age
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-read all balances unless the snapshot is still current (blocking); returns True if anything was read"""
+        with self._lock:
+            if not force and self._is_fresh():
+                return False
+            addresses = list(self.accounts)
+            values = self._read_batch(addresses)
+            now = self.refreshed_at = time.time()
+            self.block_number, self.gas_price = int(values[0]), int(values[1])
+            natives, tokens = values[2:2 + len(addresses)], values[2 + len(addresses):]
+            for address, native, token in zip(addresses, natives, tokens):
+                funds = self.accounts[address]
+                if funds.updated_at is not None:
+                    elapsed = now - funds.updated_at
+                    funds.native_rate = self._sample_rate(funds.native, int(native), elapsed, funds.native_rate)
+                    funds.token_rate = self._sample_rate(funds.token, int(token), elapsed, funds.token_rate)
+                funds.native, funds.token, funds.updated_at = int(native), int(token), now
+                # Mined spends are now part of the balances; holds of unsent or unmined transactions stay
+                with self._holds_lock:
+                    for hold in [h for h in funds.holds if h.block is not None and h.block <= self.block_number]:
+                        self._drop(funds, hold)
+                funds.paused = funds.native < self.native_reserve()
+            return True
+
+    async def watch(self, interval: float = 1.0):
+        """Refresh on every new block and top up accounts whose runway is short; run as a task"""
+        while True:
+            try:
+                if await asyncio.to_thread(self.refresh):
+                    for funds in self.accounts.values():
+                        if self.funder is not None and self._needs_refill(funds):
+                            self._start_refill(funds)
+            except Exception as e:
+                print(f"⚠️  Balance refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    # --- availability -----------------------------------------------------------
+
+    def native_reserve(self, gas_limit: Optional[int] = None) -> int:
+        return (gas_limit or self.gas_limit) * self.gas_price * self.reserve_txs
+
+    def can_pay(self, address: str, token_amount: int = 0, gas_limit: Optional[int] = None) -> bool:
+        funds = self.accounts[address]
+        gas_cost = (gas_limit or self.gas_limit) * self.gas_price
+        return (funds.token - funds.token_pending >= token_amount
+                and funds.native - funds.native_pending >= gas_cost)
+
+    def pick(self, candidates: Iterable, token_amount: int = 0, gas_limit: Optional[int] = None):
+        """The candidate account that can pay and has the longest runway, or None"""
+        best, best_runway = None, -1.0
+        for account in candidates:
+            address = getattr(account, "address", account)
+            funds = self.accounts.get(address)
+            if funds is None or funds.paused or not self.can_pay(address, token_amount, gas_limit):
+                continue
+            runway = funds.runway()
+            if runway > best_runway:
+                best, best_runway = account, runway
+        return best
+
+    async def ensure_funds(self, account, token_amount: int = 0, gas_limit: Optional[int] = None) -> FundsHold:
+        """Make sure `account` can pay `token_amount` plus gas, refilling it if a funder is configured
+
+        The amounts are held against the local snapshot until release(), so
+        several transactions queued for the same account are checked together.
+        """
+        address = getattr(account, "address", account)
+        funds = self.track(account)
+        await asyncio.to_thread(self.refresh)
+        gas_cost = (gas_limit or self.gas_limit) * self.gas_price
+        if not self.can_pay(address, token_amount, gas_limit):
+            if self.funder is None or self.scheduler is None:
+                funds.paused = True
+                raise InsufficientFundsError(address, token_amount, funds.token - funds.token_pending,
+                                            gas_cost, funds.native - funds.native_pending)
+            print(f"⛽ {address} is short of funds, topping up from {self.funder.address}")
+            await self._start_refill(funds, token_amount, gas_cost)
+            await asyncio.to_thread(self.refresh, True)
+            if not self.can_pay(address, token_amount, gas_limit):
+                raise InsufficientFundsError(address, token_amount, funds.token - funds.token_pending,
+                                            gas_cost, funds.native - funds.native_pending)
+        hold = FundsHold(address, token_amount, gas_cost)
+        with self._holds_lock:
+            funds.holds.append(hold)
+            funds.token_pending += token_amount
+            funds.native_pending += gas_cost
+        return hold
+
+    def release(self, hold: FundsHold, block_number: Optional[int] = None):
+        """The transaction `hold` was taken for has settled
+
+        Without a block (never sent, skipped, failed) the amounts are freed at
+        once. A mined transaction keeps them held until a refresh reads a block
+        at or after `block_number`, when the balances show the spend.
+        """
+        with self._holds_lock:
+            funds = self.accounts.get(hold.address)
+            if funds is None or hold not in funds.holds:
+                return
+            if block_number is None or (self.block_number is not None and self.block_number >= block_number):
+                self._drop(funds, hold)
+            else:
+                hold.block = block_number
+
+    @staticmethod
+    def _drop(funds: AccountFunds, hold: FundsHold):
+        funds.holds.remove(hold)
+        funds.token_pending -= hold.token
+        funds.native_pending -= hold.native
+
+    # --- refill -----------------------------------------------------------------
+
+    def _needs_refill(self, funds: AccountFunds) -> bool:
+        if self.funder is not None and funds.address == self.funder.address:
+            return False
+        return funds.refill is None and (funds.paused or funds.runway() < self.horizon)
+
+    def _start_refill(self, funds: AccountFunds, token_amount: int = 0, gas_cost: int = 0) -> asyncio.Task:
+        if funds.refill is None or funds.refill.done():
+            funds.refill = asyncio.get_running_loop().create_task(self._refill(funds, token_amount, gas_cost))
+            # watch() never awaits its refills; report their failures here
+            funds.refill.add_done_callback(self._refill_done)
+        return funds.refill
+
+    @staticmethod
+    def _refill_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️  Refill failed: {task.exception()}")
+
+    async def _refill(self, funds: AccountFunds, token_amount: int, gas_cost: int):
+        """Send native and/or token top-ups from the funder through the scheduler at urgent priority
+
+        Targets are for the spendable balance, i.e. net of pending holds, which is
+        what can_pay() checks. Raises RefillError if a top-up reverted.
+        """
+        native_target = max(self.refill_native, self.native_reserve() + gas_cost)
+        token_target = max(self.refill_token, token_amount)
+        native_spendable = funds.native - funds.native_pending
+        token_spendable = funds.token - funds.token_pending
+        transfers = []
+        if native_spendable < native_target:
+            value = native_target - native_spendable
+
+            def build_native(nonce: int, gas_price: int):
+                return {**self.scheduler.tx_params(self.funder, nonce, gas_price, NATIVE_TRANSFER_GAS),
+                        "to": funds.address, "value": value}
+            transfers.append(self.scheduler.submit(self.funder, build_native, f"refill gas {funds.address[:10]}",
+                                                   PRIORITY_URGENT))
+        if token_spendable < token_target:
+            amount = token_target - token_spendable
+
+            def build_token(nonce: int, gas_price: int):
+                return self.token.functions.transfer(funds.address, amount).build_transaction(
+                    self.scheduler.tx_params(self.funder, nonce, gas_price, TOKEN_TRANSFER_GAS))
+            transfers.append(self.scheduler.submit(self.funder, build_token, f"refill token {funds.address[:10]}",
+                                                   PRIORITY_URGENT))
+        try:
+            failed = []
+            for result in await asyncio.gather(*transfers):
+                if getattr(result.receipt, "status", 1) == 0:
+                    print(f"❌ {result.label}: 0x{result.tx_hash.hex()} reverted in block {result.receipt.blockNumber}")
+                    failed.append(result.label)
+                else:
+                    print(f"⛽ {result.label}: 0x{result.tx_hash.hex()} (block {result.receipt.blockNumber})")
+            if failed:
+                raise RefillError(f"{', '.join(failed)} reverted")
+        finally:
+            funds.refill = None
+
+    # --- reporting --------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "block": self.block_number,
+            "gas_price": self.gas_price,
+            "accounts": [funds.to_dict() for funds in self.accounts.values()],
+        }
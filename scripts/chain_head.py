@@ -0,0 +1,282 @@
+"""
+Reorg-aware chain head tracking and confirmation depths
+
+ChainHeadTracker keeps the hashes of the last `window` blocks. Every poll reads
+the latest block and walks parent hashes back until they agree with the window.
+If a stored hash no longer matches, the blocks from that point on were orphaned,
+and a Reorg is emitted to the on_reorg() listeners. Callers hook their caches
+in there, e.g. PotTable.rollback(reorg.ancestor_timestamp),
+LeaderboardAggregator.rollback(reorg.fork_block) and
+VerifierJobQueue.rollback(reorg.fork_block).
+
+wait_for_confirmations() gives each operation its own depth. A receipt counts as
+confirmed once its block is `depth` blocks deep and still canonical. If the block
+is orphaned, the transaction's new receipt is fetched instead. ProvisionalResult
+is the speculative fast path: a value derived from the first receipt (such as a
+pot id from PotCreated) is available at once, and final() re-derives it from
+the receipt that actually reached the requested depth.
+
+Polling is paced by an injectable clock and sleep, so a replayed chain (see
+replay.ReplayClock) can advance blocks without waiting out real poll intervals.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Awaitable, Callable, List, Tuple
+
+
+class ReorgError(RuntimeError):
+    """A transaction's block was orphaned and the transaction was not mined again in time"""
+
+
+class Reorg:
+    """Blocks from fork_block up to old_head were replaced by a competing chain"""
+
+    __slots__ = ("fork_block", "depth", "old_head", "new_head", "ancestor_timestamp", "detected_at")
+
+    def __init__(self, fork_block: int, old_head: int, new_head: int, ancestor_timestamp: int):
+        self.fork_block = fork_block
+        self.depth = old_head - fork_block + 1
+        self.old_head = old_head
+        self.new_head = new_head
+        # Timestamp of the last block both chains share; state created after it is suspect
+        self.ancestor_timestamp = ancestor_timestamp
+        self.detected_at = time.time()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Reorg(fork_block={self.fork_block}, depth={self.depth}, new_head={self.new_head})"
+
+
+def _block_hash(value) -> bytes:
+    return bytes(value) if value is not None else b""
+
+
+class ChainHeadTracker:
+    """Sliding window of recent block hashes that detects reorgs and counts confirmations"""
+
+    def __init__(self, w3, window: int = 64, poll_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.w3 = w3
+        self.window = window
+        self.poll_interval = poll_interval
+        # Time source for the poll throttle and confirmation deadlines, and how to wait between polls
+        self.clock = clock
+        self.sleep = sleep
+        # block number -> (hash, timestamp), contiguous from the lowest tracked block to the head
+        self.blocks: "OrderedDict[int, Tuple[bytes, int]]" = OrderedDict()
+        self.head: Optional[int] = None
+        self.reorgs: List[Reorg] = []
+        self.listeners: List[Callable[[Reorg], Any]] = []
+        self._lock = threading.Lock()
+        self._update_lock: Optional[asyncio.Lock] = None
+        self._polled_at = float("-inf")
+
+    def on_reorg(self, callback: Callable[[Reorg], Any]):
+        """Call `callback(reorg)` on the event loop whenever a reorg is detected"""
+        self.listeners.append(callback)
+
+    # --- polling ----------------------------------------------------------------
+
+    def _record(self, block):
+        self.blocks[block.number] = (_block_hash(block.hash), int(block.timestamp))
+
+    def _trim(self):
+        while len(self.blocks) > self.window:
+            self.blocks.popitem(last=False)
+
+    def _walk(self, block, fetched: list) -> Optional[int]:
+        """Follow parent hashes down from `block` until they join the window (blocking)
+
+        Blocks read on the way are appended to `fetched`. Returns the lowest
+        tracked block number whose hash no longer matches, or None.
+        """
+        floor = next(iter(self.blocks))
+        stored = self.blocks.get(block.number)
+        if stored is not None and stored[0] == _block_hash(block.hash):
+            return None
+        fork = block.number if stored is not None else None
+        number, parent = block.number, _block_hash(block.parentHash)
+        while number - 1 >= floor:
+            stored = self.blocks.get(number - 1)
+            if stored is not None and stored[0] == parent:
+                return fork
+            if stored is not None:
+                fork = number - 1
+            block = self.w3.eth.get_block(number - 1)
+            fetched.append(block)
+            number, parent = block.number, _block_hash(block.parentHash)
+        if fork == floor:
+            print(f"⚠️  Reorg reaches below the {self.window}-block window; everything tracked is suspect")
+        return fork
+
+    def poll(self) -> Optional[Reorg]:
+        """Read the latest block and reconcile the window with it (blocking); returns the reorg, if any"""
+        with self._lock:
+            head = self.w3.eth.get_block("latest")
+            stored = self.blocks.get(head.number)
+            if stored is not None and stored[0] == _block_hash(head.hash):
+                # Same head, or a lagging RPC node behind our head on the same chain
+                return None
+            fetched = [head]
+            jumped = bool(self.blocks) and head.number - self.head > self.window
+            if not self.blocks:
+                fork = None
+            elif jumped:
+                # Too far ahead to walk block by block: check that our old head is still canonical,
+                # then restart the window at the new head
+                fork = self._walk(self.w3.eth.get_block(self.head), [])
+            else:
+                fork = self._walk(head, fetched)
+
+            reorg = None
+            if fork is not None:
+                ancestor = self.blocks.get(fork - 1)
+                reorg = Reorg(fork, self.head, head.number, ancestor[1] if ancestor else 0)
+                self.reorgs.append(reorg)
+                for number in [n for n in self.blocks if n >= fork]:
+                    del self.blocks[number]
+            if jumped:
+                self.blocks.clear()
+            for block in reversed(fetched):
+                self._record(block)
+            self.head = head.number
+            self._trim()
+            return reorg
+
+    async def update(self) -> Optional[Reorg]:
+        """Poll at most once per half poll interval, however many waiters ask; notifies listeners"""
+        if self._update_lock is None:
+            self._update_lock = asyncio.Lock()
+        async with self._update_lock:
+            if self.clock() - self._polled_at < self.poll_interval / 2:
+                return None
+            reorg = await asyncio.to_thread(self.poll)
+            self._polled_at = self.clock()
+        if reorg is not None:
+            print(f"🔀 Reorg: {reorg.depth} block(s) from #{reorg.fork_block} replaced (new head #{reorg.new_head})")
+            for callback in self.listeners:
+                try:
+                    callback(reorg)
+                except Exception as e:
+                    print(f"⚠️  Reorg listener {callback!r} failed: {e}")
+        return reorg
+
+    async def watch(self):
+        """Poll every poll_interval so reorgs are noticed even when nothing is waiting; run as a task"""
+        while True:
+            try:
+                await self.update()
+            except Exception as e:
+                print(f"⚠️  Chain head poll failed: {e}")
+            await self.sleep(self.poll_interval)
+
+    # --- confirmations ----------------------------------------------------------
+
+    def _extend_down(self, number: int):
+        """Fetch hashes from `number` up to the lowest tracked block so the window covers it (blocking)"""
+        with self._lock:
+            if not self.blocks or number >= next(iter(self.blocks)):
+                return
+            floor = next(iter(self.blocks))
+            start = max(number, self.head - self.window + 1)
+            for n in range(start, floor):
+                self._record(self.w3.eth.get_block(n))
+            self.blocks = OrderedDict(sorted(self.blocks.items()))
+
+    def confirmations(self, block_number: int, block_hash=None) -> int:
+        """Blocks on top of (and including) block_number, or 0 if that block is not canonical"""
+        if self.head is None or block_number > self.head:
+            return 0
+        stored = self.blocks.get(block_number)
+        if stored is not None and block_hash is not None and stored[0] != _block_hash(block_hash):
+            return 0
+        return self.head - block_number + 1
+
+    def _fetch_receipt(self, tx_hash):
+        from web3.exceptions import TransactionNotFound
+
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    async def wait_for_confirmations(self, tx_hash, receipt, depth: int, timeout: float = 300.0):
+        """Wait until the transaction is `depth` blocks deep on the canonical chain; returns its receipt
+
+        The returned receipt differs from the one passed in when a reorg moved the
+        transaction to another block. Raises ReorgError if the transaction was
+        orphaned and not mined again within `timeout` seconds.
+        """
+        if depth <= 1:
+            return receipt
+        deadline = self.clock() + timeout
+        await self.update()
+        await asyncio.to_thread(self._extend_down, receipt.blockNumber)
+        label = f"0x{bytes(tx_hash).hex()}"
+        while True:
+            if receipt is not None:
+                confirmations = self.confirmations(receipt.blockNumber, getattr(receipt, "blockHash", None))
+                if confirmations >= depth:
+                    return receipt
+                if not confirmations and receipt.blockNumber <= self.head:
+                    print(f"🔀 {label} was in orphaned block #{receipt.blockNumber}, waiting for it to be mined again")
+                    receipt = None
+            if receipt is None:
+                receipt = await asyncio.to_thread(self._fetch_receipt, tx_hash)
+                if receipt is not None:
+                    print(f"✅ {label} mined again in block #{receipt.blockNumber}")
+            if self.clock() > deadline:
+                if receipt is None:
+                    raise ReorgError(f"{label} was dropped by a reorg and not mined again within {timeout:g}s")
+                raise TimeoutError(f"{label} did not reach {depth} confirmations within {timeout:g}s")
+            await self.sleep(self.poll_interval)
+            await self.update()
+
+    def provisional(self, label: str, tx_hash, receipt, depth: int,
+                    derive: Callable[[Any], Any]) -> "ProvisionalResult":
+        """Start finalizing a result derived from `receipt`; its provisional value is available at once"""
+        return ProvisionalResult(self, label, tx_hash, receipt, depth, derive)
+
+
+class ProvisionalResult:
+    """A value read from a receipt before it is final, finalized in the background"""
+
+    __slots__ = ("label", "tx_hash", "depth", "receipt", "value", "provisional_value", "state", "_task")
+
+    def __init__(self, tracker: ChainHeadTracker, label: str, tx_hash, receipt, depth: int,
+                 derive: Callable[[Any], Any]):
+        self.label = label
+        self.tx_hash = tx_hash
+        self.depth = depth
+        self.receipt = receipt
+        self.value = self.provisional_value = derive(receipt)
+        self.state = "provisional"
+        self._task = asyncio.get_running_loop().create_task(self._finalize(tracker, receipt, derive))
+
+    async def _finalize(self, tracker: ChainHeadTracker, receipt, derive):
+        try:
+            final_receipt = await tracker.wait_for_confirmations(self.tx_hash, receipt, self.depth)
+            if final_receipt is not receipt:
+                self.receipt = final_receipt
+                self.value = derive(final_receipt)
+                if self.value != self.provisional_value:
+                    print(f"🔀 {self.label}: {self.provisional_value} became {self.value} after a reorg")
+        except BaseException:
+            self.state = "failed"
+            raise
+        self.state = "final"
+        return self.value
+
+    @property
+    def done(self) -> bool:
+        return self._task.done()
+
+    async def final(self):
+        """The value once the transaction is `depth` blocks deep; raises if it was dropped by a reorg"""
+        return await asyncio.shield(self._task)
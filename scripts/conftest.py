@@ -0,0 +1,16 @@
+"""Shared fixtures for the scripts/ tests"""
+
+import pytest
+
+import pot_records
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def numpy_mode(request, monkeypatch):
+    """Run a test with the NumPy fast paths and again with the pure-Python fallbacks"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(pot_records, "_np", False)
+    else:
+        monkeypatch.setattr(pot_records, "_np", None)
+    return request.param
@@ -2,73 +2,106 @@
 """
 Money Pot EVM End-to-End Application
 Integrates with the verifier service for complete pot creation and hunting flow on EVM chains
+
+Importing this module is side-effect free: web3, eth_account, aiohttp and
+cryptography are imported on first use, .env is read by configure(), and the
+ABI is loaded (through the abi_cache JSON cache) only when a contract is needed.
 """
 
+from __future__ import annotations
+
 import asyncio
-import json
 import os
-import sys
-from typing import Optional, Dict, Any
-import aiohttp
-from dotenv import load_dotenv
-import base64
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from eth_account import Account
-from web3 import Web3
 import time
+from typing import Optional, Dict, Any, TYPE_CHECKING
+
+from abi_cache import CACHE_DIR, load_compiled_abi, contract_factory
+from balance_monitor import BalanceMonitor
+from chain_head import ChainHeadTracker, Reorg, ReorgError
+from pot_records import Pot, Attempt
+from revert_errors import ContractRevertError, RevertDecoder, simulate_transaction, explain_failed_transaction
+from token_units import NATIVE_DECIMALS, format_units, parse_units, token_decimals
+from tx_scheduler import APPROVE_GAS, PRIORITY_ATTEMPT, PRIORITY_CREATE, PRIORITY_SWEEP, TxScheduler
+from verifier_jobs import JobStore, PermanentJobError, RetryPolicy, VerifierJobQueue, VerifierUnavailableError
+from wallet_auth import encode_payload, signature_cache, wallet_request
+
+if TYPE_CHECKING:
+    from eth_account import Account
+    from web3 import Web3
+
+
+def configure(load_env_file: bool = True):
+    """(Re)read configuration from the environment, loading .env first unless disabled"""
+    global MONEY_AUTH_URL, CHAIN_ID, ONEP_PASSWORD, POT_AMOUNT, ENTRY_FEE, DURATION
+    global SIMULATE_TRANSACTIONS, PREFLIGHT, EVM_RPC_URL, CONTRACT_ADDRESS, EXPLORER_URL
+    global VERIFIER_TIMEOUT, VERIFIER_MAX_ATTEMPTS, VERIFIER_JOBS_PATH, TX_MAX_IN_FLIGHT
+    global REFILL_TOKEN_AMOUNT, REFILL_NATIVE_AMOUNT
+    global CONFIRMATIONS_CREATE, CONFIRMATIONS_ATTEMPT, SPECULATIVE_POTS, REORG_WINDOW
+
+    if load_env_file:
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    MONEY_AUTH_URL = os.getenv("MONEY_AUTH_URL", "https://auth.money-pot.ideomind.org")
+    CHAIN_ID = int(os.getenv("CHAIN_ID", "102031"))  # Testnet chain ID
+
+    ONEP_PASSWORD = os.getenv("1P_PASSWORD", "🔥")
+    # Token amounts in whole tokens; kept as text until the token's decimals() is known
+    # (EVMMoneyPotApp.parse_token_amount), so they convert exactly whatever the token uses
+    POT_AMOUNT = os.getenv("POT_AMOUNT", "1")
+    ENTRY_FEE = os.getenv("ENTRY_FEE", "0.1")
+    DURATION = int(os.getenv("DURATION", "3600")) #1 hour 
+    # Simulate createPot/attemptPot with eth_call before sending to catch reverts without paying gas
+    SIMULATE_TRANSACTIONS = os.getenv("SIMULATE_TRANSACTIONS", "true").lower() in ("1", "true", "yes")
+    # "full" runs connectivity/balance/verifier checks concurrently in initialize(), "off" skips them
+    PREFLIGHT = os.getenv("PREFLIGHT", "full").lower()
+    # Per-request verifier timeout (seconds) and retry budget for registration/verification jobs
+    VERIFIER_TIMEOUT = float(os.getenv("VERIFIER_TIMEOUT", "30"))
+    VERIFIER_MAX_ATTEMPTS = int(os.getenv("VERIFIER_MAX_ATTEMPTS", "8"))
+    # Transactions the scheduler keeps between broadcast and receipt across all accounts
+    TX_MAX_IN_FLIGHT = int(os.getenv("TX_MAX_IN_FLIGHT", "8"))
+    # Balances EVM_FUNDER_PRIVATE_KEY tops accounts up to when they run low (whole tokens / native coin)
+    REFILL_TOKEN_AMOUNT = os.getenv("REFILL_TOKEN_AMOUNT", "0")
+    REFILL_NATIVE_AMOUNT = parse_units(os.getenv("REFILL_NATIVE_AMOUNT", "0"), NATIVE_DECIMALS, signed=False)
+    # Pending verifier jobs survive restarts here; poisoned jobs go to <path>.poison.jsonl. Unset,
+    # each chain/contract gets its own file (verifier_jobs_path), as pot and attempt ids are per contract
+    VERIFIER_JOBS_PATH = os.getenv("VERIFIER_JOBS_PATH")
+    # Blocks a createPot/attemptPot must be buried under before its pot/attempt id goes to the
+    # verifier (1 trusts the first receipt); a shallow reorg can otherwise reassign the id
+    CONFIRMATIONS_CREATE = int(os.getenv("CONFIRMATIONS_CREATE", "2"))
+    CONFIRMATIONS_ATTEMPT = int(os.getenv("CONFIRMATIONS_ATTEMPT", "2"))
+    # Return the provisional pot id right after the receipt and confirm/register it in the background
+    SPECULATIVE_POTS = os.getenv("SPECULATIVE_POTS", "false").lower() in ("1", "true", "yes")
+    # Recent block hashes kept for reorg detection
+    REORG_WINDOW = int(os.getenv("REORG_WINDOW", "64"))
+
+    # Setting both skips the /chains round trip; otherwise they are fetched in initialize()
+    EVM_RPC_URL = os.getenv("EVM_RPC_URL")
+    CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
+    EXPLORER_URL = os.getenv("EXPLORER_URL", "")
+
+
+# Read plain environment variables at import; .env is only loaded by configure()
+configure(load_env_file=False)
+VIEM_CONFIG = None
 
-# Load environment variables
-load_dotenv()
 
-# Configuration
-MONEY_AUTH_URL = os.getenv("MONEY_AUTH_URL", "https://auth.money-pot.ideomind.org")
-CHAIN_ID = int(os.getenv("CHAIN_ID", "102031"))  # Testnet chain ID
+def verifier_jobs_path(chain_id: int, contract_address: str) -> str:
+    """Default job store of one chain and contract"""
+    return os.path.join(CACHE_DIR, f"verifier-jobs-{chain_id}-{contract_address.lower()}.json")
 
 
+def load_money_pot_abi():
+    """Load the real MoneyPot ABI from the JSON file"""
+    return load_compiled_abi().abi
 
-# Helper function to convert float values to wei (smallest unit)
-def parse_token_amount(value: str, decimals: int = 6) -> int:
-    try:
-        # Try to parse as float first (e.g., "0.1", "100.5", "1e3")
-        float_value = float(value)
-        # Convert to wei: multiply by 10^decimals
-        return int(float_value * (10 ** decimals))
-    except ValueError:
-        # If float parsing fails, try as integer (already in wei)
-        return int(value)
-
-# Parse amounts from environment with proper conversion
-# Default values: 0.1 tokens = 100000000000000000 wei, 0.01 tokens = 10000000000000000 wei
-ONEP_PASSWORD = os.getenv("1P_PASSWORD", "🔥")
-POT_AMOUNT = parse_token_amount(os.getenv("POT_AMOUNT", "1"))
-ENTRY_FEE = parse_token_amount(os.getenv("ENTRY_FEE", "0.1"))
-DURATION = int(os.getenv("DURATION", "3600")) #1 hour 
-
-# Dynamic configuration (will be fetched from /chains endpoint)
-EVM_RPC_URL = None
-CONTRACT_ADDRESS = None
-VIEM_CONFIG = None
-EXPLORER_URL = None
 
-# Load the real MoneyPot Contract ABI from JSON file
-import json
-import os
+def __getattr__(name: str):
+    # MONEY_POT_ABI is resolved lazily so importing this module never touches the ABI file
+    if name == "MONEY_POT_ABI":
+        return load_money_pot_abi()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def load_money_pot_abi():
-    """Load the real MoneyPot ABI from the JSON file"""
-    abi_path = os.path.join(os.path.dirname(__file__), 'src', 'abis', 'MoneyPot.json')
-    try:
-        with open(abi_path, 'r') as f:
-            abi_data = json.load(f)
-            return abi_data['abi']
-    except FileNotFoundError:
-        print(f"Warning: Could not find ABI file at {abi_path}")
-        print("Using simplified ABI for demo purposes")
-        raise RuntimeError("abi not found")
-# Load the real ABI
-MONEY_POT_ABI = load_money_pot_abi()
 
 # Minimal ERC20 ABI for approval operations
 ERC20_ABI = [
@@ -91,6 +124,30 @@ ERC20_ABI = [
         "name": "allowance",
         "outputs": [{"name": "", "type": "uint256"}],
         "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "type": "function"
+    },
+    {
+        "constant": False,
+        "inputs": [
+            {"name": "_to", "type": "address"},
+            {"name": "_value", "type": "uint256"}
+        ],
+        "name": "transfer",
+        "outputs": [{"name": "", "type": "bool"}],
+        "type": "function"
     }
 ]
 
@@ -106,6 +163,7 @@ def load_creator_account_from_env() -> Account:
         private_key = '0x' + private_key
 
     # Create account from private key
+    from eth_account import Account
     account = Account.from_key(private_key)
 
     # Print the address for debugging
@@ -125,6 +183,7 @@ def load_hunter_account_from_env() -> Account:
         private_key = '0x' + private_key
 
     # Create account from private key
+    from eth_account import Account
     account = Account.from_key(private_key)
 
     # Print the address for debugging
@@ -133,6 +192,21 @@ def load_hunter_account_from_env() -> Account:
     return account
 
 
+def load_funder_account_from_env() -> Optional[Account]:
+    """Load the optional funder account (EVM_FUNDER_PRIVATE_KEY) that tops up low accounts"""
+    private_key = os.getenv("EVM_FUNDER_PRIVATE_KEY")
+    if not private_key:
+        return None
+
+    if not private_key.startswith('0x'):
+        private_key = '0x' + private_key
+
+    from eth_account import Account
+    account = Account.from_key(private_key)
+    print(f"✅ Loaded funder account: {account.address} from environment variable")
+    return account
+
+
 def get_transaction_receipt(w3: Web3, tx_hash: str) -> Dict[str, Any]:
     """Get transaction receipt and return as dictionary"""
     receipt = w3.eth.get_transaction_receipt(tx_hash)
@@ -170,17 +244,7 @@ def extract_attempt_id_from_receipt(contract, receipt: Dict[str, Any]) -> Option
 def get_pot_info(contract, pot_id: int) -> Dict[str, Any]:
     """Get pot information from contract"""
     try:
-        pot_data = contract.functions.getPot(pot_id).call()
-        return {
-            'id': pot_data[0],
-            'creator': pot_data[1],
-            'amount': pot_data[2],
-            'duration': pot_data[3],
-            'fee': pot_data[4],
-            'oneFA': pot_data[5],
-            'createdAt': pot_data[6],
-            'status': pot_data[7]
-        }
+        return Pot.from_tuple(contract.functions.getPot(pot_id).call()).to_dict()
     except Exception as e:
         print(f"Error getting pot info: {e}")
         return {}
@@ -189,14 +253,7 @@ def get_pot_info(contract, pot_id: int) -> Dict[str, Any]:
 def get_attempt_info(contract, attempt_id: int) -> Dict[str, Any]:
     """Get attempt information from contract"""
     try:
-        attempt_data = contract.functions.getAttempt(attempt_id).call()
-        return {
-            'id': attempt_data[0],
-            'potId': attempt_data[1],
-            'hunter': attempt_data[2],
-            'timestamp': attempt_data[3],
-            'status': attempt_data[4]
-        }
+        return Attempt.from_tuple(contract.functions.getAttempt(attempt_id).call()).to_dict()
     except Exception as e:
         print(f"Error getting attempt info: {e}")
         return {}
@@ -231,6 +288,7 @@ def get_next_pot_id(contract) -> int:
 
 async def fetch_chain_config(base_url: str, chain_id: int) -> Dict[str, Any]:
     """Fetch chain configuration from the /chains endpoint"""
+    import aiohttp
     async with aiohttp.ClientSession() as session:
         async with session.get(f"{base_url}/chains") as response:
             if response.status != 200:
@@ -249,21 +307,49 @@ async def fetch_chain_config(base_url: str, chain_id: int) -> Dict[str, Any]:
 class EVMVerifierServiceClient:
     """Client for interacting with the Money Pot Verifier Service (EVM version)"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout: Optional[float] = None):
         self.base_url = base_url
+        self.timeout = timeout
         self.session = None
+        self._users = 0
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Reference counted so concurrent flows and retry jobs share one session
+        if self.session is None:
+            import aiohttp
+            timeout = aiohttp.ClientTimeout(total=self.timeout or VERIFIER_TIMEOUT)
+            self.session = aiohttp.ClientSession(timeout=timeout)
+        self._users += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        self._users -= 1
+        if self._users <= 0 and self.session:
             await self.session.close()
+            self.session = None
+            self._users = 0
+    
+    async def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send one request to the verifier and return the decoded JSON body
+
+        Timeouts, connection errors, HTTP 5xx and 429 raise VerifierUnavailableError
+        so callers can tell a blip they should retry from an answer.
+        """
+        import aiohttp
+        try:
+            async with self.session.request(method, f"{self.base_url}{path}", json=body) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise VerifierUnavailableError(f"{method} {path} returned HTTP {response.status}")
+                return await response.json()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise VerifierUnavailableError(f"{method} {path} failed: {type(e).__name__}: {e}") from e
     
     def encrypt_with_rsa(self, data: str, public_key_pem: str) -> str:
         """Encrypt data with RSA public key using OAEP padding"""
         try:
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import padding
+
             print(f"Encrypting data length: {len(data)}")
             print(f"Public key PEM (first 100 chars): {public_key_pem[:100]}...")
             
@@ -292,184 +378,205 @@ class EVMVerifierServiceClient:
     
     async def health_check(self) -> Dict[str, Any]:
         """Check service health"""
-        async with self.session.get(f"{self.base_url}/health") as response:
-            return await response.json()
+        return await self._request("GET", "/health")
     
     async def get_supported_chains(self) -> Dict[str, Any]:
         """Get supported chains"""
-        async with self.session.get(f"{self.base_url}/chains") as response:
-            return await response.json()
+        return await self._request("GET", "/chains")
     
     async def register_options(self) -> Dict[str, Any]:
         """Get encryption key for registration"""
-        async with self.session.post(
-            f"{self.base_url}/evm/register/options"
-        ) as response:
-            return await response.json()
+        return await self._request("POST", "/evm/register/options")
     
-    async def register_verify(self, payload: Dict[str, Any], signature: str) -> Dict[str, Any]:
+    async def register_verify(self, payload, signature: str) -> Dict[str, Any]:
         """Register pot with 1P configuration"""
-        # Format the request to match what the wallet authentication middleware expects
-        # The wallet middleware will recover the address from the signature
-
-        # Convert payload to JSON string (same format the middleware will verify)
-        payload_json = json.dumps(payload)
-        
-        # Format the request for the wallet middleware
-        request_payload = {
-            "encrypted_payload": payload_json.encode('utf-8').hex(),  # Required by wallet auth middleware
-            "signature": signature
-        }
-
-        async with self.session.post(
-            f"{self.base_url}/evm/register/verify",
-            json=request_payload
-        ) as response:
-            return await response.json()
+        # The wallet middleware recovers the address from the signature over the compact payload JSON
+        return await self._request("POST", "/evm/register/verify", wallet_request(payload, signature=signature))
     
     async def authenticate_options(self, attempt_id: str, hunter_account) -> Dict[str, Any]:
         """Get authentication challenges"""
-        from eth_account.messages import encode_defunct
-        
-        # Create signature for wallet authentication
-        # Sign the attempt_id directly
-        message = encode_defunct(text=attempt_id)
-        signature = hunter_account.sign_message(message)
-        signature_hex = '0x' + signature.signature.hex() if hasattr(signature.signature, 'hex') else '0x' + str(signature.signature)
-        
-        # Create wallet payload
+        # The middleware verifies the signature over the attempt_id itself
         wallet_payload = {
             "attempt_id": attempt_id,
             "chain_id": CHAIN_ID
         }
-        # Convert to JSON for sending
-        wallet_payload_json = json.dumps(wallet_payload)
-        
-        # Format request to match wallet auth middleware expectations
-        request_payload = {
-            "encrypted_payload": wallet_payload_json.encode('utf-8').hex(),
-            "signature": signature_hex
-        }
-
-        async with self.session.post(
-            f"{self.base_url}/evm/authenticate/options",
-            json=request_payload
-        ) as response:
-            return await response.json()
+        request_payload = wallet_request(wallet_payload, hunter_account, message=attempt_id)
+        return await self._request("POST", "/evm/authenticate/options", request_payload)
     
     async def authenticate_verify(self, solutions: list, challenge_id: str, hunter_account) -> Dict[str, Any]:
         """Verify authentication solution with wallet authentication"""
-        # Create signature for wallet authentication
-        # IMPORTANT: The middleware specifically uses challenge_id as messageToVerify when challenge_id is present
-        from eth_account.messages import encode_defunct
-
-        # For authenticate_verify, only sign the challenge_id directly (as per middleware code)
-        # See middleware: const messageToVerify = payload.challenge_id || JSON.stringify(payload);
-        message = encode_defunct(text=challenge_id)
-        signature = hunter_account.sign_message(message)
-        signature_hex = '0x' + signature.signature.hex() if hasattr(signature.signature, 'hex') else '0x' + str(signature.signature)
-
-        # Create wallet payload
+        # The middleware uses challenge_id as messageToVerify when present:
+        # const messageToVerify = payload.challenge_id || JSON.stringify(payload);
         wallet_payload = {
             "challenge_id": challenge_id,
             "solutions": solutions,
             "chain_id": CHAIN_ID  # Include chain_id in signed payload
         }
-        # Convert to JSON for sending
-        wallet_payload_json = json.dumps(wallet_payload)
-
-        # Format request to match middleware expectations - just encrypted_payload and signature
-        request_payload = {
-            "encrypted_payload": wallet_payload_json.encode('utf-8').hex(),
-            "signature": signature_hex
-        }
+        request_payload = wallet_request(wallet_payload, hunter_account, message=challenge_id)
 
         print(f"Debug: Sending authenticate_verify with payload keys: {request_payload.keys()}")
 
-        async with self.session.post(
-            f"{self.base_url}/evm/authenticate/verify",
-            json=request_payload
-        ) as response:
-            return await response.json()
+        return await self._request("POST", "/evm/authenticate/verify", request_payload)
     
     async def debug_get_pot(self, pot_id: str) -> Dict[str, Any]:
         """Get pot registration info for debugging"""
-        async with self.session.get(
-            f"{self.base_url}/evm/debug/pot/{pot_id}"
-        ) as response:
-            return await response.json()
+        return await self._request("GET", f"/evm/debug/pot/{pot_id}")
     
     async def debug_delete_pot(self, pot_id: str) -> Dict[str, Any]:
         """Delete pot registration for debugging"""
-        async with self.session.delete(
-            f"{self.base_url}/evm/debug/pot/{pot_id}"
-        ) as response:
-            return await response.json()
+        return await self._request("DELETE", f"/evm/debug/pot/{pot_id}")
 
 class EVMMoneyPotApp:
     """Main application class for Money Pot flow on EVM"""
     
-    def __init__(self):
+    def __init__(self, provider=None, verifier: Optional[EVMVerifierServiceClient] = None):
+        """
+        Args:
+            provider: Web3 provider to use instead of an HTTPProvider for EVM_RPC_URL
+            verifier: Verifier client to use instead of one for MONEY_AUTH_URL
+        """
+        self.provider = provider
         self.w3 = None
         self.contract = None
         self.creator_account = None
         self.hunter_account = None
-        self.verifier = None
+        self.verifier = verifier
         self.colors = None
         self.directions = None
         self.password = None
         self.legend = None
+        self.revert_decoder = None
+        self.jobs = None
+        self.scheduler = None
+        self.token_contract = None
+        self.funder_account = None
+        self.balances = None
+        # Address -> Account for every key this app signs with, so persisted jobs can find their signer
+        self.accounts: Dict[str, Account] = {}
+        self.chain = None
+        # Task that confirms and registers a pot (final pot id) -> its provisional pot id, while it runs.
+        # Keyed by task: after a reorg two pots can share a provisional id.
+        self.provisional_pots: Dict[asyncio.Task, int] = {}
     
-    def format_token_amount(self, amount_wei: int) -> str:
-        """Format wei amount to human-readable token amount"""
-        token_amount = amount_wei / (10 ** 18)
-        if token_amount >= 1:
-            return f"{token_amount:.6f}"
-        else:
-            return f"{token_amount:.18f}".rstrip('0').rstrip('.')
+    def token_decimals(self, token=None) -> int:
+        """decimals() of the underlying token (or another token contract), read once per address"""
+        return token_decimals.get(token if token is not None else self.get_underlying_token_contract())
+    
+    def parse_token_amount(self, value) -> int:
+        """Exact token units of an amount given in whole tokens (e.g. "0.1"); negative amounts are rejected"""
+        return parse_units(value, self.token_decimals(), signed=False)
+    
+    def format_token_amount(self, amount_wei: int, token=None) -> str:
+        """Format token units as a human-readable amount: 6 places from one token up, every digit below"""
+        decimals = self.token_decimals(token)
+        return format_units(amount_wei, decimals, 6 if abs(amount_wei) >= 10 ** decimals else None)
     
     async def initialize(self):
         """Initialize the application"""
         print("🚀 Initializing EVM Money Pot Application...")
         print("=" * 50)
+        configure()
         
         # Initialize verifier service client first to fetch chain config
-        self.verifier = EVMVerifierServiceClient(MONEY_AUTH_URL)
-        
-        # Fetch chain configuration from /chains endpoint
-        print(f"📡 Fetching chain configuration for chain ID: {CHAIN_ID}")
-        chain_config = await fetch_chain_config(MONEY_AUTH_URL, CHAIN_ID)
+        if self.verifier is None:
+            self.verifier = EVMVerifierServiceClient(MONEY_AUTH_URL)
         
-        # Extract configuration
         global EVM_RPC_URL, CONTRACT_ADDRESS, VIEM_CONFIG, EXPLORER_URL
-        EVM_RPC_URL = chain_config['rpcUrl']
-        CONTRACT_ADDRESS = chain_config['contractAddress']
-        VIEM_CONFIG = chain_config.get('viemConfig', {})
-        EXPLORER_URL = chain_config['explorerUrl']
-        
-        print(f"✅ Chain: {chain_config['name']} ({chain_config['type']})")
+        if EVM_RPC_URL and CONTRACT_ADDRESS:
+            print(f"✅ Using EVM_RPC_URL/CONTRACT_ADDRESS from environment for chain ID: {CHAIN_ID}")
+        else:
+            # Fetch chain configuration from /chains endpoint
+            print(f"📡 Fetching chain configuration for chain ID: {CHAIN_ID}")
+            chain_config = await fetch_chain_config(MONEY_AUTH_URL, CHAIN_ID)
+            
+            # Extract configuration
+            EVM_RPC_URL = chain_config['rpcUrl']
+            CONTRACT_ADDRESS = chain_config['contractAddress']
+            VIEM_CONFIG = chain_config.get('viemConfig', {})
+            EXPLORER_URL = chain_config['explorerUrl']
+            
+            print(f"✅ Chain: {chain_config['name']} ({chain_config['type']})")
         print(f"✅ Contract: {CONTRACT_ADDRESS}")
-        print(f"✅ Explorer: {chain_config['explorerUrl']}")
-        
-        # Initialize Web3 with fetched RPC URL
-        self.w3 = Web3(Web3.HTTPProvider(EVM_RPC_URL))
-        if not self.w3.is_connected():
-            raise RuntimeError(f"Failed to connect to EVM RPC: {EVM_RPC_URL}")
+        print(f"✅ Explorer: {EXPLORER_URL}")
         
-        print(f"✅ Connected to EVM chain: {CHAIN_ID}")
+        # Initialize Web3 with fetched RPC URL (no request is made until the first call)
+        from web3 import Web3
+        self.w3 = Web3(self.provider or Web3.HTTPProvider(EVM_RPC_URL))
         
         # Load accounts from environment
         self.creator_account = load_creator_account_from_env()
         self.hunter_account = load_hunter_account_from_env()
         
+        self.funder_account = load_funder_account_from_env()
+        self.register_account(self.creator_account)
+        self.register_account(self.hunter_account)
+        
         print(f"✅ Creator: {self.creator_account.address}")
         print(f"✅ Hunter:  {self.hunter_account.address}")
         
-        # Initialize contract with fetched contract address
-        self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-            abi=MONEY_POT_ABI
+        # Initialize contract with fetched contract address, reusing the compiled ABI cache
+        compiled_abi = load_compiled_abi()
+        self.contract = contract_factory(self.w3, compiled_abi)(
+            address=Web3.to_checksum_address(CONTRACT_ADDRESS)
+        )
+        self.revert_decoder = RevertDecoder(compiled_abi.abi, compiled_abi.error_selectors)
+        self.token_contract = None
+        self.balances = None
+        self.scheduler = TxScheduler(self.w3, CHAIN_ID, max_in_flight=TX_MAX_IN_FLIGHT)
+        # A replayed chain (replay.ReplayProvider) brings its own clock, so confirmation waits
+        # follow the replay mode instead of real poll intervals
+        clock = getattr(self.provider, "clock", None)
+        if clock is not None:
+            self.chain = ChainHeadTracker(self.w3, REORG_WINDOW, clock=clock.monotonic, sleep=clock.sleep)
+        else:
+            self.chain = ChainHeadTracker(self.w3, REORG_WINDOW)
+        self.chain.on_reorg(self._on_reorg)
+        
+        # Set default password and legend; preflight refines directions from the verifier
+        self.password = ONEP_PASSWORD  # Default password
+        self.set_directions({})
+        
+        if PREFLIGHT == "off":
+            print("⏭️  Skipping preflight checks (PREFLIGHT=off)")
+        else:
+            await self.preflight()
+        
+        self.jobs = VerifierJobQueue(
+            JobStore(VERIFIER_JOBS_PATH or verifier_jobs_path(CHAIN_ID, self.contract.address)),
+            handlers={"register": self._register_pot_job, "verify": self._verify_attempt_job},
+            reconcilers={"register": self._is_pot_registered, "verify": self._is_attempt_completed},
+            policy=RetryPolicy(max_attempts=VERIFIER_MAX_ATTEMPTS, timeout=VERIFIER_TIMEOUT * 2),
+            # Handlers sign for CHAIN_ID; jobs left by a run against another chain/contract are skipped
+            scope={"chain_id": CHAIN_ID, "contract": self.contract.address},
         )
+        await self.resume_verifier_jobs()
+        
+        print(f"✅ Password: {self.password}")
+        print(f"✅ Legend: {self.legend}")
+        print("=" * 50)
+    
+    def register_account(self, account: Account) -> Account:
+        """Make an extra signer known to the app (verifier jobs, balance monitoring)"""
+        self.accounts[account.address] = account
+        if self.balances is not None:
+            self.balances.track(account)
+        return account
+    
+    def set_directions(self, directions: Dict[str, str]):
+        """Build the color -> direction legend from the verifier's direction codes"""
+        self.directions = directions
+        self.legend = {
+            "red": self.directions.get("up", "U"),
+            "green": self.directions.get("down", "D"),
+            "blue": self.directions.get("left", "L"),
+            "yellow": self.directions.get("right", "R")
+        }
+    
+    def _check_chain(self):
+        """Blocking RPC checks: connectivity, contract details and creator balances"""
+        if not self.w3.is_connected():
+            raise RuntimeError(f"Failed to connect to EVM RPC: {EVM_RPC_URL}")
+        print(f"✅ Connected to EVM chain: {CHAIN_ID}")
         
         # Check contract details and token balance
         try:
@@ -477,112 +584,178 @@ class EVMMoneyPotApp:
             contract_name = self.contract.functions.name().call()
             contract_symbol = self.contract.functions.symbol().call()
             
-            # Check creator's token balance
-            creator_balance = self.contract.functions.balanceOf(self.creator_account.address).call()
-            
-            # Check creator's native balance (CTC)
-            creator_native_balance = self.w3.eth.get_balance(self.creator_account.address)
-            creator_native_balance_eth = self.w3.from_wei(creator_native_balance, 'ether')
+            # Token and native balances of all accounts in one batched read
+            balances = self.get_balance_monitor()
+            balances.refresh()
+            creator = balances.accounts[self.creator_account.address]
+            creator_native_balance_eth = self.w3.from_wei(creator.native, 'ether')
             
             print(f"✅ Contract: {contract_name} ({contract_symbol})")
-            print(f"✅ Creator Balance: {self.format_token_amount(creator_balance)} {contract_symbol} ({creator_balance:,} units)")
+            print(f"✅ Creator Balance: {self.format_token_amount(creator.token)} tokens ({creator.token:,} units)")
             print(f"✅ Creator Native: {creator_native_balance_eth} CTC")
                 
         except Exception as e:
             print(f"⚠️  Could not check contract details: {e}")
-        
-        # Check verifier service health and get configuration
+    
+    async def _check_verifier(self):
+        """Check verifier service health and get configuration"""
         async with self.verifier as verifier:
-            health = await verifier.health_check()
+            health, register_options = await asyncio.gather(
+                verifier.health_check(),
+                verifier.register_options()
+            )
             print(f"✅ Verifier Service: {health['status']}")
             
             # Get colors and directions from register options
-            register_options = await verifier.register_options()
             self.colors = register_options.get('colors', {})
-            self.directions = register_options.get('directions', {})
-
-            # Set default password and create legend mapping
-            self.password = ONEP_PASSWORD  # Default password
-            self.legend = {
-                "red": self.directions.get("up", "U"),
-                "green": self.directions.get("down", "D"),
-                "blue": self.directions.get("left", "L"),
-                "yellow": self.directions.get("right", "R")
-            }
-            print(f"✅ Password: {self.password}")
-            print(f"✅ Legend: {self.legend}")
-        
-        print("=" * 50)
+            self.set_directions(register_options.get('directions', {}))
     
-    def get_underlying_token_contract(self):
-        """Get the underlying ERC20 token contract"""
-        token_address = self.contract.functions.getTokenAddress().call()
-        return self.w3.eth.contract(
-            address=Web3.to_checksum_address(token_address),
-            abi=ERC20_ABI
+    async def preflight(self):
+        """Run the chain and verifier checks concurrently instead of one after another"""
+        await asyncio.gather(
+            asyncio.to_thread(self._check_chain),
+            self._check_verifier()
         )
     
-    async def approve_token_spending(self, account: Account, amount: int, purpose: str):
-        """Approve MoneyPot contract to spend tokens"""
+    def get_underlying_token_contract(self):
+        """Get the underlying ERC20 token contract (the token address never changes, so it is looked up once)"""
+        if self.token_contract is None:
+            from web3 import Web3
+            token_address = self.contract.functions.getTokenAddress().call()
+            self.token_contract = self.w3.eth.contract(
+                address=Web3.to_checksum_address(token_address),
+                abi=ERC20_ABI
+            )
+        return self.token_contract
+    
+    def get_balance_monitor(self) -> BalanceMonitor:
+        """Balance monitor for the creator and hunter (and funder), built on first use"""
+        if self.balances is None:
+            accounts = list(self.accounts.values())
+            if self.funder_account is not None:
+                accounts.append(self.funder_account)
+            self.balances = BalanceMonitor(
+                self.w3,
+                self.get_underlying_token_contract(),
+                accounts,
+                scheduler=self.scheduler,
+                funder=self.funder_account,
+                refill_token=self.parse_token_amount(REFILL_TOKEN_AMOUNT),
+                refill_native=REFILL_NATIVE_AMOUNT,
+                # Confirmation waits keep the tracked head current; a newer head means a new balance read
+                head=lambda: self.chain.head if self.chain is not None else None,
+            )
+        return self.balances
+    
+    def preflight_transaction(self, transaction: Dict[str, Any], label: str):
+        """Simulate a built transaction and raise a typed ContractRevertError instead of sending it"""
+        if not SIMULATE_TRANSACTIONS:
+            return
+        try:
+            simulate_transaction(self.w3, transaction, self.revert_decoder)
+        except ContractRevertError as e:
+            print(f"⛔ {label} would revert: {e} - skipping submission")
+            raise
+    
+    def raise_for_failed_receipt(self, transaction: Dict[str, Any], receipt, label: str):
+        """Raise the decoded revert reason for a mined transaction with status 0"""
+        decoded = explain_failed_transaction(self.w3, transaction, self.revert_decoder, receipt.blockNumber)
+        if decoded is not None:
+            print(f"❌ {label} reverted: {decoded}")
+            raise decoded
+        raise RuntimeError("Transaction failed - check contract deployment and ABI")
+    
+    async def approve_token_spending(self, account: Account, amount: int, purpose: str,
+                                     priority: int = PRIORITY_CREATE, deadline: Optional[float] = None):
+        """Approve MoneyPot contract to spend tokens
+
+        Goes through the scheduler, so concurrent approvals for the same account are
+        coalesced into one transaction and skipped when the allowance already covers them.
+        """
         print(f"\n💰 Approving token spending for {purpose}")
-        
-        # Get underlying token contract
-        token_contract = self.get_underlying_token_contract()
-        token_address = token_contract.address
-        
-        # Check current allowance
-        current_allowance = token_contract.functions.allowance(
-            account.address,
-            self.contract.address
-        ).call()
-        
-        print(f"   Current allowance: {self.format_token_amount(current_allowance)} tokens ({current_allowance:,} units)")
         print(f"   Required amount: {self.format_token_amount(amount)} tokens ({amount:,} units)")
         
-        if current_allowance >= amount:
+        token_contract = self.get_underlying_token_contract()
+        balances = self.get_balance_monitor()
+        hold = await balances.ensure_funds(account, 0, APPROVE_GAS)
+        try:
+            result = await self.scheduler.ensure_allowance(
+                account, token_contract, self.contract.address, amount, priority, deadline
+            )
+        except BaseException:
+            balances.release(hold)
+            raise
+        balances.release(hold, result.receipt.blockNumber if result.receipt is not None else None)
+        if result.skipped:
             print(f"✅ Sufficient allowance already exists")
             return
         
-        # Build approval transaction
-        nonce = self.w3.eth.get_transaction_count(account.address, 'pending')
-        gas_price = self.w3.eth.gas_price
-        
-        approve_tx = token_contract.functions.approve(
-            self.contract.address,
-            amount
-        ).build_transaction({
-            'from': account.address,
-            'gas': 100000,
-            'gasPrice': gas_price,
-            'nonce': nonce,
-            'chainId': CHAIN_ID
-        })
-        
-        # Sign and send
-        signed_tx = self.w3.eth.account.sign_transaction(approve_tx, account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        print(f"📝 Approval tx: 0x{tx_hash.hex()}")
-        print(f"🔗 Explorer: {EXPLORER_URL}/tx/0x{tx_hash.hex()}")
-        
-        # Wait for confirmation
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-        print(f"✅ Approval confirmed in block: {receipt.blockNumber}")
-        
-        if receipt.status == 0:
+        print(f"📝 Approval tx: 0x{result.tx_hash.hex()}")
+        print(f"🔗 Explorer: {EXPLORER_URL}/tx/0x{result.tx_hash.hex()}")
+        print(f"✅ Approval confirmed in block: {result.receipt.blockNumber}")
+        
+        if result.receipt.status == 0:
             raise RuntimeError("Approval transaction failed")
     
-    async def create_pot_flow(self, amount_wei: int = None, duration_seconds: int = None, fee_wei: int = None):
+    async def send_transaction(self, account: Account, call, label: str, priority: int = PRIORITY_CREATE,
+                               deadline: Optional[float] = None, spends: Optional[int] = None,
+                               confirmations: int = 1):
+        """Build, pre-flight and send a MoneyPot call through the scheduler, returning (tx, tx_hash, receipt)
+
+        With confirmations > 1 the receipt is returned once its block is that deep on
+        the canonical chain (re-read if a reorg moved the transaction).
+        """
+        def build(nonce: int, gas_price: int):
+            print(f"✅ Using nonce: {nonce} for {label} transaction")
+            transaction = call.build_transaction(self.scheduler.tx_params(account, nonce, gas_price))
+            self.preflight_transaction(transaction, label)
+            return transaction
+        
+        # Top up or fail here rather than mining an InsufficientFee revert or running out of gas
+        balances = self.get_balance_monitor()
+        hold = await balances.ensure_funds(account, spends or 0)
+        spent = (self.get_underlying_token_contract(), self.contract.address, spends) if spends else None
+        try:
+            result = await self.scheduler.submit(account, build, label, priority, deadline, spent)
+        except BaseException:
+            balances.release(hold)
+            raise
+        # Held until a balance read at or after the mined block shows the spend
+        balances.release(hold, result.receipt.blockNumber if result.receipt is not None else None)
+        print(f"📝 Transaction: 0x{result.tx_hash.hex()}")
+        print(f"🔗 Explorer: {EXPLORER_URL}/tx/0x{result.tx_hash.hex()}")
+        print(f"✅ Confirmed in block: {result.receipt.blockNumber}")
+        
+        # Check if transaction failed
+        if result.receipt.status == 0:
+            print(f"❌ Transaction failed!")
+            self.raise_for_failed_receipt(result.tx, result.receipt, label)
+        receipt = await self.chain.wait_for_confirmations(result.tx_hash, result.receipt, confirmations)
+        if receipt is not result.receipt and receipt.status == 0:
+            print("❌ Transaction failed after being mined again!")
+            self.raise_for_failed_receipt(result.tx, receipt, label)
+        return result.tx, result.tx_hash, receipt
+    
+    async def create_pot_flow(self, amount_wei: int = None, duration_seconds: int = None, fee_wei: int = None,
+                              creator: Optional[Account] = None, one_fa_address: Optional[str] = None,
+                              speculative: Optional[bool] = None):
         """Complete pot creation and registration flow
         
         Args:
             amount_wei: Amount in wei (smallest unit). Defaults to POT_AMOUNT from env
             duration_seconds: Pot duration in seconds. Defaults to DURATION from env
             fee_wei: Entry fee in wei. Defaults to ENTRY_FEE from env
+            creator: Account that creates and registers the pot. Defaults to the env creator
+            one_fa_address: 1FA address of the pot. Defaults to the env hunter
+            speculative: Return the provisional pot id without waiting for confirmations and
+                registration (they finish in the background). Defaults to SPECULATIVE_POTS from env
         """
         # Use environment defaults if not specified
-        amount_wei = amount_wei if amount_wei is not None else POT_AMOUNT
-        fee_wei = fee_wei if fee_wei is not None else ENTRY_FEE
+        amount_wei = amount_wei if amount_wei is not None else self.parse_token_amount(POT_AMOUNT)
+        fee_wei = fee_wei if fee_wei is not None else self.parse_token_amount(ENTRY_FEE)
         duration_seconds = duration_seconds if duration_seconds is not None else DURATION
+        creator = self.register_account(creator or self.creator_account)
+        one_fa_address = one_fa_address or self.hunter_account.address
         
         print("\n📦 Creating EVM Money Pot")
         print("-" * 30)
@@ -596,77 +769,129 @@ class EVMMoneyPotApp:
         
         # Approve token spending for pot creation
         await self.approve_token_spending(
-            self.creator_account,
+            creator,
             amount_wei,
             f"pot creation ({self.format_token_amount(amount_wei)} tokens)"
         )
         
-        # Build transaction with a fresh nonce
-        # We'll use 'pending' to include pending transactions when calculating the nonce
-        # This helps avoid the "already known" error
-        nonce = self.w3.eth.get_transaction_count(self.creator_account.address, 'pending')
-        gas_price = self.w3.eth.gas_price
-
-        print(f"✅ Using nonce: {nonce} for transaction")
-
-        transaction = self.contract.functions.createPot(
-            amount_wei,
-            duration_seconds,
-            fee_wei,
-            self.hunter_account.address  # Use hunter as 1FA address
-        ).build_transaction({
-            'from': self.creator_account.address,
-            'gas': 500000,
-            'gasPrice': gas_price,
-            'nonce': nonce,
-            'chainId': CHAIN_ID
-        })
-        
-        # Sign and send transaction
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.creator_account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        print(f"📝 Transaction: 0x{tx_hash.hex()}")
-        print(f"🔗 Explorer: {EXPLORER_URL}/tx/0x{tx_hash.hex()}")
-        
-        # Wait for transaction receipt
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-        print(f"✅ Confirmed in block: {receipt.blockNumber}")
-        
-        # Check if transaction failed
-        if receipt.status == 0:
-            print(f"❌ Transaction failed!")
-            raise RuntimeError("Transaction failed - check contract deployment and ABI")
-        
-        # Extract pot_id from events using utility function
-        receipt_dict = get_transaction_receipt(self.w3, tx_hash.hex())
-        pot_id = extract_pot_id_from_receipt(self.contract, receipt_dict)
+        # The scheduler assigns the nonce and sends once higher-priority work is out of the way
+        transaction, tx_hash, receipt = await self.send_transaction(
+            creator,
+            self.contract.functions.createPot(
+                amount_wei,
+                duration_seconds,
+                fee_wei,
+                one_fa_address  # The hunter by default
+            ),
+            "createPot",
+            PRIORITY_CREATE,
+            spends=amount_wei,
+        )
         
+        # The pot id stays provisional until createPot is CONFIRMATIONS_CREATE blocks deep
+        pot = self.chain.provisional("createPot", tx_hash, receipt, CONFIRMATIONS_CREATE, self._pot_id_from_receipt)
+        print(f"✅ Pot ID: {pot.value}{' (provisional)' if CONFIRMATIONS_CREATE > 1 else ''}")
+        task = asyncio.ensure_future(self._finalize_pot(pot, creator))
+        self.provisional_pots[task] = pot.value
+        task.add_done_callback(self._provisional_done)
+        if speculative is None:
+            speculative = SPECULATIVE_POTS
+        if speculative:
+            return pot.value
+        return await task
+    
+    def _pot_id_from_receipt(self, receipt) -> int:
+        pot_id = extract_pot_id_from_receipt(self.contract, receipt)
         if pot_id is None:
             raise RuntimeError("Could not extract pot_id from creation events")
-        
-        print(f"✅ Pot ID: {pot_id}")
+        return pot_id
+    
+    async def _finalize_pot(self, pot, creator: Account) -> int:
+        """Wait for the pot id to be final, then register it with the verifier"""
+        pot_id = await pot.final()
+        if pot.depth > 1:
+            print(f"✅ Pot ID {pot_id} final after {pot.depth} confirmations")
         
         # Get pot info for verification
         pot_info = get_pot_info(self.contract, pot_id)
         if pot_info:
             print(f"✅ Amount: {pot_info.get('amount')} USD")
         
-        # Step 2: Register pot with verifier service
+        # Step 2: Register pot with verifier service; the job is persisted before the first
+        # request so a pot mined here is never left unregistered by a verifier blip or crash
         print("\n🔐 Registering with verifier service...")
+        await self.run_verifier_job("register", pot_id, {"creator": creator.address, "block": pot.receipt.blockNumber})
+        
+        return pot_id
+    
+    def _provisional_done(self, task: asyncio.Task):
+        pot_id = self.provisional_pots.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Provisional pot {pot_id} was not finalized: {task.exception()}")
+    
+    async def final_pot_id(self, pot_id) -> int:
+        """The confirmed, registered id of a pot returned by a speculative create_pot_flow
+        
+        Waits for the newest pot still finalizing under that provisional id. Pots
+        that finished are no longer tracked and their id is returned unchanged.
+        """
+        pot_id = int(pot_id)
+        for task, provisional_id in reversed(list(self.provisional_pots.items())):
+            if provisional_id == pot_id:
+                return await task
+        return pot_id
+    
+    async def finalize_provisional(self):
+        """Wait for every speculatively created pot to be confirmed and registered"""
+        # Failures are reported by _provisional_done
+        await asyncio.gather(*list(self.provisional_pots), return_exceptions=True)
+    
+    def _on_reorg(self, reorg: Reorg):
+        """Drop local state derived from orphaned blocks; flows waiting on confirmations re-read their receipts"""
+        if self.balances is not None:
+            self.balances.block_number = None  # re-read balances on the next refresh
+        if self.jobs is not None:
+            for job in self.jobs.rollback(reorg.fork_block):
+                print(f"↩️  Withdrew verifier job {job.id}: its transaction was in an orphaned block")
+    
+    async def run_verifier_job(self, kind: str, key, data: Optional[Dict[str, Any]] = None):
+        """Submit a verifier job and retry it until done; raises if it ends up poisoned"""
+        job = await self.jobs.run(self.jobs.submit(kind, key, data))
+        if job.state == "orphaned":
+            raise ReorgError(f"Verifier {kind} for {key} was withdrawn: its transaction was orphaned by a reorg")
+        if job.state == "poisoned":
+            raise RuntimeError(f"Verifier {kind} for {key} failed: {job.last_error}")
+        return job
+    
+    async def resume_verifier_jobs(self):
+        """Reconcile jobs left over from a previous run against the verifier and finish the rest"""
+        skipped = len(self.jobs.store.pending()) - len(self.jobs.pending())
+        if skipped:
+            print(f"⚠️  Skipping {skipped} verifier job(s) for another chain or contract in {self.jobs.store.path}")
+        if not self.jobs.pending():
+            return
+        async with self.verifier:
+            counts = await self.jobs.reconcile()
+            print(f"🔁 Verifier jobs from a previous run: {counts['completed']} already done, {counts['pending']} to resume")
+            await self.jobs.drain()
+    
+    async def _register_pot_job(self, job):
+        """Sign and send the registration for job.key (a pot id)"""
+        pot_id = job.key
+        creator = self.accounts.get(job.data.get("creator"), self.creator_account)
         async with self.verifier as verifier:
-            # Get registration options
+            # Get registration options (also refreshes the legend when preflight was skipped)
             register_options = await verifier.register_options()
+            self.colors = register_options.get('colors', self.colors)
+            self.set_directions(register_options.get('directions', self.directions or {}))
             
             # Get the creator account address directly from the account object
             # This ensures we use the exact same address that will be recovered from the signature
-            creator_address = self.creator_account.address
+            creator_address = creator.address
             print(f"✅ Creator account address from loaded private key: {creator_address}")
 
-            # Print the private key hex (first 10 chars only for security)
-            private_key_preview = self.creator_account.key.hex()[:10] + "..."
-            print(f"✅ Creator account private key preview: {private_key_preview}")
-
-            # Create payload with iss field (the address that will sign)
+            # Create payload with iss field (the address that will sign); re-signed on every
+            # attempt so a retry never sends an expired payload
             current_time = int(time.time())
             payload = {
                 "pot_id": str(pot_id),
@@ -678,42 +903,40 @@ class EVMMoneyPotApp:
                 "chain_id": CHAIN_ID  # Include chain_id in signed payload
             }
 
-            print(f"✅ Created payload with issuer: {creator_address}")
-            print(f"✅ Payload contents: {json.dumps(payload)[:100]}...")
-
-            # Create signature for verification with the payload
-            # This is crucial - the signature must be created with the same account that's set as issuer
-            from eth_account.messages import encode_defunct
-            payload_json = json.dumps(payload)
-            print(f"Debug: Creating signature from payload JSON: {payload_json}")
-
-            # CRITICAL: Debugging the string that is being signed
-            # Use explicit string formatting to ensure 100% match with middleware
-            formatted_json = json.dumps(payload, separators=(',', ':'))
-            print(f"Debug: Explicit JSON string being signed: {formatted_json}")
-
-            # Create signature for the EXPLICITLY formatted JSON string
-            message = encode_defunct(text=formatted_json)
-            signature = self.creator_account.sign_message(message)
-            signature_hex = '0x' + signature.signature.hex() if hasattr(signature.signature, 'hex') else '0x' + str(signature.signature)
-
+            # Serialize once: the signature must cover exactly the compact JSON the middleware
+            # rebuilds with JSON.stringify, and the same bytes are sent hex-encoded
+            encoded = encode_payload(payload)
+            signature_hex = signature_cache.sign(creator, encoded.text)
             print(f"✅ Created signature: {signature_hex[:20]}...")
-            print(f"✅ Signature length: {len(signature_hex)} characters")
 
-            register_result = await verifier.register_verify(payload, signature_hex)
+            register_result = await verifier.register_verify(encoded, signature_hex)
             
             # Check if registration was successful
             if 'error' in register_result:
                 if 'already registered' in register_result['error'].lower():
                     print(f"⚠️ Pot {pot_id} already registered, continuing...")
-                    print(f"✅ Pot registration skipped (already exists)")
-                else:
-                    print(f"❌ Registration failed: {register_result['error']}")
-                    raise RuntimeError(f"Pot registration failed: {register_result['error']}")
-            else:
-                print(f"✅ Pot registered successfully")
-        
-        return pot_id
+                    return
+                raise PermanentJobError(f"Pot registration failed: {register_result['error']}")
+            print(f"✅ Pot registered successfully")
+    
+    async def _is_pot_registered(self, job) -> bool:
+        """Ask the verifier whether pot job.key is already registered"""
+        async with self.verifier as verifier:
+            info = await verifier.debug_get_pot(job.key)
+        return bool(info) and 'error' not in info
+    
+    async def _verify_attempt_job(self, job):
+        """Solve the challenges for attempt job.key, correctly or deliberately wrong"""
+        hunter = self.accounts.get(job.data.get("hunter"), self.hunter_account)
+        if job.data.get("succeed", True):
+            await self._succeed_attempt(int(job.key), hunter)
+        else:
+            await self._fail_attempt(int(job.key), hunter)
+    
+    async def _is_attempt_completed(self, job) -> bool:
+        """An attempt the verifier has settled is marked completed on-chain"""
+        attempt = await asyncio.to_thread(get_attempt_info, self.contract, int(job.key))
+        return bool(attempt.get("isCompleted"))
     
     async def hunt_pot_flow(self, pot_id: str):
         """Complete treasure hunting flow: Request Attempt → Fail → Request Attempt → Succeed"""
@@ -724,85 +947,89 @@ class EVMMoneyPotApp:
         print("1️⃣  Request First Attempt")
         print("-" * 20)
         
-        attempt_id1 = await self._request_attempt(pot_id)
+        attempt_id1, block1 = await self._request_attempt(pot_id)
         
         # Step 2: Fail First Attempt
         print("\n2️⃣  Fail First Attempt")
         print("-" * 20)
         
-        await self._fail_attempt(attempt_id1)
+        await self.run_verifier_job("verify", attempt_id1, {"succeed": False, "hunter": self.hunter_account.address,
+                                                            "block": block1})
         
         # Step 3: Request Second Attempt
         print("\n3️⃣  Request Second Attempt")
         print("-" * 20)
         
-        attempt_id2 = await self._request_attempt(pot_id)
+        attempt_id2, block2 = await self._request_attempt(pot_id)
         
         # Step 4: Succeed Second Attempt
         print("\n4️⃣  Succeed Second Attempt")
         print("-" * 20)
         
-        await self._succeed_attempt(attempt_id2)
+        await self.run_verifier_job("verify", attempt_id2, {"succeed": True, "hunter": self.hunter_account.address,
+                                                            "block": block2})
         
         return attempt_id2
     
-    async def _request_attempt(self, pot_id: str) -> int:
-        """Request an attempt on the blockchain"""
-        # Get pot info to determine fee
+    async def attempt_pot_flow(self, pot_id, succeed: bool, hunter: Optional[Account] = None) -> int:
+        """One attempt on a pot by `hunter`, answered correctly or deliberately wrong"""
+        hunter = self.register_account(hunter or self.hunter_account)
+        attempt_id, block = await self._request_attempt(pot_id, hunter)
+        await self.run_verifier_job("verify", attempt_id, {"succeed": succeed, "hunter": hunter.address, "block": block})
+        return attempt_id
+    
+    async def _request_attempt(self, pot_id: str, hunter: Optional[Account] = None):
+        """Request an attempt on the blockchain; returns (attempt_id, block number) once confirmed"""
+        hunter = hunter or self.hunter_account
+        pot_id = await self.final_pot_id(pot_id)
+        # Get pot info to determine fee; the pot's expiry is the attempt's deadline
         pot_info = get_pot_info(self.contract, int(pot_id))
         fee = pot_info.get('fee', 0)
+        deadline = pot_info.get('createdAt', 0) + pot_info.get('duration', 0) or None
 
         # Approve token spending for attempt
         await self.approve_token_spending(
-            self.hunter_account,
+            hunter,
             fee,
-            f"pot attempt (fee: {fee} tokens)"
+            f"pot attempt (fee: {fee} tokens)",
+            PRIORITY_ATTEMPT,
+            deadline
         )
         
-        # Build transaction with a fresh nonce
-        # Use 'pending' to include pending transactions
-        nonce = self.w3.eth.get_transaction_count(self.hunter_account.address, 'pending')
-        gas_price = self.w3.eth.gas_price
-
-        print(f"✅ Using nonce: {nonce} for attempt transaction")
-
-        transaction = self.contract.functions.attemptPot(int(pot_id)).build_transaction({
-            'from': self.hunter_account.address,
-            'gas': 500000,
-            'gasPrice': gas_price,
-            'nonce': nonce,
-            'chainId': CHAIN_ID
-        })
-        
-        # Sign and send transaction
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.hunter_account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        print(f"📝 Transaction: 0x{tx_hash.hex()}")
-        print(f"🔗 Explorer: {EXPLORER_URL}/tx/0x{tx_hash.hex()}")
-        
-        # Wait for transaction receipt
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-        print(f"✅ Confirmed in block: {receipt.blockNumber}")
-        
-        # Check if transaction failed
-        if receipt.status == 0:
-            raise RuntimeError("Transaction failed - check contract deployment and ABI")
+        transaction, tx_hash, receipt = await self.send_transaction(
+            hunter,
+            self.contract.functions.attemptPot(int(pot_id)),
+            "attemptPot",
+            PRIORITY_ATTEMPT,
+            deadline,
+            spends=fee,
+            confirmations=CONFIRMATIONS_ATTEMPT,
+        )
         
-        # Extract attempt_id from events
-        receipt_dict = get_transaction_receipt(self.w3, tx_hash.hex())
-        attempt_id = extract_attempt_id_from_receipt(self.contract, receipt_dict)
+        # Extract attempt_id from the events of the confirmed receipt
+        attempt_id = extract_attempt_id_from_receipt(self.contract, receipt)
         
         if attempt_id is None:
             raise RuntimeError("Could not extract attempt_id from attempt events")
         
         print(f"✅ Attempt ID: {attempt_id}")
-        return attempt_id
+        return attempt_id, receipt.blockNumber
+    
+    async def expire_pot(self, pot_id: int, account: Optional[Account] = None):
+        """Sweep an expired pot back to its creator (low priority; skipped if it would revert)"""
+        account = account or self.creator_account
+        _, _, receipt = await self.send_transaction(
+            account, self.contract.functions.expirePot(int(pot_id)), "expirePot", PRIORITY_SWEEP
+        )
+        print(f"🧹 Pot {pot_id} expired in block {receipt.blockNumber}")
+        return receipt
     
-    async def _fail_attempt(self, attempt_id: int):
+    async def _fail_attempt(self, attempt_id: int, hunter: Optional[Account] = None):
         """Fail an attempt with wrong solutions"""
+        hunter = hunter or self.hunter_account
         async with self.verifier as verifier:
             # Get authentication challenges
-            auth_options = await verifier.authenticate_options(str(attempt_id), self.hunter_account)
+            auth_options = await verifier.authenticate_options(str(attempt_id), hunter)
             print(f"✅ Got {len(auth_options.get('challenges', []))} challenges")
             
             # Extract challenge_id from the response
@@ -839,18 +1066,19 @@ class EVMMoneyPotApp:
             print(f"❌ Wrong solutions: {wrong_solutions}")
             
             # Verify wrong solutions (should fail)
-            verify_result = await verifier.authenticate_verify(wrong_solutions, challenge_id, self.hunter_account)
+            verify_result = await verifier.authenticate_verify(wrong_solutions, challenge_id, hunter)
             
             if 'error' in verify_result or not verify_result.get('success', False):
                 print(f"✅ Intentional failure achieved!")
             else:
                 print(f"⚠️  Unexpected success with wrong solutions!")
     
-    async def _succeed_attempt(self, attempt_id: int):
+    async def _succeed_attempt(self, attempt_id: int, hunter: Optional[Account] = None):
         """Succeed an attempt with correct solutions"""
+        hunter = hunter or self.hunter_account
         async with self.verifier as verifier:
             # Get authentication challenges
-            auth_options = await verifier.authenticate_options(str(attempt_id), self.hunter_account)
+            auth_options = await verifier.authenticate_options(str(attempt_id), hunter)
             print(f"✅ Got {len(auth_options.get('challenges', []))} challenges")
             
             # Extract challenge_id from the response
@@ -884,7 +1112,7 @@ class EVMMoneyPotApp:
             print(f"✅ Correct solutions: {correct_solutions}")
             
             # Verify correct solutions (should succeed)
-            verify_result = await verifier.authenticate_verify(correct_solutions, challenge_id, self.hunter_account)
+            verify_result = await verifier.authenticate_verify(correct_solutions, challenge_id, hunter)
             
             if verify_result.get('success', False):
                 print(f"🎉 SUCCESS! Attempt with correct solutions succeeded!")
@@ -905,29 +1133,28 @@ class EVMMoneyPotApp:
             
             # Get total supply
             total_supply = self.contract.functions.totalSupply().call()
-            print(f"Total Supply: {self.format_token_amount(total_supply)} {contract_symbol} ({total_supply:,} units)")
+            print(f"Total Supply: {self.format_token_amount(total_supply, self.contract)} {contract_symbol} ({total_supply:,} units)")
             
-            # Get active pots
-            active_pots = get_active_pots(self.contract)
+            # Get active pots (one call; iter_pots is for code that consumes the pots themselves)
+            active_pots = await asyncio.to_thread(get_active_pots, self.contract)
             print(f"Active Pots: {len(active_pots)}")
             
-            # Get all pots
-            all_pots = get_all_pots(self.contract)
-            print(f"Total Pots: {len(all_pots)}")
+            # Pot ids are sequential, so nextPotId is the total
+            total_pots = get_next_pot_id(self.contract)
+            print(f"Total Pots: {total_pots}")
             
-            # Display creator and hunter balances
-            creator_balance = self.contract.functions.balanceOf(self.creator_account.address).call()
-            hunter_balance = self.contract.functions.balanceOf(self.hunter_account.address).call()
+            # Display creator and hunter balances (one batched read, reused within a block)
+            balances = self.get_balance_monitor()
+            await asyncio.to_thread(balances.refresh)
+            creator = balances.accounts[self.creator_account.address]
+            hunter = balances.accounts[self.hunter_account.address]
             
-            print(f"Creator Balance: {self.format_token_amount(creator_balance)} {contract_symbol} ({creator_balance:,} units)")
-            print(f"Hunter Balance: {self.format_token_amount(hunter_balance)} {contract_symbol} ({hunter_balance:,} units)")
+            print(f"Creator Balance: {self.format_token_amount(creator.token)} tokens ({creator.token:,} units)")
+            print(f"Hunter Balance: {self.format_token_amount(hunter.token)} tokens ({hunter.token:,} units)")
             
             # Display native balances
-            creator_native = self.w3.eth.get_balance(self.creator_account.address)
-            hunter_native = self.w3.eth.get_balance(self.hunter_account.address)
-            
-            creator_native_eth = self.w3.from_wei(creator_native, 'ether')
-            hunter_native_eth = self.w3.from_wei(hunter_native, 'ether')
+            creator_native_eth = self.w3.from_wei(creator.native, 'ether')
+            hunter_native_eth = self.w3.from_wei(hunter.native, 'ether')
             
             print(f"Creator Native: {creator_native_eth} ETH")
             print(f"Hunter Native: {hunter_native_eth} ETH")
@@ -955,6 +1182,9 @@ class EVMMoneyPotApp:
             print(f"Pot ID: {pot_id}")
             print(f"Attempt ID: {attempt_id}")
             print("=" * 50)
+            await self.finalize_provisional()
+            self.scheduler.print_report()
+            await self.scheduler.close()
             
         except Exception as e:
             print(f"\n❌ Error: {e}")
@@ -971,7 +1201,19 @@ async def main():
     print("=" * 50)
     
     app = EVMMoneyPotApp()
-    await app.run_complete_flow()
+    
+    # MONEYPOT_DEBUG_LOOP=<ms> reports event-loop stalls longer than that,
+    # MONEYPOT_PROFILE=<path> additionally writes a sampled flamegraph (folded stacks)
+    debug_loop = os.getenv("MONEYPOT_DEBUG_LOOP")
+    profile_path = os.getenv("MONEYPOT_PROFILE")
+    if debug_loop or profile_path:
+        from loop_monitor import monitor_loop
+        threshold = float(debug_loop or "100") / 1000
+        stalls_path = f"{profile_path}.stalls" if profile_path else None
+        async with monitor_loop(threshold, profile_path, stalls_path=stalls_path):
+            await app.run_complete_flow()
+    else:
+        await app.run_complete_flow()
 
 if __name__ == "__main__":
     asyncio.run(main())
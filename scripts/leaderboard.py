@@ -0,0 +1,381 @@
+"""
+Incremental leaderboard and creator/hunter statistics for Money Pot
+
+Consumes PotCreated/PotAttempted/PotSolved/PotFailed events one at a time and
+keeps per-hunter and per-creator aggregates plus sorted rank indexes. Each
+event touches at most one hunter and one creator, so it updates a fixed number
+of indexes, each in O(log n) when sortedcontainers is installed (a plain
+bisect-maintained list, O(n) per update, otherwise). Top-K lookups read the
+head of an index instead of rescanning attempts on-chain. State round-trips
+through JSON snapshots so a restart resumes from the last processed log instead
+of block 0. Events from the most recent blocks are journaled so a chain reorg
+can be undone with rollback() and re-synced.
+"""
+
+import asyncio
+import bisect
+import json
+import os
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+
+LEADERBOARD_EVENTS = ("PotCreated", "PotAttempted", "PotSolved", "PotFailed")
+SNAPSHOT_VERSION = 1
+
+# sortedcontainers is optional and imported when the first index is built
+_SortedList: Any = False
+
+
+def _sorted_list():
+    """sortedcontainers.SortedList, or None when it is not installed (a bisect-maintained list is used)"""
+    global _SortedList
+    if _SortedList is False:
+        try:
+            from sortedcontainers import SortedList
+            _SortedList = SortedList
+        except ImportError:
+            _SortedList = None
+    return _SortedList
+
+
+class HunterStats:
+    """Aggregates for a single hunter address"""
+
+    __slots__ = ("attempts", "wins", "failures", "fees_spent", "rewards_earned")
+
+    def __init__(self, attempts: int = 0, wins: int = 0, failures: int = 0,
+                 fees_spent: int = 0, rewards_earned: int = 0):
+        self.attempts = attempts
+        self.wins = wins
+        self.failures = failures
+        self.fees_spent = fees_spent
+        self.rewards_earned = rewards_earned
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.attempts if self.attempts else 0.0
+
+    @property
+    def net(self) -> int:
+        return self.rewards_earned - self.fees_spent
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class CreatorStats:
+    """Aggregates for a single pot creator address"""
+
+    __slots__ = ("pots_created", "pots_solved", "amount_deposited", "amount_paid_out", "revenue")
+
+    def __init__(self, pots_created: int = 0, pots_solved: int = 0, amount_deposited: int = 0,
+                 amount_paid_out: int = 0, revenue: int = 0):
+        self.pots_created = pots_created
+        self.pots_solved = pots_solved
+        self.amount_deposited = amount_deposited
+        self.amount_paid_out = amount_paid_out
+        self.revenue = revenue
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class RankIndex:
+    """Addresses kept sorted by descending score
+
+    Backed by a SortedList, so update() and rank() are O(log n) and top(k) is
+    O(log n + k). Without sortedcontainers the entries live in a plain list:
+    rank() is still a bisect, but update() shifts the list and costs O(n).
+    """
+
+    def __init__(self):
+        sorted_list = _sorted_list()
+        self._entries = sorted_list() if sorted_list is not None else []
+        self._scores: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, key: str, score):
+        old = self._scores.get(key)
+        if old == score:
+            return
+        entries = self._entries
+        if isinstance(entries, list):
+            if old is not None:
+                del entries[bisect.bisect_left(entries, (-old, key))]
+            bisect.insort(entries, (-score, key))
+        else:
+            if old is not None:
+                entries.remove((-old, key))
+            entries.add((-score, key))
+        self._scores[key] = score
+
+    def top(self, k: int) -> List[Tuple[str, Any]]:
+        head = self._entries[:k] if isinstance(self._entries, list) else self._entries.islice(0, k)
+        return [(key, -neg) for neg, key in head]
+
+    def rank(self, key: str) -> Optional[int]:
+        """1-based position of key, or None if it has no score yet"""
+        score = self._scores.get(key)
+        if score is None:
+            return None
+        if isinstance(self._entries, list):
+            return bisect.bisect_left(self._entries, (-score, key)) + 1
+        return self._entries.bisect_left((-score, key)) + 1
+
+
+HUNTER_RANKINGS = {
+    "wins": lambda s: s.wins,
+    "rewards": lambda s: s.rewards_earned,
+    "net": lambda s: s.net,
+    "win_rate": lambda s: s.win_rate,
+}
+
+CREATOR_RANKINGS = {
+    "revenue": lambda s: s.revenue,
+    "pots_created": lambda s: s.pots_created,
+}
+
+
+class LeaderboardAggregator:
+    """Event-fed hunter/creator statistics with O(log n) top-K queries"""
+
+    def __init__(self, hunter_share_percent: int, creator_fee_share_percent: int, journal_blocks: int = 128):
+        self.hunter_share_percent = hunter_share_percent
+        self.creator_fee_share_percent = creator_fee_share_percent
+        self.hunters: Dict[str, HunterStats] = {}
+        self.creators: Dict[str, CreatorStats] = {}
+        # pot_id -> [creator, amount, fee]; PotCreated does not carry amount/fee
+        self.pots: Dict[int, list] = {}
+        # (blockNumber, logIndex) of the last applied event
+        self.cursor: Tuple[int, int] = (-1, -1)
+        # (blockNumber, logIndex, event, args) of events in the last journal_blocks blocks, for rollback()
+        self.journal_blocks = journal_blocks
+        self.journal: deque = deque()
+        # Every applied event from this block on is still in the journal
+        self._journal_from = 0
+        self._hunter_ranks = {name: RankIndex() for name in HUNTER_RANKINGS}
+        self._creator_ranks = {name: RankIndex() for name in CREATOR_RANKINGS}
+
+    @classmethod
+    def from_contract(cls, contract) -> "LeaderboardAggregator":
+        """Create an aggregator using the share percentages configured on-chain"""
+        hunter_share = contract.functions.HUNTER_SHARE_PERCENT().call()
+        creator_share = contract.functions.CREATOR_ENTRY_FEE_SHARE_PERCENT().call()
+        return cls(hunter_share, creator_share)
+
+    @property
+    def last_block(self) -> int:
+        return self.cursor[0]
+
+    def set_pot_terms(self, pot_id: int, creator: str, amount: int, fee: int):
+        """Record the amount/fee of a pot so attempts and wins can be priced"""
+        self.pots[pot_id] = [creator, amount, fee]
+
+    def _hunter(self, address: str) -> HunterStats:
+        stats = self.hunters.get(address)
+        if stats is None:
+            stats = self.hunters[address] = HunterStats()
+        return stats
+
+    def _creator(self, address: str) -> CreatorStats:
+        stats = self.creators.get(address)
+        if stats is None:
+            stats = self.creators[address] = CreatorStats()
+        return stats
+
+    def _rerank_hunter(self, address: str):
+        stats = self.hunters[address]
+        for name, score in HUNTER_RANKINGS.items():
+            self._hunter_ranks[name].update(address, score(stats))
+
+    def _rerank_creator(self, address: str):
+        stats = self.creators[address]
+        for name, score in CREATOR_RANKINGS.items():
+            self._creator_ranks[name].update(address, score(stats))
+
+    def apply(self, event) -> bool:
+        """Apply one decoded contract event; returns False if it was already applied"""
+        position = (event["blockNumber"], event["logIndex"])
+        if position <= self.cursor:
+            return False
+        self.cursor = position
+
+        args = dict(event["args"])
+        self._apply(event["event"], args, 1)
+        self.journal.append((position[0], position[1], event["event"], args))
+        cutoff = position[0] - self.journal_blocks
+        while self.journal and self.journal[0][0] < cutoff:
+            self.journal.popleft()
+        self._journal_from = max(self._journal_from, cutoff)
+        return True
+
+    def _apply(self, name: str, args: Dict[str, Any], sign: int):
+        """Add (sign=1) or remove (sign=-1) the effect of one event"""
+        if name == "PotCreated":
+            terms = self.pots.setdefault(args["id"], [args["creator"], 0, 0])
+            creator = self._creator(args["creator"])
+            creator.pots_created += sign
+            creator.amount_deposited += sign * terms[1]
+            self._rerank_creator(args["creator"])
+        elif name == "PotAttempted":
+            creator_address, _, fee = self.pots.get(args["potId"], (None, 0, 0))
+            hunter = self._hunter(args["hunter"])
+            hunter.attempts += sign
+            hunter.fees_spent += sign * fee
+            self._rerank_hunter(args["hunter"])
+            if creator_address is not None:
+                self._creator(creator_address).revenue += sign * (fee * self.creator_fee_share_percent // 100)
+                self._rerank_creator(creator_address)
+        elif name == "PotSolved":
+            creator_address, amount, _ = self.pots.get(args["potId"], (None, 0, 0))
+            reward = amount * self.hunter_share_percent // 100
+            hunter = self._hunter(args["hunter"])
+            hunter.wins += sign
+            hunter.rewards_earned += sign * reward
+            self._rerank_hunter(args["hunter"])
+            if creator_address is not None:
+                creator = self._creator(creator_address)
+                creator.pots_solved += sign
+                creator.amount_paid_out += sign * reward
+                self._rerank_creator(creator_address)
+        elif name == "PotFailed":
+            self._hunter(args["hunter"]).failures += sign
+            self._rerank_hunter(args["hunter"])
+
+    def rollback(self, block_number: int) -> int:
+        """Undo every event from block_number on (a reorg's fork block) so sync() re-applies the new chain
+
+        Returns the number of events undone. Raises RuntimeError when the reorg
+        reaches further back than the journal; rebuild from an older snapshot then.
+        """
+        if block_number > self.last_block:
+            return 0
+        if block_number < self._journal_from:
+            raise RuntimeError(f"Cannot roll back to block {block_number}: events are only journaled "
+                               f"from block {self._journal_from}")
+        undone = 0
+        while self.journal and self.journal[-1][0] >= block_number:
+            _, _, name, args = self.journal.pop()
+            self._apply(name, args, -1)
+            if name == "PotCreated":
+                # The id may belong to a different pot on the new chain; re-read its terms
+                self.pots.pop(args["id"], None)
+            undone += 1
+        # Everything before the fork block stays applied; sync() resumes at the fork block
+        self.cursor = (block_number - 1, 2 ** 63)
+        return undone
+
+    def top_hunters(self, k: int = 10, by: str = "wins") -> List[Tuple[str, Any]]:
+        if by not in self._hunter_ranks:
+            raise ValueError(f"Unknown hunter ranking {by!r}, expected one of {list(HUNTER_RANKINGS)}")
+        return self._hunter_ranks[by].top(k)
+
+    def top_creators(self, k: int = 10, by: str = "revenue") -> List[Tuple[str, Any]]:
+        if by not in self._creator_ranks:
+            raise ValueError(f"Unknown creator ranking {by!r}, expected one of {list(CREATOR_RANKINGS)}")
+        return self._creator_ranks[by].top(k)
+
+    def hunter_rank(self, address: str, by: str = "wins") -> Optional[int]:
+        return self._hunter_ranks[by].rank(address)
+
+    async def sync(self, contract, to_block: Optional[int] = None, from_block: Optional[int] = None,
+                   page: int = 2000) -> int:
+        """Fetch and apply leaderboard events since the cursor; returns the number applied"""
+        w3 = contract.w3
+        if to_block is None:
+            to_block = await asyncio.to_thread(lambda: w3.eth.block_number)
+        start = from_block if from_block is not None else max(self.last_block, 0)
+
+        from eth_utils import event_abi_to_log_topic
+
+        topics = {}
+        for name in LEADERBOARD_EVENTS:
+            event = contract.events[name]()
+            topics["0x" + event_abi_to_log_topic(event.abi).hex()] = event
+
+        applied = 0
+        for page_start in range(start, to_block + 1, page):
+            page_end = min(page_start + page - 1, to_block)
+            logs = await asyncio.to_thread(w3.eth.get_logs, {
+                "address": contract.address,
+                "fromBlock": page_start,
+                "toBlock": page_end,
+                "topics": [list(topics)],
+            })
+            decoded = []
+            for log in logs:
+                event = topics.get("0x" + bytes(log["topics"][0]).hex())
+                if event is not None:
+                    decoded.append(event.process_log(log))
+            decoded.sort(key=lambda e: (e["blockNumber"], e["logIndex"]))
+            await self._hydrate_pots(contract, decoded)
+            for event in decoded:
+                applied += self.apply(event)
+        return applied
+
+    async def _hydrate_pots(self, contract, events: list):
+        """Read amount/fee of every unknown pot the page refers to with one batched getPot
+
+        Besides pots created in the page, this covers attempts on and wins of pots
+        created before the sync started (e.g. from_block after deployment), which
+        would otherwise be priced at a fee and amount of 0.
+        """
+        from pot_iter import fetch_pots
+        from pot_records import Pot
+
+        unknown = {}
+        for event in events:
+            pot_id = event["args"]["id"] if event["event"] == "PotCreated" else event["args"].get("potId")
+            if pot_id is not None and pot_id not in self.pots:
+                unknown[pot_id] = None
+        if not unknown:
+            return
+        for pot_data in await asyncio.to_thread(fetch_pots, contract, list(unknown)):
+            pot = Pot.from_tuple(pot_data)
+            self.set_pot_terms(pot.id, pot.creator, pot.amount, pot.fee)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "hunter_share_percent": self.hunter_share_percent,
+            "creator_fee_share_percent": self.creator_fee_share_percent,
+            "cursor": list(self.cursor),
+            "journal": [list(entry) for entry in self.journal],
+            "journal_from": self._journal_from,
+            "pots": {str(pot_id): terms for pot_id, terms in self.pots.items()},
+            "hunters": {address: stats.to_dict() for address, stats in self.hunters.items()},
+            "creators": {address: stats.to_dict() for address, stats in self.creators.items()},
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> "LeaderboardAggregator":
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise RuntimeError(f"Unsupported leaderboard snapshot version: {data.get('version')}")
+        aggregator = cls(data["hunter_share_percent"], data["creator_fee_share_percent"])
+        aggregator.cursor = tuple(data["cursor"])
+        aggregator.journal.extend(tuple(entry) for entry in data.get("journal", []))
+        # Snapshots from before the journal existed cannot be rolled back into
+        aggregator._journal_from = data.get("journal_from", aggregator.last_block + 1)
+        aggregator.pots = {int(pot_id): terms for pot_id, terms in data["pots"].items()}
+        for address, fields in data["hunters"].items():
+            aggregator.hunters[address] = HunterStats(**fields)
+            aggregator._rerank_hunter(address)
+        for address, fields in data["creators"].items():
+            aggregator.creators[address] = CreatorStats(**fields)
+            aggregator._rerank_creator(address)
+        return aggregator
+
+    def save(self, path: str):
+        """Write the snapshot atomically so a crash never leaves a truncated file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LeaderboardAggregator":
+        with open(path, "r") as f:
+            return cls.from_snapshot(json.load(f))
+
@@ -0,0 +1,266 @@
+"""
+Event-loop stall detection and sampling profiler for the async flows
+
+The flows call sync web3, RSA encryption and signing from coroutines, which
+blocks the loop. LoopStallDetector runs a heartbeat coroutine plus a watchdog
+thread: when the heartbeat is late by more than the threshold, the watchdog
+captures the loop thread's stack, so each stall is attributed to the code that
+was blocking. StackSampler periodically samples a thread's stack and writes
+folded stacks ("frame;frame;frame count") that flamegraph.pl, speedscope and
+inferno read directly.
+"""
+
+import asyncio
+import contextlib
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, List
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def _folded_stack(frame) -> str:
+    """Root-first, semicolon-separated stack in flamegraph folded format"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class LagHistogram:
+    """Streaming histogram of loop lags: log-spaced buckets, so memory stays bounded for any run length
+
+    Quantiles are exact to within `growth` (2%) relative error; the maximum is exact.
+    """
+
+    __slots__ = ("growth", "resolution", "counts", "count", "max")
+
+    def __init__(self, growth: float = 1.02, resolution: float = 1e-6):
+        self.growth = growth
+        # Lags below this (1 µs) share bucket 0
+        self.resolution = resolution
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, lag: float):
+        self.count += 1
+        if lag > self.max:
+            self.max = lag
+        bucket = 0 if lag < self.resolution else 1 + int(math.log(lag / self.resolution, self.growth))
+        self.counts[bucket] += 1
+
+    def _upper(self, bucket: int) -> float:
+        return 0.0 if bucket == 0 else self.resolution * self.growth ** bucket
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, capped at the exact maximum"""
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(q * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return min(self._upper(bucket), self.max)
+        return self.max
+
+
+class Stall:
+    """One period during which the event loop did not run the heartbeat"""
+
+    __slots__ = ("started", "duration", "stack")
+
+    def __init__(self, started: float, stack: str):
+        self.started = started
+        self.duration = 0.0
+        self.stack = stack
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"started": self.started, "duration_ms": round(self.duration * 1000, 3), "stack": self.stack}
+
+
+class LoopStallDetector:
+    """Heartbeat + watchdog thread that measures loop lag and captures stacks of blocking code"""
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.005, verbose: bool = True):
+        self.threshold = threshold
+        self.interval = interval
+        self.verbose = verbose
+        self.lags = LagHistogram()
+        self.stalls: List[Stall] = []
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._current: Optional[Stall] = None
+        self._stop = threading.Event()
+        self._task = None
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lags.add(lag)
+            self._beat = time.monotonic()
+            stall = self._current
+            if stall is not None:
+                self._current = None
+                stall.duration = lag
+                if self.verbose:
+                    print(f"🐢 Event loop blocked for {lag * 1000:.0f} ms at {stall.stack.rsplit(';', 1)[-1]}")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._current is not None:
+                continue
+            if time.monotonic() - self._beat < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stall = Stall(time.time(), _folded_stack(frame))
+                self.stalls.append(stall)
+                self._current = stall
+
+    def start(self):
+        """Start monitoring the running loop (call from inside a coroutine)"""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        self._watchdog.join()
+        # A stall still in progress when monitoring ends has not seen its closing heartbeat
+        if self._current is not None:
+            self._current.duration = time.monotonic() - self._beat
+            self._current = None
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "max_lag_ms": round(self.lags.max * 1000, 3),
+            "p99_lag_ms": round(self.lags.quantile(0.99) * 1000, 3),
+            "stalls": len(self.stalls),
+            "stalled_ms": round(sum(s.duration for s in self.stalls) * 1000, 3),
+        }
+
+    def top_offenders(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Blocking call sites ranked by total stalled time"""
+        totals: Dict[str, List[float]] = {}
+        for stall in self.stalls:
+            site = stall.stack.rsplit(";", 1)[-1]
+            totals.setdefault(site, []).append(stall.duration)
+        ranked = sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True)
+        return [
+            {"site": site, "count": len(durations), "total_ms": round(sum(durations) * 1000, 3),
+             "max_ms": round(max(durations) * 1000, 3)}
+            for site, durations in ranked[:limit]
+        ]
+
+    def write_folded(self, path: str):
+        """Write stalls as folded stacks weighted by stalled milliseconds"""
+        weights = Counter()
+        for stall in self.stalls:
+            weights[stall.stack] += max(1, int(stall.duration * 1000))
+        _write_folded(path, weights)
+
+
+class StackSampler:
+    """Low-overhead periodic stack sampler for one thread (the event loop by default) or all threads"""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None, all_threads: bool = False):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.all_threads = all_threads
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.all_threads:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.samples[_folded_stack(frame)] += 1
+                continue
+            frame = frames.get(self.thread_id)
+            if frame is not None:
+                self.samples[_folded_stack(frame)] += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str):
+        _write_folded(path, self.samples)
+
+
+def _write_folded(path: str, weights: Counter):
+    with open(path, "w") as f:
+        for stack, count in weights.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+@contextlib.asynccontextmanager
+async def monitor_loop(threshold: float = 0.1, profile_path: Optional[str] = None,
+                       sample_interval: float = 0.005, stalls_path: Optional[str] = None):
+    """Watch the running loop for stalls and optionally sample it into a flamegraph file
+
+    Usage:
+        async with monitor_loop(threshold=0.05, profile_path="flow.folded") as detector:
+            await app.run_complete_flow()
+    """
+    detector = LoopStallDetector(threshold=threshold)
+    sampler = StackSampler(sample_interval) if profile_path else None
+    detector.start()
+    if sampler:
+        sampler.start()
+    try:
+        yield detector
+    finally:
+        if sampler:
+            sampler.stop()
+            sampler.write_folded(profile_path)
+        await detector.stop()
+        if stalls_path:
+            detector.write_folded(stalls_path)
+        _print_report(detector, profile_path, stalls_path)
+
+
+def _print_report(detector: LoopStallDetector, profile_path: Optional[str], stalls_path: Optional[str]):
+    summary = detector.summary()
+    print("\n🐢 Event Loop Report")
+    print("-" * 30)
+    print(f"Max lag: {summary['max_lag_ms']:.1f} ms (p99 {summary['p99_lag_ms']:.1f} ms)")
+    print(f"Stalls over {detector.threshold * 1000:.0f} ms: {summary['stalls']} ({summary['stalled_ms']:.0f} ms total)")
+    for offender in detector.top_offenders(5):
+        print(f"   {offender['total_ms']:8.0f} ms  x{offender['count']:<3} {offender['site']}")
+    if profile_path:
+        print(f"🔥 Sampled profile (folded stacks): {profile_path}")
+    if stalls_path:
+        print(f"🔥 Stall stacks (folded, weighted by ms): {stalls_path}")
+
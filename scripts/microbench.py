@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for hot client-side paths
+
+    python microbench.py [--number 2000] [--only payload] [--json report.json]
+
+Each benchmark pairs the previous implementation ("before") with the current one
+("after") on the same inputs and reports microseconds per call, so regressions
+show up as a ratio rather than an absolute number that depends on the machine.
+"""
+
+import argparse
+import json
+import sys
+import time
+import timeit
+from typing import Callable, Dict, Any, List, Tuple
+
+from token_units import format_units, format_units_many, parse_units
+from wallet_auth import EncodedPayload, SignatureCache, wallet_request
+
+# Throwaway key; never funded
+BENCH_PRIVATE_KEY = "0x" + "11" * 32
+
+
+def _register_payload() -> Dict[str, Any]:
+    now = int(time.time())
+    return {
+        "pot_id": "42",
+        "1p": "Ab3$kP9!",
+        "legend": {"A": "up", "B": "down", "C": "left", "D": "right", "E": "skip"},
+        "iat": now,
+        "iss": "0x5B38Da6a701c568545dCfcB03FcB875f56beddC4",
+        "exp": now + 3600,
+        "chain_id": 102031,
+    }
+
+
+def bench_payload() -> List[Tuple[str, Callable[[], Any], Callable[[], Any]]]:
+    """Register payload: three json.dumps + hex vs one canonical encode"""
+    payload = _register_payload()
+
+    def before():
+        json.dumps(payload)[:100]
+        json.dumps(payload)
+        formatted = json.dumps(payload, separators=(",", ":"))
+        return formatted, json.dumps(payload).encode("utf-8").hex()
+
+    def after():
+        encoded = EncodedPayload(payload)
+        return encoded.text, encoded.hex
+
+    return [("register payload encode", before, after)]
+
+
+def bench_signatures() -> List[Tuple[str, Callable[[], Any], Callable[[], Any]]]:
+    """authenticate_options body: sign every call vs signature cache hit"""
+    from eth_account import Account
+    from eth_account.messages import encode_defunct
+
+    account = Account.from_key(BENCH_PRIVATE_KEY)
+    cache = SignatureCache()
+    payload = {"attempt_id": "7", "chain_id": 102031}
+
+    def before():
+        signed = account.sign_message(encode_defunct(text="7"))
+        return {"encrypted_payload": json.dumps(payload).encode("utf-8").hex(),
+                "signature": "0x" + bytes(signed.signature).hex()}
+
+    def after():
+        return wallet_request(payload, account, message="7", cache=cache)
+
+    return [("authenticate request (repeat attempt)", before, after)]
+
+
+def bench_token_math() -> List[Tuple[str, Callable[[], Any], Callable[[], Any]]]:
+    """Token amounts: float parse/format vs exact integer math, single values and a 1k-pot column"""
+    import random
+    from array import array
+
+    decimals = 18
+    rng = random.Random(1)
+    column = array("Q", (rng.randrange(10 ** 15, 10 ** 19) for _ in range(1000)))
+    # The exact path must round-trip every amount; the float path it replaces does not
+    assert all(parse_units(text, decimals) == amount
+               for text, amount in zip(format_units_many(column, decimals), column))
+
+    def float_parse(value: str) -> int:
+        return int(float(value) * (10 ** decimals))
+
+    def float_format(amount: int) -> str:
+        token_amount = amount / (10 ** decimals)
+        if token_amount >= 1:
+            return f"{token_amount:.6f}"
+        return f"{token_amount:.18f}".rstrip('0').rstrip('.')
+
+    def exact_format(amount: int) -> str:
+        return format_units(amount, decimals, 6 if amount >= 10 ** decimals else None)
+
+    amount = column[0]
+    return [
+        ("parse token amount", lambda: float_parse("1234.567891"), lambda: parse_units("1234.567891", decimals)),
+        ("format token amount", lambda: float_format(amount), lambda: exact_format(amount)),
+        ("format 1k-pot amount column", lambda: [float_format(a) for a in column],
+         lambda: format_units_many(column, decimals, 6)),
+    ]
+
+
+BENCHMARKS: Dict[str, Callable[[], List[Tuple[str, Callable[[], Any], Callable[[], Any]]]]] = {
+    "payload": bench_payload,
+    "signatures": bench_signatures,
+    "token_math": bench_token_math,
+}
+
+
+def _per_call_us(fn: Callable[[], Any], number: int) -> float:
+    fn()  # warm caches and lazy imports outside the timed region
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(names: List[str], number: int) -> List[Dict[str, Any]]:
+    results = []
+    for name in names:
+        for label, before, after in BENCHMARKS[name]():
+            before_us, after_us = _per_call_us(before, number), _per_call_us(after, number)
+            results.append({
+                "group": name,
+                "case": label,
+                "before_us": round(before_us, 3),
+                "after_us": round(after_us, 3),
+                "speedup": round(before_us / after_us, 2) if after_us else None,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for Money Pot client hot paths")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing repeat")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only these groups")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.only or list(BENCHMARKS), args.number)
+    width = max(len(r["case"]) for r in results)
+    print(f"{'case':<{width}}  {'before µs':>10}  {'after µs':>10}  speedup")
+    for r in results:
+        print(f"{r['case']:<{width}}  {r['before_us']:>10.2f}  {r['after_us']:>10.2f}  {r['speedup']}x")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,617 @@
+"""
+In-process MoneyPot chain and verifier for reproducible benchmark runs
+
+MockChain is a Web3 provider that executes the MoneyPot contract and its
+underlying ERC-20 token in memory instead of talking to a node. Each raw
+transaction is mined into a block of its own as soon as it is sent (like a
+local node with automine), and an empty block follows every `block_time`
+seconds of its clock so confirmation depths are reached. Every address starts
+with `token_balance` tokens and `native_balance` wei; gas is charged at the
+intrinsic cost of the transaction.
+
+MockVerifierClient answers the verifier routes against the same chain: it
+checks wallet signatures, stores each pot's 1P password and legend, hands out
+challenges derived from the attempt id and settles attempts on the chain.
+
+Nothing here depends on randomness or the order in which concurrent requests
+arrive beyond what a real chain depends on, and every request gets an answer,
+so the same operations produce the same outcomes run after run.
+moneypot_bench's mock target is built on it. Calls always run against the
+latest state; there is no history to simulate a past block against.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+
+from web3.providers.base import JSONBaseProvider
+
+from abi_cache import load_compiled_abi
+from demo import ERC20_ABI, EVMVerifierServiceClient
+from replay import ReplayClock, decode_raw_transaction
+
+MONEYPOT_ADDRESS = "0x000000000000000000000000000000000000d0a7"
+TOKEN_ADDRESS = "0x000000000000000000000000000000000000700c"
+VERIFIER_ADDRESS = "0x000000000000000000000000000000000000fe71"
+ZERO_ADDRESS = "0x" + "00" * 20
+HUNTER_SHARE_PERCENT = 60
+CREATOR_ENTRY_FEE_SHARE_PERCENT = 50
+# Challenges per attempt
+DIFFICULTY = 3
+ATTEMPT_TTL = 300
+GAS_PRICE = 10 ** 9
+COLORS = ("red", "green", "blue", "yellow")
+DIRECTIONS = {"up": "U", "down": "D", "left": "L", "right": "R"}
+# Characters the mock verifier spreads over the color groups next to the pot's password
+FILLER = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+# ERC-20 functions MoneyPot pulls tokens with; demo.ERC20_ABI only has what the app calls
+_TOKEN_EXTRA_ABI = [
+    {"type": "function", "name": "transferFrom", "outputs": [{"type": "bool", "name": ""}],
+     "inputs": [{"type": "address", "name": "from"}, {"type": "address", "name": "to"},
+                {"type": "uint256", "name": "amount"}]},
+]
+
+
+def _abi_types(params: List[Dict[str, Any]]) -> List[str]:
+    types = []
+    for param in params:
+        if param["type"].startswith("tuple"):
+            types.append("(" + ",".join(_abi_types(param["components"])) + ")" + param["type"][5:])
+        else:
+            types.append(param["type"])
+    return types
+
+
+def _functions(abi: List[Dict[str, Any]]) -> Dict[bytes, Tuple[str, List[str], List[str]]]:
+    """4-byte selector -> (name, input types, output types)"""
+    from eth_utils import function_signature_to_4byte_selector
+
+    table = {}
+    for entry in abi:
+        if entry.get("type") == "function":
+            inputs = _abi_types(entry["inputs"])
+            selector = function_signature_to_4byte_selector(f"{entry['name']}({','.join(inputs)})")
+            table[selector] = (entry["name"], inputs, _abi_types(entry.get("outputs", [])))
+    return table
+
+
+def _word(value: Any) -> str:
+    from eth_abi import encode
+
+    return "0x" + encode(["address" if isinstance(value, str) else "uint256"], [value]).hex()
+
+
+class Revert(Exception):
+    """A contract call reverted with one of the MoneyPot custom errors"""
+
+    def __init__(self, name: str, *args):
+        super().__init__(name, *args)
+        self.name = name
+        self.values = args
+
+
+class MockChain(JSONBaseProvider):
+    """Web3 provider backed by an in-memory MoneyPot deployment"""
+
+    def __init__(self, chain_id: int = 31337, block_time: float = 2.0, token_balance: int = 10 ** 24,
+                 native_balance: int = 10 ** 20, clock: Optional[ReplayClock] = None):
+        super().__init__()
+        compiled = load_compiled_abi()
+        self.chain_id = chain_id
+        self.block_time = block_time
+        # Confirmation waits (ChainHeadTracker) sleep on this clock: instant by default, so they
+        # skip ahead to the next empty block instead of waiting for it
+        self.clock = clock or ReplayClock("instant")
+        self._moneypot = _functions(compiled.abi)
+        self._token = _functions(ERC20_ABI + _TOKEN_EXTRA_ABI)
+        self._errors = {name: (selector, types) for selector, (name, types, _) in compiled.error_selectors.items()}
+        from eth_utils import event_abi_to_log_topic
+        self._topics = {entry["name"]: "0x" + event_abi_to_log_topic(entry).hex()
+                        for entry in compiled.abi if entry.get("type") == "event"}
+        self._lock = threading.RLock()
+        self.tokens: Dict[str, int] = defaultdict(lambda: token_balance)
+        self.tokens[MONEYPOT_ADDRESS] = 0
+        self.native: Dict[str, int] = defaultdict(lambda: native_balance)
+        self.allowances: Dict[Tuple[str, str], int] = {}
+        self.nonces: Dict[str, int] = defaultdict(int)
+        self.pots: List[Dict[str, Any]] = []
+        self.attempts: List[Dict[str, Any]] = []
+        self.blocks: List[Dict[str, Any]] = []
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self.logs: List[Dict[str, Any]] = []
+        self._started = self.clock.monotonic()
+        self._ticks = 0
+        self._mine()
+
+    # --- blocks -----------------------------------------------------------------
+
+    @property
+    def timestamp(self) -> int:
+        return self.blocks[-1]["timestamp"] if self.blocks else 0
+
+    def _mine(self, tx_hashes: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        from eth_utils import keccak
+
+        number = len(self.blocks)
+        block = {
+            "number": number,
+            "hash": "0x" + keccak(text=f"mock block {number}").hex(),
+            "parentHash": self.blocks[-1]["hash"] if self.blocks else "0x" + "00" * 32,
+            # Wall-clock time, so pot and attempt expiries are as far away as on a live chain
+            "timestamp": max(self.timestamp, int(time.time())),
+            "transactions": list(tx_hashes),
+        }
+        self.blocks.append(block)
+        return block
+
+    def _advance(self):
+        """Mine the empty blocks that are due on the clock"""
+        due = int((self.clock.monotonic() - self._started) / self.block_time) if self.block_time > 0 else 0
+        while self._ticks < due:
+            self._ticks += 1
+            self._mine()
+
+    # --- contracts --------------------------------------------------------------
+
+    def _revert_data(self, revert: Revert) -> str:
+        from eth_abi import encode
+
+        selector, types = self._errors[revert.name]
+        return "0x" + (selector + encode(types, list(revert.values))).hex()
+
+    def _emit(self, logs: list, event: str, indexed: tuple, value: int):
+        from eth_abi import encode
+
+        logs.append({"address": MONEYPOT_ADDRESS,
+                     "topics": [self._topics[event]] + [_word(arg) for arg in indexed],
+                     "data": "0x" + encode(["uint256"], [value]).hex()})
+
+    def _transfer(self, source: str, target: str, amount: int, write: bool):
+        if self.tokens[source] < amount:
+            raise Revert("SafeERC20FailedOperation", TOKEN_ADDRESS)
+        if write:
+            self.tokens[source] -= amount
+            self.tokens[target] += amount
+
+    def _pull(self, owner: str, amount: int, write: bool):
+        """MoneyPot's safeTransferFrom(owner, MoneyPot, amount)"""
+        allowed = self.allowances.get((owner, MONEYPOT_ADDRESS), 0)
+        if allowed < amount:
+            raise Revert("SafeERC20FailedOperation", TOKEN_ADDRESS)
+        self._transfer(owner, MONEYPOT_ADDRESS, amount, write)
+        if write:
+            self.allowances[(owner, MONEYPOT_ADDRESS)] = allowed - amount
+
+    def _pot(self, pot_id: int) -> Dict[str, Any]:
+        if pot_id >= len(self.pots):
+            raise Revert("PotNotActive")
+        return self.pots[pot_id]
+
+    @staticmethod
+    def _pot_tuple(pot: Dict[str, Any]) -> tuple:
+        return (pot["id"], pot["creator"], pot["totalAmount"], pot["fee"], pot["createdAt"], pot["expiresAt"],
+                pot["isActive"], pot["attemptsCount"], pot["oneFaAddress"])
+
+    @staticmethod
+    def _attempt_tuple(attempt: Dict[str, Any]) -> tuple:
+        return (attempt["id"], attempt["potId"], attempt["hunter"], attempt["expiresAt"], attempt["difficulty"],
+                attempt["isCompleted"])
+
+    def _call_moneypot(self, name: str, args: tuple, sender: str, write: bool, logs: list) -> tuple:
+        now = self.timestamp
+        if name in ("name", "symbol"):
+            return ("MoneyPot" if name == "name" else "MPOT",)
+        if name == "decimals":
+            return (18,)
+        if name in ("totalSupply", "MIN_FEE"):
+            return (0,)
+        if name in ("balanceOf", "getBalance"):
+            return (0,)
+        if name in ("getTokenAddress", "underlying"):
+            return (TOKEN_ADDRESS,)
+        if name == "verifier":
+            return (VERIFIER_ADDRESS,)
+        if name == "HUNTER_SHARE_PERCENT":
+            return (HUNTER_SHARE_PERCENT,)
+        if name == "CREATOR_ENTRY_FEE_SHARE_PERCENT":
+            return (CREATOR_ENTRY_FEE_SHARE_PERCENT,)
+        if name == "DIFFICULTY_MOD":
+            return (DIFFICULTY,)
+        if name == "nextPotId":
+            return (len(self.pots),)
+        if name == "nextAttemptId":
+            return (len(self.attempts),)
+        if name == "getPots":
+            return ([pot["id"] for pot in self.pots],)
+        if name == "getActivePots":
+            return ([pot["id"] for pot in self.pots if pot["isActive"]],)
+        if name in ("getPot", "pots"):
+            # Like a Solidity mapping, unknown ids read as an all-zero struct
+            pot = self._pot_tuple(self.pots[args[0]]) if args[0] < len(self.pots) else \
+                (0, ZERO_ADDRESS, 0, 0, 0, 0, False, 0, ZERO_ADDRESS)
+            return (pot,) if name == "getPot" else pot
+        if name in ("getAttempt", "attempts"):
+            attempt = self._attempt_tuple(self.attempts[args[0]]) if args[0] < len(self.attempts) else \
+                (0, 0, ZERO_ADDRESS, 0, 0, False)
+            return (attempt,) if name == "getAttempt" else attempt
+        if name == "createPot":
+            amount, duration, fee, one_fa = args
+            self._pull(sender, amount, write)
+            pot_id = len(self.pots)
+            if write:
+                from web3 import Web3
+
+                self.pots.append({"id": pot_id, "creator": Web3.to_checksum_address(sender), "totalAmount": amount,
+                                  "fee": fee, "createdAt": now, "expiresAt": now + duration, "isActive": True,
+                                  "attemptsCount": 0, "oneFaAddress": Web3.to_checksum_address(one_fa)})
+                self._emit(logs, "PotCreated", (pot_id, sender), now)
+            return (pot_id,)
+        if name == "attemptPot":
+            pot = self._pot(args[0])
+            if not pot["isActive"]:
+                raise Revert("PotNotActive")
+            if now >= pot["expiresAt"]:
+                raise Revert("ExpiredPot")
+            self._pull(sender, pot["fee"], write)
+            attempt_id = len(self.attempts)
+            if write:
+                from web3 import Web3
+
+                self._transfer(MONEYPOT_ADDRESS, pot["creator"].lower(),
+                               pot["fee"] * CREATOR_ENTRY_FEE_SHARE_PERCENT // 100, True)
+                pot["attemptsCount"] += 1
+                self.attempts.append({"id": attempt_id, "potId": pot["id"], "hunter": Web3.to_checksum_address(sender),
+                                      "expiresAt": now + ATTEMPT_TTL, "difficulty": DIFFICULTY, "isCompleted": False})
+                self._emit(logs, "PotAttempted", (attempt_id, pot["id"], sender), now)
+            return (attempt_id,)
+        if name == "expirePot":
+            pot = self._pot(args[0])
+            if not pot["isActive"]:
+                raise Revert("PotNotActive")
+            if now < pot["expiresAt"]:
+                raise Revert("NotExpired")
+            if write:
+                pot["isActive"] = False
+                self._transfer(MONEYPOT_ADDRESS, pot["creator"].lower(), pot["totalAmount"], True)
+                self._emit(logs, "PotExpired", (pot["id"], pot["creator"]), now)
+            return ()
+        if name == "attemptCompleted":
+            if sender != VERIFIER_ADDRESS:
+                raise Revert("Unauthorized")
+            attempt_id, solved = args
+            if attempt_id >= len(self.attempts):
+                raise Revert("AttemptExpired")
+            attempt = self.attempts[attempt_id]
+            pot = self.pots[attempt["potId"]]
+            if attempt["isCompleted"]:
+                raise Revert("AttemptCompleted")
+            if now >= attempt["expiresAt"]:
+                raise Revert("AttemptExpired")
+            if solved and not pot["isActive"]:
+                raise Revert("PotNotActive")
+            if write:
+                attempt["isCompleted"] = True
+                if solved:
+                    pot["isActive"] = False
+                    self._transfer(MONEYPOT_ADDRESS, attempt["hunter"].lower(),
+                                   pot["totalAmount"] * HUNTER_SHARE_PERCENT // 100, True)
+                    self._emit(logs, "PotSolved", (pot["id"], attempt["hunter"]), now)
+                else:
+                    self._emit(logs, "PotFailed", (attempt_id, attempt["hunter"]), now)
+            return ()
+        raise Revert("Unauthorized")
+
+    def _call_token(self, name: str, args: tuple, sender: str, write: bool) -> tuple:
+        if name == "decimals":
+            return (18,)
+        if name == "balanceOf":
+            return (self.tokens[args[0].lower()],)
+        if name == "allowance":
+            return (self.allowances.get((args[0].lower(), args[1].lower()), 0),)
+        if name == "approve":
+            if write:
+                self.allowances[(sender, args[0].lower())] = args[1]
+            return (True,)
+        if name == "transfer":
+            self._transfer(sender, args[0].lower(), args[1], write)
+            return (True,)
+        if name == "transferFrom":
+            source, target, amount = args[0].lower(), args[1].lower(), args[2]
+            allowed = self.allowances.get((source, sender), 0)
+            if allowed < amount:
+                raise Revert("SafeERC20FailedOperation", TOKEN_ADDRESS)
+            self._transfer(source, target, amount, write)
+            if write:
+                self.allowances[(source, sender)] = allowed - amount
+            return (True,)
+        raise Revert("SafeERC20FailedOperation", TOKEN_ADDRESS)
+
+    def execute(self, sender: str, to: Optional[str], data: str, value: int = 0,
+                write: bool = False) -> Tuple[str, list]:
+        """Run a call against the current state; returns (ABI-encoded output, logs). Raises Revert."""
+        sender, to = (sender or ZERO_ADDRESS).lower(), (to or "").lower()
+        calldata = bytes.fromhex(data[2:] if data.startswith("0x") else data) if data else b""
+        if self.native[sender] < value:
+            raise Revert("InsufficientEthPayment", value, self.native[sender])
+        if not calldata or to not in (MONEYPOT_ADDRESS, TOKEN_ADDRESS):
+            result, logs = "0x", []
+        else:
+            result, logs = self._dispatch(sender, to, calldata, write)
+        if write and value:
+            self.native[sender] -= value
+            self.native[to] += value
+        return result, logs
+
+    def _dispatch(self, sender: str, to: str, calldata: bytes, write: bool) -> Tuple[str, list]:
+        from eth_abi import decode, encode
+
+        table = self._moneypot if to == MONEYPOT_ADDRESS else self._token
+        if calldata[:4] not in table:
+            raise Revert("Unauthorized")
+        name, inputs, outputs = table[calldata[:4]]
+        args = tuple(decode(inputs, calldata[4:]))
+        logs: list = []
+        if to == MONEYPOT_ADDRESS:
+            result = self._call_moneypot(name, args, sender, write, logs)
+        else:
+            result = self._call_token(name, args, sender, write)
+        return "0x" + encode(outputs, list(result)).hex(), logs
+
+    @staticmethod
+    def intrinsic_gas(data: str) -> int:
+        calldata = bytes.fromhex(data[2:]) if data and data.startswith("0x") else b""
+        return 21000 + sum(16 if byte else 4 for byte in calldata)
+
+    def transact(self, sender: str, to: Optional[str], data: str, value: int = 0, gas_price: int = GAS_PRICE,
+                 tx_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Mine a transaction into a block of its own and return its receipt (status 0 if it reverted)"""
+        from eth_utils import keccak
+
+        with self._lock:
+            sender = sender.lower()
+            tx_hash = tx_hash or "0x" + keccak(text=f"mock tx {sender} {len(self.receipts)}").hex()
+            gas_used = self.intrinsic_gas(data)
+            try:
+                _, logs = self.execute(sender, to, data, value, write=True)
+                status = 1
+            except Revert:
+                logs, status = [], 0
+            self.native[sender] -= gas_used * gas_price
+            block = self._mine((tx_hash,))
+            receipt = {
+                "transactionHash": tx_hash, "transactionIndex": 0, "blockNumber": block["number"],
+                "blockHash": block["hash"], "from": sender, "to": to, "status": status,
+                "gasUsed": gas_used, "cumulativeGasUsed": gas_used, "effectiveGasPrice": gas_price,
+                "contractAddress": None, "type": 0, "logs": [],
+            }
+            for index, log in enumerate(logs):
+                log.update(blockNumber=block["number"], blockHash=block["hash"], transactionHash=tx_hash,
+                           transactionIndex=0, logIndex=index, removed=False)
+                receipt["logs"].append(log)
+                self.logs.append(log)
+            self.receipts[tx_hash] = receipt
+            return receipt
+
+    # --- JSON-RPC ---------------------------------------------------------------
+
+    def _block(self, tag: Any) -> Optional[Dict[str, Any]]:
+        if tag in ("latest", "pending", "safe", "finalized"):
+            return self.blocks[-1]
+        number = 0 if tag == "earliest" else int(tag, 16) if isinstance(tag, str) else int(tag)
+        return self.blocks[number] if number < len(self.blocks) else None
+
+    @staticmethod
+    def _hex(value: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: hex(item) if isinstance(item, int) and not isinstance(item, bool) else item
+                for key, item in value.items()}
+
+    def _format_block(self, block: Dict[str, Any]) -> Dict[str, Any]:
+        return {**self._hex(block), "miner": ZERO_ADDRESS, "difficulty": "0x0", "totalDifficulty": "0x0",
+                "gasLimit": hex(30_000_000), "gasUsed": "0x0", "baseFeePerGas": "0x0", "size": "0x0",
+                "extraData": "0x", "logsBloom": "0x" + "00" * 256, "nonce": "0x" + "00" * 8,
+                "sha3Uncles": "0x" + "00" * 32, "stateRoot": "0x" + "00" * 32, "mixHash": "0x" + "00" * 32,
+                "transactionsRoot": "0x" + "00" * 32, "receiptsRoot": "0x" + "00" * 32, "uncles": []}
+
+    def _format_receipt(self, receipt: Dict[str, Any]) -> Dict[str, Any]:
+        return {**self._hex(receipt), "logsBloom": "0x" + "00" * 256,
+                "logs": [self._hex(log) for log in receipt["logs"]]}
+
+    def _get_logs(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        start = self._block(query.get("fromBlock", "earliest"))["number"]
+        end_block = self._block(query.get("toBlock", "latest"))
+        end = end_block["number"] if end_block else len(self.blocks) - 1
+        addresses = query.get("address")
+        addresses = {a.lower() for a in ([addresses] if isinstance(addresses, str) else addresses or [])}
+        topics = query.get("topics") or []
+        matched = []
+        for log in self.logs:
+            if not start <= log["blockNumber"] <= end or (addresses and log["address"] not in addresses):
+                continue
+            if all(t is None or log["topics"][i:i + 1] and
+                   (log["topics"][i] in t if isinstance(t, list) else log["topics"][i] == t)
+                   for i, t in enumerate(topics)):
+                matched.append(self._hex(log))
+        return matched
+
+    def _handle(self, method: str, params: Any) -> Any:
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "net_version":
+            return str(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(self.blocks[-1]["number"])
+        if method == "eth_gasPrice":
+            return hex(GAS_PRICE)
+        if method == "eth_getBalance":
+            return hex(self.native[params[0].lower()])
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces[params[0].lower()])
+        if method == "eth_getBlockByNumber":
+            block = self._block(params[0])
+            return self._format_block(block) if block else None
+        if method == "eth_getTransactionReceipt":
+            receipt = self.receipts.get(params[0])
+            return self._format_receipt(receipt) if receipt else None
+        if method == "eth_getLogs":
+            return self._get_logs(params[0])
+        if method in ("eth_call", "eth_estimateGas"):
+            call = params[0]
+            data = call.get("data") or call.get("input") or "0x"
+            output, _ = self.execute(call.get("from"), call.get("to"), data, int(call.get("value", "0x0"), 16))
+            return output if method == "eth_call" else hex(self.intrinsic_gas(data))
+        if method == "eth_sendRawTransaction":
+            from eth_utils import keccak
+
+            raw = params[0]
+            tx = decode_raw_transaction(raw)
+            sender = tx["from"].lower()
+            if tx["nonce"] != self.nonces[sender]:
+                raise ValueError(f"nonce too {'low' if tx['nonce'] < self.nonces[sender] else 'high'}: "
+                                 f"expected {self.nonces[sender]}, got {tx['nonce']}")
+            self.nonces[sender] += 1
+            raw_bytes = bytes.fromhex(raw[2:] if raw.startswith("0x") else raw) if isinstance(raw, str) else bytes(raw)
+            tx_hash = "0x" + keccak(raw_bytes).hex()
+            self.transact(sender, tx["to"], tx["data"], tx["value"], tx["gasPrice"], tx_hash)
+            return tx_hash
+        raise NotImplementedError(method)
+
+    def make_request(self, method, params):
+        with self._lock:
+            self._advance()
+            try:
+                return {"jsonrpc": "2.0", "id": 1, "result": self._handle(method, params)}
+            except Revert as e:
+                return {"jsonrpc": "2.0", "id": 1,
+                        "error": {"code": 3, "message": "execution reverted", "data": self._revert_data(e)}}
+            except NotImplementedError:
+                return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": f"Method {method} not found"}}
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": str(e)}}
+
+    def make_batch_request(self, requests):
+        with self._lock:
+            return [dict(self.make_request(method, params), id=i) for i, (method, params) in enumerate(requests)]
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class MockVerifierClient(EVMVerifierServiceClient):
+    """Verifier client that serves the verifier routes in process against a MockChain"""
+
+    def __init__(self, chain: MockChain):
+        super().__init__("mock://verifier")
+        self.chain = chain
+        # pot id -> {"creator", "1p", "legend"}
+        self.registrations: Dict[int, Dict[str, Any]] = {}
+        # challenge id -> (attempt id, expected solutions)
+        self.challenges: Dict[str, Tuple[int, List[str]]] = {}
+        self._issued: Dict[int, int] = defaultdict(int)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    @staticmethod
+    def _open(body: Optional[Dict[str, Any]], message: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+        """The wallet-auth payload and the address that signed `message` (default: the payload JSON)"""
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        text = bytes.fromhex(body["encrypted_payload"]).decode("utf-8")
+        payload = json.loads(text)
+        signer = Account.recover_message(encode_defunct(text=payload[message] if message else text),
+                                         signature=body["signature"])
+        return payload, signer
+
+    def _challenges(self, attempt_id: int, password: str, legend: Dict[str, str]) -> Tuple[list, List[str]]:
+        """DIFFICULTY challenges with the password in a color picked by attempt id and round"""
+        n = self._issued[attempt_id]
+        self._issued[attempt_id] += 1
+        fillers = [c for c in FILLER if c != password]
+        challenges, solutions = [], []
+        for i in range(DIFFICULTY):
+            target = COLORS[(attempt_id + n + i) % len(COLORS)]
+            groups, offset = {}, (attempt_id * 7 + n * 3 + i) % len(fillers)
+            for j, color in enumerate(COLORS):
+                chars = [fillers[(offset + j * 2 + k) % len(fillers)] for k in range(2)]
+                groups[color] = chars + [password] if color == target else chars
+            challenges.append({"colorGroups": groups})
+            solutions.append(legend.get(target, "S"))
+        return challenges, solutions
+
+    def _settle(self, attempt_id: int, solved: bool) -> Optional[str]:
+        """Send attemptCompleted from the verifier account; returns the revert reason, if any"""
+        from eth_abi import encode
+        from eth_utils import function_signature_to_4byte_selector
+
+        data = "0x" + (function_signature_to_4byte_selector("attemptCompleted(uint256,bool)")
+                       + encode(["uint256", "bool"], [attempt_id, solved])).hex()
+        try:
+            self.chain.execute(VERIFIER_ADDRESS, MONEYPOT_ADDRESS, data)
+        except Revert as e:
+            return e.name
+        self.chain.transact(VERIFIER_ADDRESS, MONEYPOT_ADDRESS, data)
+        return None
+
+    async def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/evm/register/options":
+            return {"colors": {color: color for color in COLORS}, "directions": dict(DIRECTIONS)}
+        if path.startswith("/evm/debug/pot/"):
+            pot_id = int(path.rsplit("/", 1)[1])
+            if method == "DELETE":
+                return {"deleted": self.registrations.pop(pot_id, None) is not None}
+            registration = self.registrations.get(pot_id)
+            if registration is None:
+                return {"error": f"Pot {pot_id} not registered"}
+            return {"pot_id": str(pot_id), "creator": registration["creator"]}
+        with self.chain._lock:
+            if path == "/evm/register/verify":
+                payload, signer = self._open(body)
+                pot_id = int(payload["pot_id"])
+                if signer != payload.get("iss"):
+                    return {"error": "Signature does not match iss"}
+                if pot_id >= len(self.chain.pots) or self.chain.pots[pot_id]["creator"] != signer:
+                    return {"error": f"Pot {pot_id} was not created by {signer}"}
+                if pot_id in self.registrations:
+                    return {"error": f"Pot {pot_id} already registered"}
+                self.registrations[pot_id] = {"creator": signer, "1p": payload["1p"], "legend": payload["legend"]}
+                return {"success": True}
+            if path == "/evm/authenticate/options":
+                payload, signer = self._open(body, "attempt_id")
+                attempt_id = int(payload["attempt_id"])
+                if attempt_id >= len(self.chain.attempts):
+                    return {"error": f"Attempt {attempt_id} not found"}
+                attempt = self.chain.attempts[attempt_id]
+                registration = self.registrations.get(attempt["potId"])
+                if attempt["hunter"] != signer:
+                    return {"error": f"Attempt {attempt_id} belongs to another hunter"}
+                if registration is None:
+                    return {"error": f"Pot {attempt['potId']} not registered"}
+                if attempt["isCompleted"]:
+                    return {"error": f"Attempt {attempt_id} already completed"}
+                challenges, solutions = self._challenges(attempt_id, registration["1p"], registration["legend"])
+                challenge_id = f"{attempt_id}-{self._issued[attempt_id]}"
+                self.challenges[challenge_id] = (attempt_id, solutions)
+                return {"challenge_id": challenge_id, "challenges": challenges}
+            if path == "/evm/authenticate/verify":
+                payload, signer = self._open(body, "challenge_id")
+                challenge = self.challenges.pop(payload["challenge_id"], None)
+                if challenge is None:
+                    return {"error": "Unknown or used challenge"}
+                attempt_id, solutions = challenge
+                if self.chain.attempts[attempt_id]["hunter"] != signer:
+                    return {"error": f"Attempt {attempt_id} belongs to another hunter"}
+                solved = payload["solutions"] == solutions
+                error = self._settle(attempt_id, solved)
+                if error is not None:
+                    return {"error": f"attemptCompleted reverted: {error}"}
+                return {"success": True} if solved else {"success": False, "error": "Invalid solution"}
+        return {"error": f"Cannot {method} {path}"}
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+moneypot-bench: scenario-driven load generator for EVMMoneyPotApp
+
+    python moneypot_bench.py run scenarios/mixed.toml [--target live|mock|local] [--json report.json]
+    python moneypot_bench.py compare baseline.json candidate.json
+
+A scenario (TOML or JSON) sets the number of creators and hunters, the pot
+amount/fee/duration distributions, the correct/wrong attempt mix, target rates,
+the ramp-up and the run duration. Operations arrive open-loop (Poisson, thinned
+during ramp-up) so a slow release shows up as latency and shed load rather than
+a lower request rate. The JSON report records throughput, latency percentiles,
+gas spent and an error breakdown per operation, plus the release (package
+version and git revision) and a hash of the scenario, so that `compare` only
+lines up runs of the same scenario.
+
+Targets:
+    live   the chain and verifier from the environment, exactly like demo.py
+    local  a local node (anvil/hardhat) given by [local] rpc_url/contract_address
+    mock   an in-process MoneyPot chain and verifier (mock_chain.py), set by [mock]
+
+The first creator and hunter are the env accounts. Extra ones are derived from
+the secret BENCH_ACCOUNT_SEED (at least 32 characters): the balance monitor
+auto-refills them with real tokens and gas, so their keys must not be derivable
+from anything in this repository. The mock chain answers every request from its
+own state and the operations come from seeded streams, so mock runs below
+saturation repeat the same operations with the same outcomes. Past it, which
+arrivals are shed and which of two attempts on one pot loses the race still
+follow actual completion times, as they would on a live chain.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, List
+
+import demo
+from loop_monitor import LoopStallDetector
+
+REPORT_FORMAT = 1
+TARGETS = ("live", "mock", "local")
+OPERATIONS = ("create_pot", "attempt")
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ACCOUNT_SEED_ENV = "BENCH_ACCOUNT_SEED"
+MIN_ACCOUNT_SEED_LENGTH = 32
+
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "name": "default",
+    "target": "live",
+    "duration": 60,          # seconds at full rate, after ramp-up
+    "ramp_up": 10,           # seconds to go linearly from 0 to the target rates
+    "seed": 1,
+    "max_concurrency": 32,   # operations in flight; arrivals beyond this are shed
+    "accounts": {
+        "creators": 1,       # the first creator/hunter are the env accounts, the rest are
+        "hunters": 1,        # derived from the secret BENCH_ACCOUNT_SEED
+    },
+    "rates": {"create_pot": 0.1, "attempt": 0.5},  # operations per second
+    "pots": {
+        "initial": 1,        # pots created before the clock starts, so attempts have targets
+        "amount": "1",       # tokens; a number/string, or {dist = "uniform", min, max} / {dist = "choice", values}
+        "fee": "0.1",
+        "duration": 3600,    # seconds
+    },
+    "attempts": {"correct_ratio": 0.5},
+    "local": {"rpc_url": "http://127.0.0.1:8545", "contract_address": None, "chain_id": 31337},
+    "mock": {"chain_id": 31337, "block_time": 2},
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_scenario(path: str) -> Dict[str, Any]:
+    """Read a TOML or JSON scenario and fill in defaults"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".toml"):
+        import tomllib
+        data = tomllib.loads(raw.decode("utf-8"))
+    else:
+        data = json.loads(raw)
+    if "account_seed" in data.get("accounts", {}):
+        raise ValueError(f"accounts.account_seed is not read from scenarios, which are not secret; "
+                         f"set {ACCOUNT_SEED_ENV} instead")
+    scenario = _merge(DEFAULT_SCENARIO, data)
+    if scenario["target"] not in TARGETS:
+        raise ValueError(f"Unknown target {scenario['target']!r}, expected one of {TARGETS}")
+    return scenario
+
+
+def scenario_hash(scenario: Dict[str, Any]) -> str:
+    """Identity of the workload; the target and connection details do not change it"""
+    workload = {k: v for k, v in scenario.items() if k not in ("target", "local", "mock")}
+    return hashlib.sha256(json.dumps(workload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def sample(spec: Any, rng: random.Random) -> Any:
+    """Draw from a constant, {dist = "uniform", min, max} or {dist = "choice", values}"""
+    if not isinstance(spec, dict):
+        return spec
+    dist = spec.get("dist", "uniform")
+    if dist == "uniform":
+        low, high = float(spec["min"]), float(spec["max"])
+        value = rng.uniform(low, high)
+        # Micro-token resolution, so a sampled amount always fits the token's decimals
+        return round(value, 6) if isinstance(spec["min"], (float, str)) else round(value)
+    if dist == "choice":
+        return rng.choice(spec["values"])
+    raise ValueError(f"Unknown distribution {dist!r}")
+
+
+def release_info() -> Dict[str, Any]:
+    info = {}
+    try:
+        with open(os.path.join(REPO_ROOT, "package.json")) as f:
+            info["version"] = json.load(f).get("version")
+    except (OSError, ValueError):
+        pass
+    try:
+        info["git"] = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=REPO_ROOT,
+                                     capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["git"] = None
+    return info
+
+
+def account_seed(accounts: Dict[str, Any]) -> Optional[str]:
+    """The secret seed for extra creators/hunters, or None when the env accounts are enough"""
+    if accounts["creators"] <= 1 and accounts["hunters"] <= 1:
+        return None
+    seed = os.getenv(ACCOUNT_SEED_ENV, "")
+    if len(seed) < MIN_ACCOUNT_SEED_LENGTH:
+        raise RuntimeError(f"{ACCOUNT_SEED_ENV} must be a secret of at least {MIN_ACCOUNT_SEED_LENGTH} characters "
+                           f"to derive {accounts['creators']} creators and {accounts['hunters']} hunters; "
+                           f"anyone who knows it holds the keys of every derived account and its refills")
+    return seed
+
+
+def derive_accounts(role: str, count: int, seed: Optional[str], primary) -> List:
+    """The env account followed by count-1 deterministic accounts derived from the seed"""
+    if count <= 1:
+        return [primary]
+    from eth_account import Account
+    from eth_utils import keccak
+
+    return [primary] + [Account.from_key(keccak(text=f"{seed}:{role}:{i}")) for i in range(1, count)]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(ordered[-1], 4),
+            "mean": round(sum(ordered) / len(ordered), 4)}
+
+
+class OpStats:
+    """Outcomes of one operation type"""
+
+    __slots__ = ("arrivals", "ok", "shed", "errors", "latencies")
+
+    def __init__(self):
+        self.arrivals = 0
+        self.ok = 0
+        # Arrivals dropped because max_concurrency operations were already in flight
+        self.shed = 0
+        self.errors: Counter = Counter()
+        self.latencies: List[float] = []
+
+
+class LoadRun:
+    """Drives create_pot/attempt operations against an initialized app at the scenario's rates"""
+
+    def __init__(self, app: "demo.EVMMoneyPotApp", scenario: Dict[str, Any]):
+        self.app = app
+        self.scenario = scenario
+        # Each operation draws its parameters and arrival times from its own streams, so neither
+        # shifts with how operations interleave
+        self.rngs = {op: random.Random(f"{scenario['seed']}:{op}:params") for op in OPERATIONS}
+        self.arrival_rngs = {op: random.Random(f"{scenario['seed']}:{op}") for op in OPERATIONS}
+        self.stats = {op: OpStats() for op in OPERATIONS}
+        self.open_pots: List[int] = []
+        self.tasks: set = set()
+        self.semaphore = asyncio.Semaphore(scenario["max_concurrency"])
+        accounts = scenario["accounts"]
+        seed = account_seed(accounts)
+        self.creators = [app.register_account(a) for a in
+                         derive_accounts("creator", accounts["creators"], seed, app.creator_account)]
+        self.hunters = [app.register_account(a) for a in
+                        derive_accounts("hunter", accounts["hunters"], seed, app.hunter_account)]
+
+    def _pick(self, accounts: List, rng: random.Random, token_amount: int = 0):
+        # Route around accounts the balance monitor knows are empty
+        return self.app.get_balance_monitor().pick(accounts, token_amount) or rng.choice(accounts)
+
+    async def create_pot(self):
+        pots = self.scenario["pots"]
+        rng = self.rngs["create_pot"]
+        # Scenario amounts are whole tokens, like POT_AMOUNT/ENTRY_FEE
+        amount = self.app.parse_token_amount(sample(pots["amount"], rng))
+        fee = self.app.parse_token_amount(sample(pots["fee"], rng))
+        duration = int(sample(pots["duration"], rng))
+        pot_id = await self.app.create_pot_flow(amount, duration, fee, creator=self._pick(self.creators, rng, amount))
+        self.open_pots.append(pot_id)
+
+    async def attempt(self):
+        if not self.open_pots:
+            raise LookupError("no open pot to attempt")
+        rng = self.rngs["attempt"]
+        pot_id = rng.choice(self.open_pots)
+        succeed = rng.random() < self.scenario["attempts"]["correct_ratio"]
+        await self.app.attempt_pot_flow(pot_id, succeed, self._pick(self.hunters, rng))
+        if succeed and pot_id in self.open_pots:
+            self.open_pots.remove(pot_id)
+
+    async def _timed(self, op: str):
+        stats = self.stats[op]
+        started = time.perf_counter()
+        try:
+            await getattr(self, op)()
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+        else:
+            stats.ok += 1
+            stats.latencies.append(time.perf_counter() - started)
+        finally:
+            self.semaphore.release()
+
+    def _rate(self, op: str, elapsed: float) -> float:
+        target = float(self.scenario["rates"].get(op, 0))
+        ramp_up = float(self.scenario["ramp_up"])
+        return target if ramp_up <= 0 else target * min(1.0, elapsed / ramp_up)
+
+    async def _arrivals(self, op: str, started: float, end: float):
+        """Non-homogeneous Poisson arrivals by thinning against the full target rate"""
+        target = float(self.scenario["rates"].get(op, 0))
+        if target <= 0:
+            return
+        rng = self.arrival_rngs[op]
+        while True:
+            await asyncio.sleep(rng.expovariate(target))
+            now = time.monotonic()
+            if now >= end:
+                return
+            if rng.random() * target > self._rate(op, now - started):
+                continue
+            self.stats[op].arrivals += 1
+            if self.semaphore.locked():
+                self.stats[op].shed += 1
+                continue
+            await self.semaphore.acquire()
+            task = asyncio.get_running_loop().create_task(self._timed(op))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _progress(self, started: float):
+        while True:
+            await asyncio.sleep(5)
+            counts = ", ".join(f"{op} {s.ok} ok/{sum(s.errors.values())} err" for op, s in self.stats.items())
+            print(f"⏱️  {time.monotonic() - started:5.0f}s  {counts}  in flight {len(self.tasks)}", file=sys.stderr)
+
+    async def run(self) -> float:
+        """Seed pots, generate load for ramp_up + duration seconds, then wait for stragglers"""
+        for _ in range(int(self.scenario["pots"]["initial"])):
+            await self.semaphore.acquire()
+            await self._timed("create_pot")
+        for stats in self.stats.values():
+            stats.__init__()
+
+        started = time.monotonic()
+        end = started + float(self.scenario["ramp_up"]) + float(self.scenario["duration"])
+        progress = asyncio.get_running_loop().create_task(self._progress(started))
+        try:
+            await asyncio.gather(*(self._arrivals(op, started, end) for op in OPERATIONS))
+            if self.tasks:
+                await asyncio.gather(*list(self.tasks))
+        finally:
+            progress.cancel()
+        return time.monotonic() - started
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        operations = {}
+        for op, stats in self.stats.items():
+            errors = sum(stats.errors.values())
+            operations[op] = {
+                "target_rate": float(self.scenario["rates"].get(op, 0)),
+                "achieved_rate": round(stats.ok / elapsed, 4) if elapsed else 0.0,
+                "arrivals": stats.arrivals,
+                "ok": stats.ok,
+                "errors": errors,
+                "shed": stats.shed,
+                "error_rate": round(errors / (stats.ok + errors), 4) if stats.ok + errors else 0.0,
+                "latency_s": _percentiles(stats.latencies),
+                "error_breakdown": dict(stats.errors.most_common()),
+            }
+        return operations
+
+
+def _configure_target(scenario: Dict[str, Any]):
+    """Point demo.configure() at the scenario's chain; returns (provider, verifier) overrides"""
+    target = scenario["target"]
+    if target == "local":
+        local = scenario["local"]
+        if not local.get("contract_address"):
+            raise RuntimeError("[local] contract_address is required for target = \"local\"")
+        os.environ["EVM_RPC_URL"] = local["rpc_url"]
+        os.environ["CONTRACT_ADDRESS"] = local["contract_address"]
+        os.environ["CHAIN_ID"] = str(local["chain_id"])
+        return None, None
+    if target == "mock":
+        from mock_chain import MockChain, MockVerifierClient, MONEYPOT_ADDRESS
+
+        mock = scenario["mock"]
+        os.environ["CHAIN_ID"] = str(mock["chain_id"])
+        os.environ["EVM_RPC_URL"] = "mock://chain"
+        os.environ["CONTRACT_ADDRESS"] = MONEYPOT_ADDRESS
+        os.environ["EXPLORER_URL"] = ""
+        os.environ["VERIFIER_JOBS_PATH"] = os.path.join(tempfile.mkdtemp(prefix="moneypot-bench-"), "jobs.json")
+        chain = MockChain(int(mock["chain_id"]), float(mock["block_time"]))
+        return chain, MockVerifierClient(chain)
+    return None, None
+
+
+async def run_scenario(scenario: Dict[str, Any], log_path: Optional[str] = None) -> Dict[str, Any]:
+    demo.configure()
+    provider, verifier = _configure_target(scenario)
+    demo.configure(load_env_file=False)
+
+    app = demo.EVMMoneyPotApp(provider=provider, verifier=verifier)
+    log = open(log_path, "w") if log_path else open(os.devnull, "w")
+    detector = LoopStallDetector(threshold=0.1, verbose=False)
+    started_at = time.time()
+    with log, contextlib.redirect_stdout(log):
+        await app.initialize()
+        load = LoadRun(app, scenario)
+        detector.start()
+        try:
+            elapsed = await load.run()
+            # Speculatively created pots confirm and register in the background
+            await app.finalize_provisional()
+        finally:
+            await detector.stop()
+            await app.scheduler.close()
+
+    scheduler = app.scheduler.report()
+    total = scheduler["total"]
+    return {
+        "format": REPORT_FORMAT,
+        "scenario": scenario["name"],
+        "scenario_hash": scenario_hash(scenario),
+        "target": scenario["target"],
+        "release": release_info(),
+        "started_at": int(started_at),
+        "elapsed_s": round(elapsed, 3),
+        "operations": load.report(elapsed),
+        "gas": {
+            "used": total["gas_used"],
+            "cost_wei": total["gas_cost_wei"],
+            "by_class": {name: {"used": c["gas_used"], "cost_wei": c["gas_cost_wei"]}
+                         for name, c in scheduler["classes"].items()},
+        },
+        "transactions": scheduler,
+        "balances": app.get_balance_monitor().snapshot(),
+        "event_loop": detector.summary(),
+        "pending_verifier_jobs": len(app.jobs.pending()),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📈 {report['scenario']} on {report['target']} ({report['release'].get('git')}), "
+          f"{report['elapsed_s']:.0f}s")
+    for op, stats in report["operations"].items():
+        latency = stats["latency_s"]
+        print(f"{op:>11}: {stats['achieved_rate']:.3f}/s of {stats['target_rate']}/s, "
+              f"p50 {latency.get('p50', 0):.2f}s p99 {latency.get('p99', 0):.2f}s, "
+              f"errors {stats['errors']} shed {stats['shed']} {stats['error_breakdown'] or ''}")
+    print(f"{'gas':>11}: {report['gas']['used']:,} units, {report['gas']['cost_wei']:,} wei")
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> int:
+    """Print per-operation deltas between two reports; non-zero exit if they ran different scenarios"""
+    if baseline.get("scenario_hash") != candidate.get("scenario_hash"):
+        print(f"⚠️  Different scenarios ({baseline.get('scenario_hash')} vs {candidate.get('scenario_hash')}); "
+              f"numbers are not comparable")
+        return 2
+
+    def delta(old: float, new: float) -> str:
+        return f"{new:.4g} ({(new - old) / old:+.1%})" if old else f"{new:.4g}"
+
+    print(f"{baseline['release'].get('git')} → {candidate['release'].get('git')} ({candidate['scenario']})")
+    for op in OPERATIONS:
+        old, new = baseline["operations"].get(op), candidate["operations"].get(op)
+        if not old or not new:
+            continue
+        print(f"{op:>11}: rate {delta(old['achieved_rate'], new['achieved_rate'])}, "
+              f"p50 {delta(old['latency_s'].get('p50', 0), new['latency_s'].get('p50', 0))}s, "
+              f"p99 {delta(old['latency_s'].get('p99', 0), new['latency_s'].get('p99', 0))}s, "
+              f"error rate {old['error_rate']:.1%} → {new['error_rate']:.1%}")
+    old_ops = sum(o["ok"] for o in baseline["operations"].values()) or 1
+    new_ops = sum(o["ok"] for o in candidate["operations"].values()) or 1
+    print(f"{'gas/op':>11}: {delta(baseline['gas']['used'] / old_ops, candidate['gas']['used'] / new_ops)}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="moneypot-bench", description="Scenario-driven load generator for Money Pot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run a scenario and write a JSON report")
+    run.add_argument("scenario")
+    run.add_argument("--target", choices=TARGETS, help="Override the scenario's target")
+    run.add_argument("--duration", type=float, help="Override the scenario's duration (seconds)")
+    run.add_argument("--json", dest="json_path", help="Write the report to this file (default: stdout)")
+    run.add_argument("--log", help="Write the app's per-operation output here instead of discarding it")
+    cmp = sub.add_parser("compare", help="Compare two reports of the same scenario")
+    cmp.add_argument("baseline")
+    cmp.add_argument("candidate")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f, open(args.candidate) as g:
+            sys.exit(compare(json.load(f), json.load(g)))
+
+    scenario = load_scenario(args.scenario)
+    if args.target:
+        scenario["target"] = args.target
+    if args.duration is not None:
+        scenario["duration"] = args.duration
+    report = asyncio.run(run_scenario(scenario, args.log))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Streaming pot iterator for the MoneyPot contract
+
+Pages through pot ids up to nextPotId() and hydrates them with batched getPot
+calls, so memory stays bounded by the chunk size no matter how many pots exist.
+"""
+
+import asyncio
+import time
+from typing import Optional, AsyncIterator, Iterable
+
+from pot_records import Pot, POT_STATUSES
+
+
+def fetch_pots(contract, pot_ids: list) -> list:
+    """Fetch several pots in one JSON-RPC batch, falling back to sequential calls"""
+    w3 = contract.w3
+    try:
+        with w3.batch_requests() as batch:
+            for pot_id in pot_ids:
+                batch.add(contract.functions.getPot(pot_id))
+            return list(batch.execute())
+    except Exception as e:
+        print(f"⚠️  Batched getPot failed ({e}), falling back to sequential calls")
+        return [contract.functions.getPot(pot_id).call() for pot_id in pot_ids]
+
+
+def _chunks(ids: Iterable[int], size: int) -> Iterable[list]:
+    chunk = []
+    for pot_id in ids:
+        chunk.append(pot_id)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def iter_pots(
+    contract,
+    status: Optional[str] = None,
+    creator: Optional[str] = None,
+    min_amount: Optional[int] = None,
+    chunk: int = 100,
+    start: int = 0,
+    stop: Optional[int] = None,
+    newest_first: bool = False,
+    limit: Optional[int] = None,
+) -> AsyncIterator[Pot]:
+    """Lazily yield pots matching the filters, hydrating `chunk` ids per RPC batch
+
+    Args:
+        contract: MoneyPot contract instance
+        status: Only yield pots with this Pot.status() ("active", "expired", "closed")
+        creator: Only yield pots created by this address (case-insensitive)
+        min_amount: Only yield pots holding at least this many token units
+        chunk: Number of pots hydrated per batched request
+        start: First pot id to consider
+        stop: Pot id to stop before. Defaults to nextPotId()
+        newest_first: Walk ids from the highest down
+        limit: Stop after yielding this many pots
+    """
+    if status is not None and status not in POT_STATUSES:
+        raise ValueError(f"Unknown pot status {status!r}, expected one of {POT_STATUSES}")
+    if chunk < 1:
+        raise ValueError("chunk must be at least 1")
+    if limit is not None and limit <= 0:
+        return
+
+    if stop is None:
+        stop = await asyncio.to_thread(contract.functions.nextPotId().call)
+    creator = creator.lower() if creator else None
+
+    ids = range(stop - 1, start - 1, -1) if newest_first else range(start, stop)
+    yielded = 0
+    for pot_ids in _chunks(ids, chunk):
+        # Re-read the clock per chunk so long scans classify expiry correctly
+        now = int(time.time())
+        raw_pots = await asyncio.to_thread(fetch_pots, contract, pot_ids)
+        for pot_data in raw_pots:
+            pot = Pot.from_tuple(pot_data)
+            if creator is not None and pot.creator.lower() != creator:
+                continue
+            if min_amount is not None and pot.amount < min_amount:
+                continue
+            if status is not None and pot.status(now) != status:
+                continue
+            yield pot
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+
+async def count_pots(contract, **filters) -> int:
+    """Count pots matching iter_pots filters without holding them in memory"""
+    total = 0
+    async for _ in iter_pots(contract, **filters):
+        total += 1
+    return total
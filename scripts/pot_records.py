@@ -0,0 +1,396 @@
+"""
+Compact Pot/Attempt records and a columnar PotTable for large snapshots
+
+Pot and Attempt are __slots__ classes decoded straight from the getPot/getAttempt
+struct tuples. PotTable keeps the numeric fields in array('Q') columns so 100k+
+pots fit in a few MB, with NumPy-accelerated queries and zero-copy Arrow export
+when those libraries are installed. Token amounts are uint256 on-chain, so the
+amount and fee columns are stored as low/high uint64 limb pairs (exact up to
+2**128 units, about 3.4e20 tokens at 18 decimals).
+"""
+
+import bisect
+import sys
+import time
+from array import array
+from typing import Optional, Dict, Any, Iterable, List
+
+# NumPy is optional and imported on the first columnar query, not at module import
+_np: Any = False
+
+
+def _numpy():
+    """The numpy module, or None when it is not installed (pure-Python fallbacks are used)"""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+# Field order of the MoneyPotData struct returned by getPot
+POT_FIELDS = (
+    "id",
+    "creator",
+    "amount",
+    "fee",
+    "createdAt",
+    "expiresAt",
+    "isActive",
+    "attemptsCount",
+    "oneFA",
+)
+
+# Field order of the Attempt struct returned by getAttempt
+ATTEMPT_FIELDS = (
+    "id",
+    "potId",
+    "hunter",
+    "expiresAt",
+    "difficulty",
+    "isCompleted",
+)
+
+POT_STATUSES = ("active", "expired", "closed")
+
+# On-chain status codes stored in the PotTable status column
+STATUS_CLOSED = 0
+STATUS_OPEN = 1
+
+# Token-amount columns, stored as <name>_lo/<name>_hi uint64 limbs
+WIDE_COLUMNS = ("amount", "fee")
+WIDE_LIMIT = 1 << 128
+_LOW_MASK = (1 << 64) - 1
+
+
+def _split_wide(value: int):
+    """(low, high) uint64 limbs of a token amount"""
+    if not 0 <= value < WIDE_LIMIT:
+        raise OverflowError(f"Token amount {value} does not fit PotTable's 128-bit amount columns")
+    return value & _LOW_MASK, value >> 64
+
+
+class Pot:
+    """A single MoneyPot pot"""
+
+    __slots__ = POT_FIELDS
+
+    def __init__(self, id: int, creator: str, amount: int, fee: int, createdAt: int,
+                 expiresAt: int, isActive: bool, attemptsCount: int, oneFA: str):
+        self.id = id
+        self.creator = creator
+        self.amount = amount
+        self.fee = fee
+        self.createdAt = createdAt
+        self.expiresAt = expiresAt
+        self.isActive = isActive
+        self.attemptsCount = attemptsCount
+        self.oneFA = oneFA
+
+    @classmethod
+    def from_tuple(cls, pot_data) -> "Pot":
+        """Decode the getPot struct tuple"""
+        return cls(*pot_data)
+
+    @property
+    def duration(self) -> int:
+        return self.expiresAt - self.createdAt
+
+    def status(self, now: Optional[int] = None) -> str:
+        """Classify as active, expired (still open on-chain but past expiry) or closed"""
+        if not self.isActive:
+            return "closed"
+        now = int(time.time()) if now is None else now
+        return "active" if self.expiresAt > now else "expired"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in POT_FIELDS}
+        data["duration"] = self.duration
+        return data
+
+    def __repr__(self) -> str:
+        return f"Pot(id={self.id}, creator={self.creator}, amount={self.amount}, fee={self.fee}, isActive={self.isActive})"
+
+
+class Attempt:
+    """A single attempt on a pot"""
+
+    __slots__ = ATTEMPT_FIELDS
+
+    def __init__(self, id: int, potId: int, hunter: str, expiresAt: int,
+                 difficulty: int, isCompleted: bool):
+        self.id = id
+        self.potId = potId
+        self.hunter = hunter
+        self.expiresAt = expiresAt
+        self.difficulty = difficulty
+        self.isCompleted = isCompleted
+
+    @classmethod
+    def from_tuple(cls, attempt_data) -> "Attempt":
+        """Decode the getAttempt struct tuple"""
+        return cls(*attempt_data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in ATTEMPT_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Attempt(id={self.id}, potId={self.potId}, hunter={self.hunter}, isCompleted={self.isCompleted})"
+
+
+def _exact_sum(values) -> int:
+    """Sum uint64 values without overflow by adding the 32-bit halves separately; other columns sum as ints"""
+    np = _numpy()
+    if np is not None and isinstance(values, np.ndarray) and values.dtype == np.uint64:
+        low = np.sum(values & np.uint64(0xFFFFFFFF), dtype=np.uint64)
+        high = np.sum(values >> np.uint64(32), dtype=np.uint64)
+        return (int(high) << 32) + int(low)
+    return sum(int(v) for v in values)
+
+
+class PotTable:
+    """Columnar store of pots: createdAt, duration and status as uint64/uint8 arrays, amount and fee as limb pairs
+
+    Read amount and fee through column(), which combines the limbs.
+    """
+
+    NUMERIC_COLUMNS = ("id", "createdAt", "duration", "attemptsCount")
+
+    def __init__(self, keep_creators: bool = True):
+        self.id = array("Q")
+        self.amount_lo = array("Q")
+        self.amount_hi = array("Q")
+        self.fee_lo = array("Q")
+        self.fee_hi = array("Q")
+        self.createdAt = array("Q")
+        self.duration = array("Q")
+        self.attemptsCount = array("Q")
+        self.status = array("B")
+        # Creators are kept as interned strings; skip them for pure numeric analytics
+        self.creators: Optional[List[str]] = [] if keep_creators else None
+        self._index: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def append(self, pot: Pot):
+        """Add a pot, or overwrite the row if the pot id is already present"""
+        row = self._index.get(pot.id)
+        status = STATUS_OPEN if pot.isActive else STATUS_CLOSED
+        amount_lo, amount_hi = _split_wide(pot.amount)
+        fee_lo, fee_hi = _split_wide(pot.fee)
+        if row is not None:
+            self.amount_lo[row], self.amount_hi[row] = amount_lo, amount_hi
+            self.fee_lo[row], self.fee_hi[row] = fee_lo, fee_hi
+            self.createdAt[row] = pot.createdAt
+            self.duration[row] = pot.duration
+            self.attemptsCount[row] = pot.attemptsCount
+            self.status[row] = status
+            if self.creators is not None:
+                self.creators[row] = pot.creator
+            return
+
+        self._index[pot.id] = len(self.id)
+        self.id.append(pot.id)
+        self.amount_lo.append(amount_lo)
+        self.amount_hi.append(amount_hi)
+        self.fee_lo.append(fee_lo)
+        self.fee_hi.append(fee_hi)
+        self.createdAt.append(pot.createdAt)
+        self.duration.append(pot.duration)
+        self.attemptsCount.append(pot.attemptsCount)
+        self.status.append(status)
+        if self.creators is not None:
+            self.creators.append(sys.intern(pot.creator))
+
+    def extend(self, pots: Iterable[Pot]):
+        for pot in pots:
+            self.append(pot)
+
+    def discard(self, pot_ids: Iterable[int]) -> List[int]:
+        """Remove pots by id; returns the ids that were present"""
+        rows = sorted((self._index[pot_id] for pot_id in set(pot_ids) if pot_id in self._index), reverse=True)
+        removed = [self.id[row] for row in rows]
+        columns = [getattr(self, name) for name in self._storage_columns()]
+        if self.creators is not None:
+            columns.append(self.creators)
+        for row in rows:
+            for col in columns:
+                del col[row]
+        if rows:
+            self._index = {pot_id: row for row, pot_id in enumerate(self.id)}
+        return sorted(removed)
+
+    def rollback(self, after: int) -> List[int]:
+        """Drop pots created after timestamp `after` (a reorg's common ancestor); returns their ids to re-read
+
+        Ids of pots created in orphaned blocks can be reassigned by the new chain,
+        so their rows are removed rather than kept with stale terms.
+        """
+        return self.discard([pot_id for pot_id, created in zip(self.id, self.createdAt) if created > after])
+
+    @classmethod
+    async def from_contract(cls, contract, keep_creators: bool = True, **filters) -> "PotTable":
+        """Build a table by streaming pots from the contract with iter_pots"""
+        from pot_iter import iter_pots
+
+        table = cls(keep_creators=keep_creators)
+        async for pot in iter_pots(contract, **filters):
+            table.append(pot)
+        return table
+
+    def row(self, pot_id: int) -> Optional[int]:
+        return self._index.get(pot_id)
+
+    def _storage_columns(self) -> List[str]:
+        names = list(self.NUMERIC_COLUMNS) + [f"{name}_{limb}" for name in WIDE_COLUMNS for limb in ("lo", "hi")]
+        return names + ["status"]
+
+    def column(self, name: str):
+        """Zero-copy NumPy view of a column, or the raw array when NumPy is unavailable
+
+        While a view (or an Arrow table from to_arrow) is alive the underlying
+        array cannot grow, so append() raises BufferError until it is released.
+        amount and fee are a view of the low limbs while every value fits in
+        uint64, and otherwise a copy holding exact Python ints (an object array,
+        or a list without NumPy).
+        """
+        np = _numpy()
+        if name in WIDE_COLUMNS:
+            return self._wide_column(name)
+        col = getattr(self, name)
+        if np is None:
+            return col
+        dtype = np.uint8 if name == "status" else np.uint64
+        return np.frombuffer(col, dtype=dtype) if len(col) else np.zeros(0, dtype=dtype)
+
+    def _wide_column(self, name: str):
+        np = _numpy()
+        low, high = getattr(self, f"{name}_lo"), getattr(self, f"{name}_hi")
+        if np is None:
+            if not any(high):
+                return low
+            return [(h << 64) | l for l, h in zip(low, high)]
+        low, high = self.column(f"{name}_lo"), self.column(f"{name}_hi")
+        if not high.any():
+            return low
+        return (high.astype(object) << 64) | low.astype(object)
+
+    def _open_mask(self, now: int, include_expired: bool):
+        np = _numpy()
+        if np is not None:
+            mask = self.column("status") == STATUS_OPEN
+            if not include_expired:
+                expires = self.column("createdAt") + self.column("duration")
+                mask &= expires > np.uint64(now)
+            return mask
+        return [
+            s == STATUS_OPEN and (include_expired or c + d > now)
+            for s, c, d in zip(self.status, self.createdAt, self.duration)
+        ]
+
+    def total_locked_value(self, now: Optional[int] = None, include_expired: bool = True) -> int:
+        """Exact sum of amounts held by open pots (optionally excluding ones past expiry)"""
+        np = _numpy()
+        now = int(time.time()) if now is None else now
+        mask = self._open_mask(now, include_expired)
+        if np is not None:
+            return _exact_sum(self.column("amount")[mask])
+        return sum(a for a, keep in zip(self.column("amount"), mask) if keep)
+
+    def expiring_soon(self, within: int, now: Optional[int] = None):
+        """Boolean mask of open pots whose expiry falls in (now, now + within]"""
+        np = _numpy()
+        now = int(time.time()) if now is None else now
+        if np is not None:
+            expires = self.column("createdAt") + self.column("duration")
+            return (
+                (self.column("status") == STATUS_OPEN)
+                & (expires > np.uint64(now))
+                & (expires <= np.uint64(now + within))
+            )
+        return [
+            s == STATUS_OPEN and now < c + d <= now + within
+            for s, c, d in zip(self.status, self.createdAt, self.duration)
+        ]
+
+    def expiring_soon_ids(self, within: int, now: Optional[int] = None) -> List[int]:
+        np = _numpy()
+        mask = self.expiring_soon(within, now)
+        if np is not None:
+            return self.column("id")[mask].tolist()
+        return [pot_id for pot_id, keep in zip(self.id, mask) if keep]
+
+    def fee_distribution(self, bins: Optional[List[int]] = None, open_only: bool = False) -> Dict[str, Any]:
+        """Summary statistics and optional histogram (counts per [bins[i], bins[i+1]) bucket) of entry fees"""
+        np = _numpy()
+        if open_only:
+            mask = self._open_mask(int(time.time()), True)
+            fees = self.column("fee")[mask] if np is not None else [f for f, keep in zip(self.column("fee"), mask) if keep]
+        else:
+            fees = self.column("fee")
+
+        count = len(fees)
+        if count == 0:
+            return {"count": 0}
+
+        if np is not None and fees.dtype == np.uint64:
+            p50, p90, p99 = (int(v) for v in np.percentile(fees, [50, 90, 99], method="lower"))
+            summary = {"count": count, "min": int(fees.min()), "max": int(fees.max()),
+                       "mean": _exact_sum(fees) / count, "p50": p50, "p90": p90, "p99": p99}
+            if bins:
+                summary["histogram"] = np.histogram(fees, bins=np.asarray(bins, dtype=np.float64))[0].tolist()
+            return summary
+
+        # Fees beyond uint64 (or no NumPy): exact Python ints
+        ordered = sorted(int(fee) for fee in fees)
+
+        def percentile(q: float) -> int:
+            return ordered[min(count - 1, int(q * (count - 1)))]
+
+        summary = {"count": count, "min": ordered[0], "max": ordered[-1], "mean": sum(ordered) / count,
+                   "p50": percentile(0.5), "p90": percentile(0.9), "p99": percentile(0.99)}
+        if bins:
+            histogram = [0] * (len(bins) - 1)
+            for fee in ordered:
+                i = bisect.bisect_right(bins, fee) - 1
+                if 0 <= i < len(histogram):
+                    histogram[i] += 1
+                elif fee == bins[-1]:
+                    histogram[-1] += 1
+            summary["histogram"] = histogram
+        return summary
+
+    def to_arrow(self):
+        """Export as a pyarrow Table
+
+        uint64 columns wrap the array buffers without copying. amount and fee
+        become decimal256(39, 0) columns, whose 32-byte little-endian values are
+        the two limbs followed by zero padding.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("pyarrow is required for Arrow/Parquet export (pip install pyarrow)")
+
+        n = len(self)
+        columns = {}
+        for name in ("id", "amount", "fee", "createdAt", "duration", "attemptsCount"):
+            if name in WIDE_COLUMNS:
+                words = array("Q", bytes(32 * n))
+                words[0::4] = getattr(self, f"{name}_lo")
+                words[1::4] = getattr(self, f"{name}_hi")
+                columns[name] = pa.Array.from_buffers(pa.decimal256(39, 0), n, [None, pa.py_buffer(words)])
+            else:
+                columns[name] = pa.Array.from_buffers(pa.uint64(), n, [None, pa.py_buffer(getattr(self, name))])
+        columns["status"] = pa.Array.from_buffers(pa.uint8(), n, [None, pa.py_buffer(self.status)])
+        if self.creators is not None:
+            columns["creator"] = pa.array(self.creators, type=pa.string())
+        return pa.table(columns)
+
+    def to_parquet(self, path: str):
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
@@ -0,0 +1,356 @@
+"""
+Record/replay of JSON-RPC and verifier traffic
+
+RecordingProvider and RecordingVerifierClient wrap the live Web3 provider and
+EVMVerifierServiceClient and append every request/response pair, with its
+start offset and duration, to a Cassette (gzip JSON lines). ReplayProvider and
+ReplayVerifierClient serve a cassette back at recorded speed, accelerated, or
+with zero latency, so client-side changes can be benchmarked without live block
+times or a remote verifier.
+
+JSON-RPC responses are matched on the method and its canonical params, so
+concurrent flows that interleave differently than during recording still get
+their own getPot/allowance/decimals results. Identical requests (e.g.
+eth_getBlockByNumber("latest")) are served in recorded order. Raw transactions
+embed nonces and gas prices that depend on dispatch order, so
+eth_sendRawTransaction is matched on its sender, recipient, value and calldata
+instead, and the receipt lookups that follow stay keyed by the recorded hash.
+Verifier exchanges are matched on the route plus the pot, attempt and challenge
+ids of the wallet-auth payload. A request with no recorded response left raises
+ReplayMissError; replay never answers with a response recorded for another
+request.
+
+A ReplayProvider also carries a ReplayClock. Code that paces itself by polling,
+such as ChainHeadTracker, should take its clock and sleep from there, so that
+an instant replay skips the waits and an accelerated one shortens them.
+
+Cassettes are shareable artifacts: verifier request bodies are recorded with the
+wallet-auth payload and signature redacted, since the payload carries the 1P
+password, legend and solutions. Only the ids in ROUTE_FIELDS end up in the key.
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from collections import defaultdict, deque
+from typing import Optional, Dict, Any, List
+
+from web3.providers.base import JSONBaseProvider
+
+from demo import EVMVerifierServiceClient
+
+CASSETTE_FORMAT = 1
+REPLAY_MODES = ("realtime", "accelerated", "instant")
+# wallet_request() fields that carry secrets (1P configuration, solutions) or signatures over them
+REDACTED_FIELDS = ("encrypted_payload", "signature")
+# Non-secret ids of a wallet-auth payload that tell concurrent verifier requests apart
+ROUTE_FIELDS = ("pot_id", "attempt_id", "challenge_id")
+
+
+def _jsonable(value: Any) -> Any:
+    """json.dumps fallback for HexBytes/bytes and other web3 values"""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if hasattr(value, "items"):
+        return dict(value)
+    return str(value)
+
+
+def request_key(method: str, params: Any) -> str:
+    """Replay key of a JSON-RPC request: the method plus its params as canonical JSON
+
+    Nonces are left out of call objects: eth_call/eth_estimateGas results do not
+    depend on them, but the nonce a pre-flight sees depends on dispatch order.
+    Raw transactions are keyed by sender, recipient, value and calldata.
+    """
+    if method == "eth_sendRawTransaction":
+        # Nonce, gas price and signature depend on the order concurrent flows reach the
+        # scheduler, not on what the flow sends
+        tx = decode_raw_transaction(params[0])
+        params = [tx["from"], tx["to"], tx["value"], tx["data"]]
+    elif isinstance(params, (list, tuple)):
+        params = [{k: v for k, v in dict(p).items() if k != "nonce"} if hasattr(p, "items") else p for p in params]
+    return method + " " + json.dumps(params, default=_jsonable, sort_keys=True, separators=(",", ":"))
+
+
+def decode_raw_transaction(raw: Any) -> Dict[str, Any]:
+    """Sender and fields of a signed legacy, EIP-2930 or EIP-1559 transaction"""
+    import rlp
+    from eth_account import Account
+
+    data = bytes.fromhex(raw[2:] if raw.startswith("0x") else raw) if isinstance(raw, str) else bytes(raw)
+    if data[0] >= 0xc0:
+        # Legacy: [nonce, gasPrice, gas, to, value, data, v, r, s]
+        nonce, gas_price, gas, to, value, calldata = rlp.decode(data)[:6]
+    else:
+        # EIP-2930: [chainId, nonce, gasPrice, gas, to, ...]; EIP-1559 has maxPriorityFeePerGas first
+        fields = rlp.decode(data[1:])
+        nonce, gas_price, gas, to, value, calldata = fields[1:2] + fields[2 + (data[0] == 2):7 + (data[0] == 2)]
+    return {
+        "from": Account.recover_transaction(data),
+        "nonce": int.from_bytes(nonce, "big"),
+        "gasPrice": int.from_bytes(gas_price, "big"),
+        "gas": int.from_bytes(gas, "big"),
+        "to": "0x" + to.hex() if to else None,
+        "value": int.from_bytes(value, "big"),
+        "data": "0x" + calldata.hex(),
+    }
+
+
+def http_key(method: str, path: str, body: Optional[Dict[str, Any]] = None) -> str:
+    """Replay key of a verifier request: the route plus the ROUTE_FIELDS of its wallet-auth payload"""
+    key = f"{method} {path}"
+    try:
+        payload = json.loads(bytes.fromhex(body["encrypted_payload"]))
+    except (TypeError, KeyError, ValueError):
+        return key
+    route = {field: payload[field] for field in ROUTE_FIELDS if isinstance(payload, dict) and field in payload}
+    return key + " " + json.dumps(route, sort_keys=True, separators=(",", ":")) if route else key
+
+
+def _batch_key(requests) -> str:
+    return "batch:" + ",".join(request_key(method, params) for method, params in requests)
+
+
+def _redact(body: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not body:
+        return body
+    return {key: "<redacted>" if key in REDACTED_FIELDS else value for key, value in body.items()}
+
+
+def _is_pending_receipt(entry: Dict[str, Any]) -> bool:
+    response = entry.get("response")
+    return isinstance(response, dict) and "result" in response and response["result"] is None
+
+
+class ReplayMissError(RuntimeError):
+    """The cassette has no (more) responses for a request"""
+
+
+class ReplayedError(RuntimeError):
+    """An exception that was raised while recording, re-raised during replay"""
+
+
+class Cassette:
+    """Ordered request/response log with timing, stored as gzip JSON lines"""
+
+    def __init__(self, header: Optional[Dict[str, Any]] = None):
+        self.header: Dict[str, Any] = dict(header or {})
+        self.entries: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+
+    def record(self, kind: str, key: str, request: Any, started: float, duration: float,
+               response: Any = None, error: Optional[BaseException] = None):
+        entry = {
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "t": round(started - self._t0, 6),
+            "dt": round(duration, 6),
+        }
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        else:
+            entry["response"] = response
+        self.entries.append(entry)
+
+    def save(self, path: str):
+        header = {"format": CASSETTE_FORMAT, "entries": len(self.entries), **self.header}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header, default=_jsonable, separators=(",", ":")) + "\n")
+            for entry in self.entries:
+                f.write(json.dumps(entry, default=_jsonable, separators=(",", ":")) + "\n")
+        print(f"💾 Saved {len(self.entries)} recorded requests to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != CASSETTE_FORMAT:
+                raise RuntimeError(f"Unsupported cassette format: {header.get('format')}")
+            cassette = cls(header)
+            cassette.entries = [json.loads(line) for line in f if line.strip()]
+        return cassette
+
+
+class _Player:
+    """Serves recorded responses FIFO per request key, sleeping according to the replay mode
+
+    RPC entries are keyed by request_key(method, params), HTTP entries by route.
+    """
+
+    def __init__(self, cassette: Cassette, kind: str, mode: str = "instant", speed: float = 10.0,
+                 skip_polling: Optional[bool] = None):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}, expected one of {REPLAY_MODES}")
+        self.mode = mode
+        self.speed = speed
+        # Pending-receipt polls only measure block time; drop them unless replaying in real time
+        self.skip_polling = mode != "realtime" if skip_polling is None else skip_polling
+        self.queues: Dict[str, deque] = defaultdict(deque)
+        for entry in cassette.entries:
+            if entry["kind"] != kind:
+                continue
+            method = entry["key"]
+            if kind != "rpc":
+                self.queues[method].append(entry)
+            elif method.startswith("batch:"):
+                self.queues[_batch_key(entry["request"])].append(entry)
+            else:
+                self.queues[request_key(method, entry["request"])].append(entry)
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        if self.mode == "realtime":
+            return entry["dt"]
+        if self.mode == "accelerated":
+            return entry["dt"] / self.speed
+        return 0.0
+
+    def next(self, key: str, method: Optional[str] = None) -> Dict[str, Any]:
+        queue = self.queues.get(key)
+        if not queue:
+            raise ReplayMissError(f"Cassette has no more recorded responses for {key[:200]}")
+        entry = queue.popleft()
+        if self.skip_polling and method == "eth_getTransactionReceipt":
+            while queue and _is_pending_receipt(entry):
+                entry = queue.popleft()
+        return entry
+
+    def remaining(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class ReplayClock:
+    """Monotonic clock and sleep that follow the replay mode
+
+    realtime sleeps for real. accelerated sleeps 1/speed of the time and runs the
+    clock `speed` times faster. instant only yields to the event loop and moves
+    the clock forward by the time slept.
+    """
+
+    def __init__(self, mode: str = "instant", speed: float = 10.0):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}, expected one of {REPLAY_MODES}")
+        self.mode = mode
+        self.speed = speed
+        self._started = time.monotonic()
+        self._skipped = 0.0
+
+    def monotonic(self) -> float:
+        elapsed = time.monotonic() - self._started
+        if self.mode == "accelerated":
+            elapsed *= self.speed
+        return self._started + elapsed + self._skipped
+
+    async def sleep(self, seconds: float):
+        if self.mode == "realtime":
+            await asyncio.sleep(seconds)
+        elif self.mode == "accelerated":
+            await asyncio.sleep(seconds / self.speed)
+        else:
+            self._skipped += max(seconds, 0.0)
+            await asyncio.sleep(0)
+
+
+class RecordingProvider(JSONBaseProvider):
+    """Pass-through Web3 provider that records every JSON-RPC call into a cassette"""
+
+    def __init__(self, provider, cassette: Cassette):
+        super().__init__()
+        self.provider = provider
+        self.cassette = cassette
+
+    def make_request(self, method, params):
+        started = time.perf_counter()
+        try:
+            response = self.provider.make_request(method, params)
+        except Exception as e:
+            self.cassette.record("rpc", method, params, started, time.perf_counter() - started, error=e)
+            raise
+        self.cassette.record("rpc", method, params, started, time.perf_counter() - started, response)
+        return response
+
+    def make_batch_request(self, requests):
+        key = "batch:" + ",".join(method for method, _ in requests)
+        started = time.perf_counter()
+        try:
+            response = self.provider.make_batch_request(requests)
+        except Exception as e:
+            self.cassette.record("rpc", key, requests, started, time.perf_counter() - started, error=e)
+            raise
+        self.cassette.record("rpc", key, requests, started, time.perf_counter() - started, response)
+        return response
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return self.provider.is_connected(show_traceback)
+
+
+class ReplayProvider(JSONBaseProvider):
+    """Web3 provider that answers from a cassette instead of the network"""
+
+    def __init__(self, cassette: Cassette, mode: str = "instant", speed: float = 10.0,
+                 skip_polling: Optional[bool] = None):
+        super().__init__()
+        self.player = _Player(cassette, "rpc", mode, speed, skip_polling)
+        self.clock = ReplayClock(mode, speed)
+
+    def _serve(self, key: str, method: Optional[str] = None):
+        entry = self.player.next(key, method)
+        delay = self.player.delay(entry)
+        if delay:
+            time.sleep(delay)
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return entry["response"]
+
+    def make_request(self, method, params):
+        return self._serve(request_key(method, params), method)
+
+    def make_batch_request(self, requests):
+        return self._serve(_batch_key(requests))
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class RecordingVerifierClient(EVMVerifierServiceClient):
+    """Verifier client that records each HTTP exchange into a cassette"""
+
+    def __init__(self, base_url: str, cassette: Cassette):
+        super().__init__(base_url)
+        self.cassette = cassette
+
+    async def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        key = http_key(method, path, body)
+        started = time.perf_counter()
+        try:
+            response = await super()._request(method, path, body)
+        except Exception as e:
+            self.cassette.record("http", key, _redact(body), started, time.perf_counter() - started, error=e)
+            raise
+        self.cassette.record("http", key, _redact(body), started, time.perf_counter() - started, response)
+        return response
+
+
+class ReplayVerifierClient(EVMVerifierServiceClient):
+    """Verifier client that answers from a cassette; no HTTP session is opened"""
+
+    def __init__(self, cassette: Cassette, mode: str = "instant", speed: float = 10.0):
+        super().__init__(cassette.header.get("verifier_url", "replay://verifier"))
+        self.player = _Player(cassette, "http", mode, speed, skip_polling=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        entry = self.player.next(http_key(method, path, body))
+        delay = self.player.delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return entry["response"]
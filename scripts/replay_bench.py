@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Deterministic client-side benchmark for the Money Pot flows
+
+    python replay_bench.py record flow.cassette
+        Run initialize → create pot → hunt pot against the live chain and
+        verifier, recording all traffic.
+
+    python replay_bench.py run flow.cassette [--mode instant] [--repeat 5] [--json report.json]
+        Replay the cassette and report per-flow wall time, CPU time,
+        allocations and event-loop stalls. With --mode instant the numbers are
+        pure client overhead, so they can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional, Dict, Any, List
+
+import demo
+from loop_monitor import LoopStallDetector, StackSampler
+from replay import (
+    Cassette,
+    RecordingProvider,
+    RecordingVerifierClient,
+    ReplayProvider,
+    ReplayVerifierClient,
+    REPLAY_MODES,
+)
+
+FLOWS = ("initialize", "create_pot", "hunt_pot")
+
+
+async def measure(name: str, coro_factory, trace_allocations: bool, quiet: bool) -> Dict[str, Any]:
+    """Run one flow and collect wall/CPU time, allocations and loop lag"""
+    probe = LoopStallDetector(threshold=0.05, verbose=False)
+    if trace_allocations:
+        tracemalloc.start()
+    probe.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            result = await coro_factory()
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    await probe.stop()
+    stats = probe.summary()
+    stats["blocking_sites"] = probe.top_offenders(3)
+    stats.update({"flow": name, "wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3)})
+    if trace_allocations:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats.update({"alloc_current_kb": round(current / 1024, 1), "alloc_peak_kb": round(peak / 1024, 1)})
+    if error:
+        stats["error"] = error
+    stats["result"] = result
+    return stats
+
+
+async def run_flows(app: "demo.EVMMoneyPotApp", trace_allocations: bool = False, quiet: bool = True) -> List[Dict[str, Any]]:
+    results = [await measure("initialize", app.initialize, trace_allocations, quiet)]
+    create = await measure("create_pot", app.create_pot_flow, trace_allocations, quiet)
+    results.append(create)
+    if create.get("error") is None:
+        pot_id = create["result"]
+        results.append(await measure("hunt_pot", lambda: app.hunt_pot_flow(pot_id), trace_allocations, quiet))
+    return results
+
+
+async def record(path: str):
+    """Run the flows live and save every RPC/verifier exchange to a cassette"""
+    demo.configure()
+    if not (demo.EVM_RPC_URL and demo.CONTRACT_ADDRESS):
+        chain_config = await demo.fetch_chain_config(demo.MONEY_AUTH_URL, demo.CHAIN_ID)
+        os.environ["EVM_RPC_URL"] = chain_config["rpcUrl"]
+        os.environ["CONTRACT_ADDRESS"] = chain_config["contractAddress"]
+        os.environ["EXPLORER_URL"] = chain_config["explorerUrl"]
+        demo.configure()
+
+    from web3 import Web3
+
+    cassette = Cassette({
+        "chain_id": demo.CHAIN_ID,
+        "rpc_url": demo.EVM_RPC_URL,
+        "contract_address": demo.CONTRACT_ADDRESS,
+        "explorer_url": demo.EXPLORER_URL,
+        "verifier_url": demo.MONEY_AUTH_URL,
+        "preflight": demo.PREFLIGHT,
+        "recorded_at": int(time.time()),
+    })
+    app = demo.EVMMoneyPotApp(
+        provider=RecordingProvider(Web3.HTTPProvider(demo.EVM_RPC_URL), cassette),
+        verifier=RecordingVerifierClient(demo.MONEY_AUTH_URL, cassette),
+    )
+    results = await run_flows(app, quiet=False)
+    cassette.save(path)
+    for r in results:
+        print(f"   {r['flow']}: {r['wall_ms']:.0f} ms{' ❌ ' + r['error'] if 'error' in r else ''}")
+
+
+async def replay(path: str, mode: str, speed: float, repeat: int, trace_allocations: bool,
+                 profile_path: Optional[str] = None) -> Dict[str, Any]:
+    """Replay a cassette `repeat` times and summarize each flow by its median"""
+    cassette = Cassette.load(path)
+    header = cassette.header
+    # Point configure() at the recorded chain so initialize() never calls /chains
+    os.environ["CHAIN_ID"] = str(header["chain_id"])
+    os.environ["EVM_RPC_URL"] = header["rpc_url"]
+    os.environ["CONTRACT_ADDRESS"] = header["contract_address"]
+    os.environ["EXPLORER_URL"] = header.get("explorer_url", "")
+    os.environ["PREFLIGHT"] = header.get("preflight", "full")
+    # Leftover verifier jobs from real runs would trigger reconcile calls the cassette never saw
+    os.environ["VERIFIER_JOBS_PATH"] = os.path.join(tempfile.mkdtemp(prefix="moneypot-replay-"), "jobs.json")
+
+    sampler = StackSampler() if profile_path else None
+    if sampler:
+        sampler.start()
+    runs = []
+    for _ in range(repeat):
+        app = demo.EVMMoneyPotApp(
+            provider=ReplayProvider(cassette, mode, speed),
+            verifier=ReplayVerifierClient(cassette, mode, speed),
+        )
+        runs.append(await run_flows(app, trace_allocations))
+    if sampler:
+        sampler.stop()
+        sampler.write_folded(profile_path)
+
+    summary = {}
+    for flow in FLOWS:
+        samples = [r for run in runs for r in run if r["flow"] == flow]
+        if not samples:
+            continue
+        errors = [r["error"] for r in samples if "error" in r]
+        metrics = [k for k, v in samples[0].items() if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        summary[flow] = {k: statistics.median(r[k] for r in samples if k in r) for k in metrics}
+        if errors:
+            summary[flow]["errors"] = errors
+    return {"cassette": path, "mode": mode, "speed": speed, "repeat": repeat, "flows": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay benchmark for Money Pot client flows")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Run the flows live and record all traffic")
+    rec.add_argument("cassette")
+    run = sub.add_parser("run", help="Replay a cassette and measure client-side overhead")
+    run.add_argument("cassette")
+    run.add_argument("--mode", choices=REPLAY_MODES, default="instant")
+    run.add_argument("--speed", type=float, default=10.0, help="Speed-up factor for --mode accelerated")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--allocations", action="store_true", help="Trace allocations (adds overhead)")
+    run.add_argument("--json", dest="json_path", help="Write the report to this file")
+    run.add_argument("--profile", help="Write a sampled flamegraph (folded stacks) of all replays here")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.cassette))
+        return
+
+    demo.configure()
+    report = asyncio.run(replay(args.cassette, args.mode, args.speed, args.repeat, args.allocations, args.profile))
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if any("errors" in flow for flow in report["flows"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Money Pot custom-error decoding and pre-flight transaction simulation
+
+Decodes revert data returned by the MoneyPot contract into typed exceptions so
+callers (the demo flows, swarms, sweepers) can react to InsufficientFee,
+ExpiredPot, PotNotActive, InvalidFee, ... without waiting for a failed receipt.
+"""
+
+from typing import Optional, Dict, Any, Tuple
+
+
+# Selectors of the two revert payloads Solidity emits without an ABI entry
+ERROR_STRING_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+PANIC_SELECTOR = bytes.fromhex("4e487b71")  # Panic(uint256)
+
+
+class ContractRevertError(RuntimeError):
+    """A MoneyPot call reverted; carries the decoded custom error"""
+
+    def __init__(self, name: str, args: Optional[Dict[str, Any]] = None,
+                 selector: str = "", data: str = ""):
+        self.name = name
+        self.error_args = args or {}
+        self.selector = selector
+        self.data = data
+        details = ", ".join(f"{k}={v}" for k, v in self.error_args.items())
+        super().__init__(f"Contract reverted with {name}({details})")
+
+
+class InsufficientFeeError(ContractRevertError):
+    """Entry fee payment is below what the pot requires"""
+
+
+class InvalidFeeError(ContractRevertError):
+    """Pot fee is below the contract's MIN_FEE"""
+
+
+class ExpiredPotError(ContractRevertError):
+    """Pot duration has already elapsed"""
+
+
+class PotNotActiveError(ContractRevertError):
+    """Pot was already solved or expired"""
+
+
+class NotExpiredError(ContractRevertError):
+    """expirePot was called before the pot ran out"""
+
+
+class AttemptExpiredError(ContractRevertError):
+    """Attempt window has closed"""
+
+
+class AttemptCompletedError(ContractRevertError):
+    """Attempt was already settled by the verifier"""
+
+
+class UnauthorizedError(ContractRevertError):
+    """Caller is not allowed to perform this action"""
+
+
+# Custom error name -> exception type; anything else maps to ContractRevertError
+REVERT_ERROR_TYPES = {
+    "InsufficientFee": InsufficientFeeError,
+    "InvalidFee": InvalidFeeError,
+    "ExpiredPot": ExpiredPotError,
+    "PotNotActive": PotNotActiveError,
+    "NotExpired": NotExpiredError,
+    "AttemptExpired": AttemptExpiredError,
+    "AttemptCompleted": AttemptCompletedError,
+    "Unauthorized": UnauthorizedError,
+}
+
+
+def _abi_type(param: Dict[str, Any]) -> str:
+    """Canonical ABI type string for a parameter, expanding tuples"""
+    param_type = param["type"]
+    if param_type.startswith("tuple"):
+        inner = ",".join(_abi_type(c) for c in param.get("components", []))
+        return f"({inner}){param_type[len('tuple'):]}"
+    return param_type
+
+
+def _to_bytes(data: Any) -> bytes:
+    """Normalize revert data (hex str, HexBytes, bytes) to raw bytes"""
+    if data is None:
+        return b""
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if isinstance(data, str):
+        text = data[2:] if data.startswith("0x") else data
+        try:
+            return bytes.fromhex(text)
+        except ValueError:
+            return b""
+    return b""
+
+
+def compile_error_selectors(abi: list) -> Dict[bytes, Tuple[str, list, list]]:
+    """Map each custom error's 4-byte selector to (name, input types, input names)"""
+    from eth_utils import keccak
+
+    errors = {}
+    for entry in abi:
+        if entry.get("type") != "error":
+            continue
+        inputs = entry.get("inputs", [])
+        types = [_abi_type(i) for i in inputs]
+        signature = f"{entry['name']}({','.join(types)})"
+        errors[keccak(text=signature)[:4]] = (entry["name"], types, [i.get("name", "") for i in inputs])
+    return errors
+
+
+class RevertDecoder:
+    """Maps 4-byte error selectors from an ABI to typed exceptions"""
+
+    def __init__(self, abi: list, error_selectors: Optional[Dict[bytes, Tuple[str, list, list]]] = None):
+        # Precompiled selectors (see abi_cache) skip hashing every error signature
+        self.errors = error_selectors if error_selectors is not None else compile_error_selectors(abi)
+
+    def decode(self, data: Any) -> Optional[ContractRevertError]:
+        """Decode revert data into a typed exception, or None if it is not a revert payload"""
+        from eth_abi import decode as abi_decode
+
+        raw = _to_bytes(data)
+        if len(raw) < 4:
+            return None
+
+        selector, body = raw[:4], raw[4:]
+        hex_data = "0x" + raw.hex()
+
+        if selector == ERROR_STRING_SELECTOR:
+            (reason,) = abi_decode(["string"], body)
+            return ContractRevertError("Error", {"reason": reason}, "0x" + selector.hex(), hex_data)
+        if selector == PANIC_SELECTOR:
+            (code,) = abi_decode(["uint256"], body)
+            return ContractRevertError("Panic", {"code": hex(code)}, "0x" + selector.hex(), hex_data)
+
+        known = self.errors.get(selector)
+        if known is None:
+            return ContractRevertError("UnknownError", {}, "0x" + selector.hex(), hex_data)
+
+        name, types, names = known
+        values = abi_decode(types, body) if types else ()
+        args = {arg_name or f"arg{i}": value for i, (arg_name, value) in enumerate(zip(names, values))}
+        error_type = REVERT_ERROR_TYPES.get(name, ContractRevertError)
+        return error_type(name, args, "0x" + selector.hex(), hex_data)
+
+    def from_exception(self, exc: Exception) -> Optional[ContractRevertError]:
+        """Extract and decode revert data carried by a web3 exception"""
+        data = getattr(exc, "data", None)
+        if isinstance(data, dict):
+            data = data.get("data")
+        if data is None and exc.args:
+            # Some providers only put the revert data in the message tuple
+            for arg in exc.args:
+                if isinstance(arg, str) and arg.startswith("0x"):
+                    data = arg
+                    break
+                if isinstance(arg, dict) and "data" in arg:
+                    data = arg["data"]
+                    break
+        return self.decode(data)
+
+
+def _call_params(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a built transaction to the fields eth_call understands"""
+    return {key: transaction[key] for key in ("from", "to", "data", "value", "gas") if key in transaction}
+
+
+def simulate_transaction(w3, transaction: Dict[str, Any], decoder: RevertDecoder,
+                         block_identifier: Any = "pending") -> Any:
+    """Run a built transaction through eth_call and raise a typed error if it would revert"""
+    from web3.exceptions import ContractLogicError
+
+    try:
+        return w3.eth.call(_call_params(transaction), block_identifier)
+    except ContractLogicError as e:
+        decoded = decoder.from_exception(e)
+        if decoded is None:
+            raise
+        raise decoded from e
+
+
+def explain_failed_transaction(w3, transaction: Dict[str, Any], decoder: RevertDecoder,
+                               block_number: int) -> Optional[ContractRevertError]:
+    """Replay a mined-but-reverted transaction against its parent block and decode why it failed"""
+    try:
+        simulate_transaction(w3, transaction, decoder, max(block_number - 1, 0))
+    except ContractRevertError as e:
+        return e
+    except Exception:
+        return None
+    return None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Mixed-workload benchmark for the transaction scheduler
+
+    python scheduler_bench.py [--bulk 200] [--attempts 40] [--block-time 0.5] [--json report.json]
+
+Runs the same workload, bulk pot seeding submitted up front while hunter
+attempts with pot-expiry deadlines trickle in, against a simulated chain with a
+fixed block time and block capacity. It runs once with FIFO dispatch and once
+with priority/deadline dispatch, then reports throughput and deadline-miss rate
+per class for both.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, Any
+
+from tx_scheduler import TxScheduler, PRIORITY_ATTEMPT, PRIORITY_BULK, SCHEDULING_POLICIES
+
+
+class SimulatedChain:
+    """Just enough of web3's `eth` namespace for TxScheduler, mining in a background thread"""
+
+    def __init__(self, block_time: float, block_capacity: int, rpc_latency: float):
+        self.block_time = block_time
+        self.block_capacity = block_capacity
+        self.rpc_latency = rpc_latency
+        self.block_number = 0
+        self.gas_price = 1
+        self.account = SimpleNamespace(sign_transaction=lambda tx, key: SimpleNamespace(raw_transaction=tx))
+        self._mempool: deque = deque()
+        self._mined: Dict[int, threading.Event] = {}
+        self._receipts: Dict[int, Any] = {}
+        self._hashes = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._miner = threading.Thread(target=self._mine, name="simulated-miner", daemon=True)
+
+    @property
+    def eth(self):
+        return self
+
+    def start(self):
+        self._miner.start()
+
+    def stop(self):
+        self._stop.set()
+        self._miner.join()
+
+    def _mine(self):
+        while not self._stop.wait(self.block_time):
+            with self._lock:
+                self.block_number += 1
+                for _ in range(min(self.block_capacity, len(self._mempool))):
+                    tx_hash = self._mempool.popleft()
+                    self._receipts[tx_hash] = SimpleNamespace(status=1, blockNumber=self.block_number)
+                    self._mined[tx_hash].set()
+
+    def get_transaction_count(self, address: str, block_identifier: str = "latest") -> int:
+        return 0
+
+    def send_raw_transaction(self, raw) -> int:
+        time.sleep(self.rpc_latency)
+        with self._lock:
+            tx_hash = next(self._hashes)
+            self._mined[tx_hash] = threading.Event()
+            self._mempool.append(tx_hash)
+        return tx_hash
+
+    def wait_for_transaction_receipt(self, tx_hash: int, timeout: float = 120):
+        if not self._mined[tx_hash].wait(timeout):
+            raise TimeoutError(f"Transaction {tx_hash} not mined within {timeout}s")
+        return self._receipts[tx_hash]
+
+
+def _account(index: int):
+    return SimpleNamespace(address=f"0x{index:040x}", key=b"")
+
+
+async def run_workload(policy: str, args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    chain = SimulatedChain(args.block_time, args.block_capacity, args.rpc_latency)
+    chain.start()
+    scheduler = TxScheduler(chain, max_in_flight=args.in_flight, per_account=args.per_account,
+                            urgent_window=args.urgent_window, receipt_timeout=600, policy=policy)
+    seeders = [_account(i) for i in range(args.seeders)]
+    hunters = [_account(1000 + i) for i in range(args.hunters)]
+
+    def build(nonce: int, gas_price: int):
+        return {"nonce": nonce, "gasPrice": gas_price}
+
+    async def settle(coro):
+        try:
+            await coro
+        except Exception:
+            pass  # counted by the scheduler's report
+
+    tasks = [asyncio.ensure_future(settle(scheduler.submit(seeders[i % len(seeders)], build, "createPot",
+                                                           PRIORITY_BULK)))
+             for i in range(args.bulk)]
+    for i in range(args.attempts):
+        await asyncio.sleep(rng.expovariate(1 / args.attempt_interval))
+        deadline = time.time() + rng.uniform(args.min_deadline, args.max_deadline)
+        tasks.append(asyncio.ensure_future(settle(scheduler.submit(hunters[i % len(hunters)], build, "attemptPot",
+                                                                   PRIORITY_ATTEMPT, deadline))))
+    await asyncio.gather(*tasks)
+    await scheduler.close()
+    chain.stop()
+    return scheduler.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload benchmark for the transaction scheduler")
+    parser.add_argument("--bulk", type=int, default=200, help="Bulk createPot transactions submitted up front")
+    parser.add_argument("--attempts", type=int, default=40, help="Deadline-bound attempts arriving over time")
+    parser.add_argument("--attempt-interval", type=float, default=0.2, help="Mean seconds between attempts")
+    parser.add_argument("--min-deadline", type=float, default=2.0)
+    parser.add_argument("--max-deadline", type=float, default=6.0)
+    parser.add_argument("--seeders", type=int, default=4)
+    parser.add_argument("--hunters", type=int, default=8)
+    parser.add_argument("--block-time", type=float, default=0.5)
+    parser.add_argument("--block-capacity", type=int, default=10)
+    parser.add_argument("--rpc-latency", type=float, default=0.01)
+    parser.add_argument("--in-flight", type=int, default=12)
+    parser.add_argument("--per-account", type=int, default=4)
+    parser.add_argument("--urgent-window", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="Write both reports to this file")
+    args = parser.parse_args()
+
+    reports = {}
+    for policy in SCHEDULING_POLICIES:
+        report = reports[policy] = asyncio.run(run_workload(policy, args))
+        print(f"\n🚦 {policy} ({report['elapsed_s']:.1f}s)")
+        for name, stats in {**report["classes"], "total": report["total"]}.items():
+            print(f"{name:>8}: {stats['completed']}/{stats['submitted']} mined, "
+                  f"{stats['throughput_tps']:.2f} tx/s, p95 latency {stats['latency_p95_s']:.2f}s, "
+                  f"deadline misses {stats['deadline_missed']} ({stats['deadline_miss_rate']:.1%})")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Tests for syncing LeaderboardAggregator from contract event logs"""
+
+import asyncio
+
+import pytest
+
+import pot_iter
+from abi_cache import load_compiled_abi
+from leaderboard import LeaderboardAggregator
+
+CREATOR = "0x" + "c1" * 20
+LATE_CREATOR = "0x" + "c2" * 20
+HUNTER = "0x" + "a1" * 20
+# pot id -> (creator, amount, fee), as getPot would return them
+POTS = {
+    1: (CREATOR, 1000, 10),
+    2: (CREATOR, 5000, 20),
+    3: (LATE_CREATOR, 800, 30),
+}
+
+
+class FakeEvent:
+    def __init__(self, abi):
+        self.abi = abi
+
+    def process_log(self, log):
+        return log["decoded"]
+
+
+class FakeEth:
+    def __init__(self, logs, block_number):
+        self.logs = logs
+        self.block_number = block_number
+
+    def get_logs(self, params):
+        return [log for log in self.logs if params["fromBlock"] <= log["decoded"]["blockNumber"] <= params["toBlock"]]
+
+
+class FakeContract:
+    address = "0x" + "11" * 20
+
+    def __init__(self, logs, block_number):
+        from eth_utils import event_abi_to_log_topic
+
+        self.w3 = type("W3", (), {"eth": FakeEth(logs, block_number)})()
+        self.events = {}
+        self.topics = {}
+        for entry in load_compiled_abi().abi:
+            if entry.get("type") == "event":
+                self.events[entry["name"]] = lambda entry=entry: FakeEvent(entry)
+                self.topics[entry["name"]] = event_abi_to_log_topic(entry)
+
+
+def make_log(contract, name, block, args, log_index=0):
+    return {"topics": [contract.topics[name]],
+            "decoded": {"event": name, "args": args, "blockNumber": block, "logIndex": log_index}}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """Pot ids read through the (faked) batched getPot"""
+    calls = []
+
+    def fetch_pots(contract, pot_ids):
+        calls.append(list(pot_ids))
+        return [(pot_id, POTS[pot_id][0], POTS[pot_id][1], POTS[pot_id][2], 0, 3600, True, 0, HUNTER)
+                for pot_id in pot_ids]
+
+    monkeypatch.setattr(pot_iter, "fetch_pots", fetch_pots)
+    return calls
+
+
+def test_sync_from_mid_history_prices_older_pots(fetched):
+    contract = FakeContract([], 30)
+    contract.w3.eth.logs = [
+        # Before from_block: never fetched
+        make_log(contract, "PotCreated", 10, {"id": 1, "creator": CREATOR, "timestamp": 0}),
+        make_log(contract, "PotCreated", 11, {"id": 2, "creator": CREATOR, "timestamp": 0}),
+        # Synced: activity on pots created before from_block, then a pot created in range
+        make_log(contract, "PotAttempted", 20, {"attemptId": 7, "potId": 1, "hunter": HUNTER, "timestamp": 0}),
+        make_log(contract, "PotAttempted", 21, {"attemptId": 8, "potId": 2, "hunter": HUNTER, "timestamp": 0}),
+        make_log(contract, "PotSolved", 21, {"potId": 2, "hunter": HUNTER, "timestamp": 0}, 1),
+        make_log(contract, "PotCreated", 22, {"id": 3, "creator": LATE_CREATOR, "timestamp": 0}),
+        make_log(contract, "PotAttempted", 23, {"attemptId": 9, "potId": 3, "hunter": HUNTER, "timestamp": 0}),
+    ]
+    board = LeaderboardAggregator(hunter_share_percent=60, creator_fee_share_percent=50)
+
+    assert asyncio.run(board.sync(contract, from_block=15)) == 5
+
+    assert sorted(pot_id for ids in fetched for pot_id in ids) == [1, 2, 3]
+    hunter = board.hunters[HUNTER]
+    assert hunter.attempts == 3
+    assert hunter.fees_spent == 10 + 20 + 30
+    assert hunter.wins == 1
+    assert hunter.rewards_earned == 5000 * 60 // 100
+    creator = board.creators[CREATOR]
+    assert creator.pots_created == 0  # created before the sync started
+    assert creator.revenue == (10 + 20) * 50 // 100
+    assert creator.pots_solved == 1
+    assert creator.amount_paid_out == 5000 * 60 // 100
+    assert board.creators[LATE_CREATOR].pots_created == 1
+    assert board.creators[LATE_CREATOR].amount_deposited == 800
+    assert board.creators[LATE_CREATOR].revenue == 30 * 50 // 100
+
+
+def test_known_pots_are_not_fetched_again(fetched):
+    contract = FakeContract([], 40)
+    contract.w3.eth.logs = [
+        make_log(contract, "PotAttempted", 20, {"attemptId": 1, "potId": 1, "hunter": HUNTER, "timestamp": 0}),
+        make_log(contract, "PotAttempted", 30, {"attemptId": 2, "potId": 1, "hunter": HUNTER, "timestamp": 0}),
+    ]
+    board = LeaderboardAggregator(hunter_share_percent=60, creator_fee_share_percent=50)
+
+    asyncio.run(board.sync(contract, to_block=25, from_block=15))
+    asyncio.run(board.sync(contract))
+
+    assert fetched == [[1]]
+    assert board.hunters[HUNTER].fees_spent == 20
@@ -0,0 +1,65 @@
+"""Tests for the in-process MoneyPot chain and verifier"""
+
+import asyncio
+
+import pytest
+
+import demo
+from mock_chain import (MockChain, MockVerifierClient, MONEYPOT_ADDRESS, CREATOR_ENTRY_FEE_SHARE_PERCENT,
+                        HUNTER_SHARE_PERCENT)
+from revert_errors import ContractRevertError
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    for name, value in {"EVM_RPC_URL": "mock://chain", "CONTRACT_ADDRESS": MONEYPOT_ADDRESS, "CHAIN_ID": "31337",
+                        "EVM_CREATOR_PRIVATE_KEY": "11" * 32, "EVM_HUNTER_PRIVATE_KEY": "22" * 32,
+                        "VERIFIER_JOBS_PATH": str(tmp_path / "jobs.json"), "POT_AMOUNT": "1", "ENTRY_FEE": "0.1"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("EVM_FUNDER_PRIVATE_KEY", raising=False)
+    chain = MockChain()
+    return demo.EVMMoneyPotApp(provider=chain, verifier=MockVerifierClient(chain))
+
+
+def run(app, flow):
+    async def main():
+        await app.initialize()
+        try:
+            return await flow()
+        finally:
+            await app.finalize_provisional()
+            await app.scheduler.close()
+
+    return asyncio.run(main())
+
+
+def test_create_and_hunt_settles_on_chain(app):
+    chain = app.provider
+
+    async def flow():
+        pot_id = await app.create_pot_flow()
+        await app.hunt_pot_flow(pot_id)
+        return pot_id
+
+    pot_id = run(app, flow)
+
+    creator, hunter = app.creator_account.address.lower(), app.hunter_account.address.lower()
+    pot = chain.pots[pot_id]
+    assert not pot["isActive"] and pot["attemptsCount"] == 2
+    assert [a["isCompleted"] for a in chain.attempts] == [True, True]
+    amount, fee = 10 ** 18, 10 ** 17
+    assert chain.tokens[creator] == 10 ** 24 - amount + 2 * fee * CREATOR_ENTRY_FEE_SHARE_PERCENT // 100
+    assert chain.tokens[hunter] == 10 ** 24 - 2 * fee + amount * HUNTER_SHARE_PERCENT // 100
+    assert set(app.verifier.registrations) == {pot_id}
+
+
+def test_attempt_on_solved_pot_reverts_with_decoded_error(app):
+    async def flow():
+        pot_id = await app.create_pot_flow()
+        await app.attempt_pot_flow(pot_id, succeed=True)
+        with pytest.raises(ContractRevertError) as raised:
+            await app.attempt_pot_flow(pot_id, succeed=False)
+        return raised.value
+
+    assert run(app, flow).name == "PotNotActive"
+    assert len(app.provider.attempts) == 1
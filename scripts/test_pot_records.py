@@ -0,0 +1,65 @@
+"""Tests for the PotTable amount/fee columns, which hold uint256 token amounts"""
+
+import pytest
+
+from pot_records import Pot, PotTable, STATUS_OPEN, WIDE_LIMIT
+from token_units import format_units_many
+
+NOW = 1_700_000_000
+
+
+def make_pot(pot_id: int, amount: int, fee: int, active: bool = True) -> Pot:
+    return Pot(pot_id, "0xabc", amount, fee, NOW - 10, NOW + 3600, active, 0, "0x1")
+
+
+def test_amounts_beyond_uint64(numpy_mode):
+    amounts = [100 * 10 ** 18, 2 ** 64, 2 ** 64 + 7, WIDE_LIMIT - 1]
+    fees = [10 ** 17, 2 ** 70, 5, 2 ** 127]
+    table = PotTable()
+    table.extend(make_pot(i, amount, fee) for i, (amount, fee) in enumerate(zip(amounts, fees)))
+
+    assert [int(a) for a in table.column("amount")] == amounts
+    assert [int(f) for f in table.column("fee")] == fees
+    assert table.total_locked_value(now=NOW) == sum(amounts)
+
+    summary = table.fee_distribution(bins=[0, 2 ** 64, WIDE_LIMIT])
+    assert summary["min"] == 5
+    assert summary["max"] == 2 ** 127
+    assert summary["histogram"] == [2, 2]
+
+
+def test_overwrite_and_discard_keep_limbs_aligned(numpy_mode):
+    table = PotTable()
+    table.extend([make_pot(0, 2 ** 64, 1), make_pot(1, 3, 2 ** 65), make_pot(2, 2 ** 100, 4)])
+    table.append(make_pot(1, 2 ** 66 + 1, 9, active=False))
+    assert table.discard([0]) == [0]
+
+    assert [int(a) for a in table.column("amount")] == [2 ** 66 + 1, 2 ** 100]
+    assert [int(f) for f in table.column("fee")] == [9, 4]
+    assert list(table.status) == [0, STATUS_OPEN]
+    assert table.total_locked_value(now=NOW) == 2 ** 100
+
+
+def test_uint64_amounts_keep_zero_copy_view():
+    np = pytest.importorskip("numpy")
+    table = PotTable()
+    table.extend(make_pot(i, 10 ** 18 + i, 10 ** 15) for i in range(3))
+    column = table.column("amount")
+    assert column.dtype == np.uint64
+    assert format_units_many(column, 18, 2) == ["1.00", "1.00", "1.00"]
+
+
+def test_amount_beyond_128_bits_is_rejected():
+    with pytest.raises(OverflowError):
+        PotTable().append(make_pot(0, WIDE_LIMIT, 0))
+
+
+def test_arrow_export_is_exact():
+    pytest.importorskip("pyarrow")
+    amounts = [1, 2 ** 64 + 3, WIDE_LIMIT - 1]
+    table = PotTable()
+    table.extend(make_pot(i, amount, amount // 2) for i, amount in enumerate(amounts))
+    exported = table.to_arrow()
+    assert [int(v) for v in exported.column("amount").to_pylist()] == amounts
+    assert [int(v) for v in exported.column("fee").to_pylist()] == [a // 2 for a in amounts]
+    assert exported.column("id").to_pylist() == [0, 1, 2]
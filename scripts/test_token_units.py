@@ -0,0 +1,134 @@
+"""Tests for exact token amount parsing and formatting"""
+
+import array
+from decimal import Decimal
+
+import pytest
+
+from token_units import format_units, format_units_many, parse_units
+
+
+@pytest.mark.parametrize("text, decimals", [
+    ("0", 18),
+    ("1", 18),
+    ("0.1", 18),
+    ("1.000000000000000001", 18),
+    ("123456789.123456789", 9),
+    ("1000000000", 18),
+    ("42", 0),
+    ("0.5", 6),
+])
+def test_parse_format_round_trip(text, decimals):
+    units = parse_units(text, decimals)
+    assert format_units(units, decimals) == text
+    assert parse_units(format_units(units, decimals), decimals) == units
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.5", 15 * 10 ** 17),
+    ("2e3", 2000 * 10 ** 18),
+    ("1.5E-18", None),
+    (7, 7 * 10 ** 18),
+    (0.1, 10 ** 17),
+    (Decimal("0.25"), 25 * 10 ** 16),
+    (" 1_000 ", 1000 * 10 ** 18),
+    ("1.10000000000000000000", 11 * 10 ** 17),
+    ("-0.5", -5 * 10 ** 17),
+    ("+3", 3 * 10 ** 18),
+])
+def test_parse_units(value, expected):
+    if expected is None:
+        with pytest.raises(ValueError):
+            parse_units(value, 18)
+    else:
+        assert parse_units(value, 18) == expected
+
+
+def test_parse_units_keeps_every_digit_of_large_amounts():
+    assert parse_units("123456789012345678901234567.123456789012345678", 18) == \
+        123456789012345678901234567123456789012345678
+    assert parse_units("1e27", 18) == 10 ** 45
+
+
+@pytest.mark.parametrize("value", ["0.0000001", "1e-7", 0.0000001])
+def test_parse_units_rejects_too_many_decimals(value):
+    with pytest.raises(ValueError, match="decimal places"):
+        parse_units(value, 6)
+
+
+@pytest.mark.parametrize("value", ["", " ", ".", "-", "abc", "1.2.3", "0x10", "NaN", "nan", "inf", "-Infinity",
+                                   float("nan"), float("inf"), True])
+def test_parse_units_rejects_invalid_input(value):
+    with pytest.raises(ValueError):
+        parse_units(value, 18)
+
+
+@pytest.mark.parametrize("value", ["-1", "-0.000000000000000001", -2, "-1e3", Decimal("-0.5")])
+def test_parse_units_unsigned_rejects_negative(value):
+    assert parse_units(value, 18) < 0
+    with pytest.raises(ValueError, match="negative"):
+        parse_units(value, 18, signed=False)
+
+
+def test_parse_units_unsigned_accepts_zero():
+    assert parse_units("-0", 18, signed=False) == 0
+    assert parse_units("0.0", 18, signed=False) == 0
+
+
+@pytest.mark.parametrize("amount, decimals, places, expected", [
+    (125, 3, 2, "0.12"),      # exact half rounds to the even neighbour
+    (135, 3, 2, "0.14"),
+    (145, 3, 2, "0.14"),
+    (12501, 5, 2, "0.13"),    # just above half rounds up
+    (12499, 5, 2, "0.12"),
+    (-125, 3, 2, "-0.12"),
+    (-135, 3, 2, "-0.14"),
+    (5, 1, 0, "0"),
+    (15, 1, 0, "2"),
+    (25, 1, 0, "2"),
+    (995, 3, 2, "1.00"),
+    (25 * 10 ** 17, 18, 0, "2"),
+])
+def test_format_units_rounds_half_even(amount, decimals, places, expected):
+    assert format_units(amount, decimals, places) == expected
+    assert format_units_many([amount], decimals, places) == [expected]
+
+
+@pytest.mark.parametrize("amount, decimals, places, expected", [
+    (-5, 18, 2, "0.00"),
+    (-5 * 10 ** 15, 18, 2, "0.00"),
+    (-5 * 10 ** 15 - 1, 18, 2, "-0.01"),
+    (-1, 1, 0, "0"),
+    (-10 ** 18, 18, 2, "-1.00"),
+    (-15 * 10 ** 17, 18, None, "-1.5"),
+    (-1, 18, None, "-0.000000000000000001"),
+])
+def test_format_negative_amounts(amount, decimals, places, expected):
+    assert format_units(amount, decimals, places) == expected
+    assert format_units_many([amount], decimals, places) == [expected]
+
+
+def test_format_units_pads_beyond_token_decimals():
+    assert format_units(15, 1, 3) == "1.500"
+    assert format_units(7, 0, 2) == "7.00"
+    assert format_units_many([15, 7], 1, 3) == ["1.500", "0.700"]
+
+
+@pytest.mark.parametrize("decimals, places", [(18, None), (18, 2), (18, 6), (6, 0), (6, 8), (0, None), (0, 2)])
+def test_format_units_many_matches_format_units(numpy_mode, decimals, places):
+    amounts = [0, 1, 5, 10 ** decimals, 10 ** decimals // 2, 3 * 10 ** decimals // 2 + 1, 2 ** 64 - 1,
+               123456789123456789, 995 * 10 ** max(decimals - 3, 0), 2 ** 63]
+    expected = [format_units(a, decimals, places) for a in amounts]
+    assert format_units_many(array.array("Q", amounts), decimals, places) == expected
+    assert format_units_many(amounts, decimals, places) == expected
+    assert format_units_many(amounts + [2 ** 100, -7], decimals, places) == \
+        expected + [format_units(2 ** 100, decimals, places), format_units(-7, decimals, places)]
+
+
+def test_format_units_many_numpy_and_pure_agree():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(3)
+    column = rng.integers(0, 2 ** 63, size=2000, dtype=np.uint64)
+    column[:4] = [0, 2 ** 64 - 1, 5 * 10 ** 15, 15 * 10 ** 15]
+    for places in (None, 0, 2, 6, 20):
+        assert format_units_many(column, 18, places) == format_units_many(column.tolist(), 18, places)
@@ -0,0 +1,179 @@
+"""
+Exact conversion between token amounts and on-chain integer units
+
+Amounts are parsed from decimal strings by integer arithmetic (Decimal only for
+exponent notation) and formatted back with divmod, so 1e27-unit balances and
+18-decimal fees round-trip exactly instead of going through a float. Each
+token's decimals() is read once and cached by address. format_units_many()
+formats whole columns, such as PotTable.column("amount"), using one scale
+computation and a NumPy fast path for uint64 columns when NumPy is installed.
+"""
+
+import itertools
+import threading
+from decimal import Decimal, InvalidOperation, localcontext
+from typing import Optional, Dict, Iterable, List
+
+from pot_records import _numpy
+
+NATIVE_DECIMALS = 18
+# decimals() is a uint8
+_POW10 = tuple(10 ** i for i in range(256))
+
+
+def _is_digits(text: str) -> bool:
+    return not text or (text.isascii() and text.isdigit())
+
+
+def parse_units(value, decimals: int, signed: bool = True) -> int:
+    """Exact integer units of a token amount given in whole tokens ("1.5", "2e3", 7, Decimal)
+
+    Raises ValueError for non-numbers, non-finite values and amounts with more
+    fractional digits than the token has, and for negative amounts unless `signed`.
+    """
+    units = _parse_units(value, decimals)
+    if units < 0 and not signed:
+        raise ValueError(f"Token amount must not be negative: {value!r}")
+    return units
+
+
+def _parse_units(value, decimals: int) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * _POW10[decimals]
+    if isinstance(value, float):
+        # repr() is the shortest string that round-trips, so 0.1 means "0.1", not 0.1000000000000000055...
+        value = repr(value)
+    text = str(value).strip().replace("_", "")
+    digits, sign = text, 1
+    if digits.startswith(("+", "-")):
+        digits, sign = digits[1:], (-1 if digits[0] == "-" else 1)
+    whole, _, frac = digits.partition(".")
+    if (whole or frac) and _is_digits(whole) and _is_digits(frac):
+        if len(frac) > decimals:
+            if frac[decimals:].strip("0"):
+                raise ValueError(f"{value!r} has more than {decimals} decimal places")
+            frac = frac[:decimals]
+        return sign * (int(whole or "0") * _POW10[decimals] + int(frac.ljust(decimals, "0") or "0"))
+    # Exponent notation and anything else Decimal understands
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid token amount: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Invalid token amount: {value!r}")
+    with localcontext() as ctx:
+        # scaleb() rounds to the context precision; keep every digit of the coefficient
+        ctx.prec = max(ctx.prec, len(amount.as_tuple().digits))
+        scaled = amount.scaleb(decimals)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{value!r} has more than {decimals} decimal places")
+    return int(scaled)
+
+
+def format_units(amount: int, decimals: int, places: Optional[int] = None) -> str:
+    """Decimal string of `amount` units: every significant digit, or rounded half-even to `places`"""
+    sign = ""
+    if amount < 0:
+        sign, amount = "-", -amount
+    if places is None:
+        whole, frac = divmod(amount, _POW10[decimals])
+        return f"{sign}{whole}.{frac:0{decimals}d}".rstrip("0") if frac else f"{sign}{whole}"
+    shown = min(places, decimals)
+    if shown < decimals:
+        step = _POW10[decimals - shown]
+        amount, remainder = divmod(amount, step)
+        half = step >> 1
+        if remainder > half or (remainder == half and amount & 1):
+            amount += 1
+        if not amount:
+            sign = ""  # -0.001 to two places is "0.00", not "-0.00"
+    whole, frac = divmod(amount, _POW10[shown])
+    if not places:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}." + (f"{frac:0{shown}d}" if shown else "") + "0" * (places - shown)
+
+
+def format_units_many(amounts: Iterable[int], decimals: int, places: Optional[int] = None) -> List[str]:
+    """format_units() over a column of amounts, e.g. PotTable.column("amount")
+
+    The scale is computed once for the column, and uint64 columns (array("Q")
+    or NumPy) are rounded and split into whole/fractional parts with NumPy when
+    it is installed. Wider columns, such as PotTable's object arrays of exact
+    ints, take the pure-Python path.
+    """
+    shown = decimals if places is None else min(places, decimals)
+    np = _numpy()
+    if np is not None and decimals < 20 and (getattr(amounts, "typecode", None) == "Q"
+                                            or getattr(amounts, "dtype", None) == np.uint64):
+        parts = _split_uint64(np, np.asarray(amounts, dtype=np.uint64), decimals, shown)
+    else:
+        parts = _split(amounts, decimals, shown)
+    spec = f"0{shown}d"
+    if places is None:
+        return [f"{sign}{whole}.{frac:{spec}}".rstrip("0") if frac else f"{sign}{whole}" for sign, whole, frac in parts]
+    if not places:
+        return [f"{sign}{whole}" for sign, whole, _ in parts]
+    padding = "0" * (places - shown)
+    if not shown:
+        return [f"{sign}{whole}.{padding}" for sign, whole, _ in parts]
+    return [f"{sign}{whole}.{frac:{spec}}{padding}" for sign, whole, frac in parts]
+
+
+def _split(amounts: Iterable[int], decimals: int, shown: int):
+    """(sign, whole, fraction) of each amount, rounded half-even to `shown` decimal places"""
+    step, scale = _POW10[decimals - shown], _POW10[shown]
+    half = step >> 1
+    for amount in amounts:
+        sign = ""
+        if amount < 0:
+            sign, amount = "-", -amount
+        if step > 1:
+            amount, remainder = divmod(amount, step)
+            if remainder > half or (remainder == half and amount & 1):
+                amount += 1
+            if not amount:
+                sign = ""
+        whole, frac = divmod(amount, scale)
+        yield sign, whole, frac
+
+
+def _split_uint64(np, column, decimals: int, shown: int):
+    """_split() for a uint64 column, with the rounding and divmod done by NumPy (10**decimals must fit)"""
+    if shown < decimals:
+        step = np.uint64(10 ** (decimals - shown))
+        column, remainder = np.divmod(column, step)
+        half = step // np.uint64(2)
+        column = column + ((remainder > half) | ((remainder == half) & (column % np.uint64(2) == 1))).astype(np.uint64)
+    whole, frac = np.divmod(column, np.uint64(10 ** shown))
+    return zip(itertools.repeat(""), whole.tolist(), frac.tolist())
+
+
+class TokenDecimals:
+    """decimals() per token contract, read once and cached by address"""
+
+    def __init__(self):
+        self._decimals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token) -> int:
+        """Cached decimals() of a contract (blocking on the first call for each address)"""
+        decimals = self._decimals.get(token.address)
+        if decimals is None:
+            with self._lock:
+                decimals = self._decimals.get(token.address)
+                if decimals is None:
+                    decimals = self._decimals[token.address] = int(token.functions.decimals().call())
+        return decimals
+
+    def set(self, address: str, decimals: int):
+        """Seed the cache, e.g. from a configuration file or a previous run"""
+        self._decimals[address] = decimals
+
+    def clear(self):
+        self._decimals.clear()
+
+    def __len__(self) -> int:
+        return len(self._decimals)
+
+
+token_decimals = TokenDecimals()
@@ -0,0 +1,420 @@
+"""
+Central transaction scheduler for creators, hunters and sweepers
+
+Flows hand the scheduler a `build(nonce, gas_price)` callback instead of sending
+transactions themselves. Requests wait in per-account queues; a dispatcher picks
+the most urgent ready request across all accounts, where urgency is the priority
+class, promoted to URGENT once its deadline (for attempts, the pot's
+createdAt + duration) is close, then earliest deadline, then submission order.
+A global in-flight limit caps how many transactions are between broadcast and
+receipt, a per-account limit bounds nonce pipelining, and requests whose
+deadline already passed are dropped instead of being mined into a revert.
+
+Approvals are coalesced: concurrent ensure_allowance() calls for the same
+(account, token, spender) share one approve transaction for the sum of their
+amounts, which also stays reserved until the spends that need it are mined.
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+# Priority classes, most urgent first
+PRIORITY_URGENT = 0   # attempts on pots that are about to expire
+PRIORITY_ATTEMPT = 1  # hunter attempts
+PRIORITY_CREATE = 2   # pot creation
+PRIORITY_SWEEP = 3    # expirePot sweeps
+PRIORITY_BULK = 4     # seeding / load generation
+PRIORITY_NAMES = {
+    PRIORITY_URGENT: "urgent",
+    PRIORITY_ATTEMPT: "attempt",
+    PRIORITY_CREATE: "create",
+    PRIORITY_SWEEP: "sweep",
+    PRIORITY_BULK: "bulk",
+}
+SCHEDULING_POLICIES = ("priority", "fifo")
+APPROVE_GAS = 100000
+
+
+class DeadlineMissedError(RuntimeError):
+    """The request's deadline passed before it could be sent"""
+
+
+class TxResult:
+    """Outcome of one scheduled transaction"""
+
+    __slots__ = ("label", "tx", "tx_hash", "receipt", "queued", "latency")
+
+    def __init__(self, label: str, tx: Optional[Dict[str, Any]], tx_hash, receipt, queued: float, latency: float):
+        self.label = label
+        self.tx = tx
+        self.tx_hash = tx_hash
+        self.receipt = receipt
+        # Seconds spent waiting for dispatch, and from submission to receipt
+        self.queued = queued
+        self.latency = latency
+
+    @property
+    def skipped(self) -> bool:
+        """build() decided no transaction was needed (e.g. allowance already sufficient)"""
+        return self.tx is None
+
+
+class TxRequest:
+    """A queued transaction: who sends it, how to build it and how urgent it is"""
+
+    __slots__ = ("account", "build", "label", "priority", "deadline", "seq", "submitted", "future",
+                 "spends", "on_dispatch", "stats_priority")
+
+    def __init__(self, account, build: Callable[[int, int], Optional[Dict[str, Any]]], label: str,
+                 priority: int, deadline: Optional[float], seq: int, future: asyncio.Future,
+                 spends: Optional[Tuple[tuple, int]] = None):
+        self.account = account
+        self.build = build
+        self.label = label
+        self.priority = priority
+        # Class the request is reported under, even if a coalesced approve is later promoted
+        self.stats_priority = priority
+        self.deadline = deadline
+        self.seq = seq
+        self.submitted = time.time()
+        self.future = future
+        # (allowance key, amount) released from the reservation once this spend is settled
+        self.spends = spends
+        # Called on the event loop right before the request is handed to a worker
+        self.on_dispatch: Optional[Callable[[], None]] = None
+
+
+class _ApprovalGroup:
+    """Allowance requests for one (account, token, spender) merged into a single approve"""
+
+    __slots__ = ("amount", "request")
+
+    def __init__(self):
+        self.amount = 0
+        self.request: Optional[TxRequest] = None
+
+
+class _ClassStats:
+    __slots__ = ("submitted", "completed", "failed", "skipped", "dropped", "late", "gas_used", "gas_cost",
+                 "latencies", "queued")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        # Deadline misses: dropped before sending, or mined after the deadline
+        self.dropped = 0
+        self.late = 0
+        # Gas units and wei (gasUsed * effectiveGasPrice) of mined transactions
+        self.gas_used = 0
+        self.gas_cost = 0
+        self.latencies: List[float] = []
+        self.queued: List[float] = []
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TxScheduler:
+    """Priority/deadline scheduler with per-account queues and a global in-flight limit"""
+
+    def __init__(self, w3, chain_id: Optional[int] = None, max_in_flight: int = 8, per_account: int = 4,
+                 urgent_window: float = 120.0, receipt_timeout: float = 180.0, policy: str = "priority"):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy {policy!r}, expected one of {SCHEDULING_POLICIES}")
+        self.w3 = w3
+        self.chain_id = chain_id
+        self.max_in_flight = max_in_flight
+        self.per_account = per_account
+        # Requests whose deadline is closer than this are promoted to PRIORITY_URGENT
+        self.urgent_window = urgent_window
+        self.receipt_timeout = receipt_timeout
+        self.policy = policy
+        self.stats: Dict[int, _ClassStats] = {}
+        self.started: Optional[float] = None
+        self._queues: Dict[str, List[TxRequest]] = {}
+        self._account_in_flight: Dict[str, int] = {}
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._nonces: Dict[str, int] = {}
+        # Nonces are per address, so each account sends under its own lock
+        self._nonce_locks: Dict[str, threading.Lock] = {}
+        self._nonce_locks_guard = threading.Lock()
+        self._approvals: Dict[tuple, _ApprovalGroup] = {}
+        self._reserved: Dict[tuple, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # --- submission -------------------------------------------------------------
+
+    def _enqueue(self, account, build, label: str, priority: int, deadline: Optional[float],
+                 spends: Optional[Tuple[tuple, int]] = None) -> TxRequest:
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+        if self.started is None:
+            self.started = time.time()
+        request = TxRequest(account, build, label, priority, deadline, next(self._seq), loop.create_future(), spends)
+        self._queues.setdefault(account.address, []).append(request)
+        self.stats.setdefault(priority, _ClassStats()).submitted += 1
+        self._wakeup.set()
+        return request
+
+    async def submit(self, account, build: Callable[[int, int], Optional[Dict[str, Any]]], label: str,
+                     priority: int = PRIORITY_CREATE, deadline: Optional[float] = None,
+                     spends: Optional[Tuple[Any, str, int]] = None) -> TxResult:
+        """Queue a transaction and wait for its receipt
+
+        build(nonce, gas_price) runs in a worker thread right before sending and
+        returns the transaction dict, or None if nothing needs to be sent. It may
+        raise (e.g. a pre-flight revert) to fail the request without using the
+        nonce. `spends=(token, spender, amount)` marks the transaction as
+        consuming allowance reserved by ensure_allowance().
+        """
+        spend_key = None
+        if spends is not None:
+            token, spender, amount = spends
+            spend_key = ((account.address, token.address, spender), amount)
+        return await self._enqueue(account, build, label, priority, deadline, spend_key).future
+
+    async def ensure_allowance(self, account, token, spender: str, amount: int,
+                               priority: int = PRIORITY_CREATE, deadline: Optional[float] = None) -> TxResult:
+        """Make sure `spender` may pull `amount` more of `token` from `account`
+
+        Requests arriving while an approve for the same (account, token, spender)
+        is still queued join it: the approve covers the sum of all their amounts
+        plus allowance reserved for spends that have not been mined yet.
+        """
+        key = (account.address, token.address, spender)
+        group = self._approvals.get(key)
+        if group is not None:
+            group.amount += amount
+            # The shared approve inherits the most urgent requester's class and deadline
+            group.request.priority = min(group.request.priority, priority)
+            if deadline is not None:
+                group.request.deadline = deadline if group.request.deadline is None else min(group.request.deadline, deadline)
+            return await asyncio.shield(group.request.future)
+
+        group = self._approvals[key] = _ApprovalGroup()
+        group.amount = amount
+
+        def build(nonce: int, gas_price: int) -> Optional[Dict[str, Any]]:
+            # on_dispatch already added this group's amount to the reservation
+            needed = self._reserved.get(key, 0)
+            current = token.functions.allowance(account.address, spender).call()
+            if current >= needed:
+                return None
+            return token.functions.approve(spender, needed).build_transaction(
+                self.tx_params(account, nonce, gas_price, APPROVE_GAS))
+
+        def on_dispatch():
+            # Freeze the amount: later requests start a new approve. The amount stays
+            # reserved until the spends it was approved for are settled
+            if self._approvals.get(key) is group:
+                del self._approvals[key]
+            self._reserved[key] = self._reserved.get(key, 0) + group.amount
+
+        def on_done(future: asyncio.Future):
+            if self._approvals.get(key) is group:
+                del self._approvals[key]
+            elif (future.cancelled() or future.exception() is not None
+                  or getattr(future.result().receipt, "status", 1) == 0):
+                # Nothing was approved for the group, so its spends will not consume the reservation
+                self._reserved[key] = max(0, self._reserved.get(key, 0) - group.amount)
+
+        group.request = self._enqueue(account, build, f"approve {token.address[:10]}", priority, deadline)
+        group.request.on_dispatch = on_dispatch
+        group.request.future.add_done_callback(on_done)
+        return await asyncio.shield(group.request.future)
+
+    def tx_params(self, account, nonce: int, gas_price: int, gas: int = 500000) -> Dict[str, Any]:
+        """build_transaction() parameters for a build callback"""
+        params = {"from": account.address, "gas": gas, "gasPrice": gas_price, "nonce": nonce}
+        if self.chain_id is not None:
+            params["chainId"] = self.chain_id
+        return params
+
+    # --- dispatch ---------------------------------------------------------------
+
+    def _rank(self, request: TxRequest, now: float) -> tuple:
+        if self.policy == "fifo":
+            return (request.seq,)
+        priority = request.priority
+        if request.deadline is not None and request.deadline - now <= self.urgent_window:
+            priority = PRIORITY_URGENT
+        deadline = request.deadline if request.deadline is not None else float("inf")
+        return (priority, deadline, request.seq)
+
+    def _next_request(self) -> Optional[TxRequest]:
+        now = time.time()
+        best, best_rank = None, None
+        for address, queue in self._queues.items():
+            if not queue or self._account_in_flight.get(address, 0) >= self.per_account:
+                continue
+            candidate = min(queue, key=lambda r: self._rank(r, now))
+            rank = self._rank(candidate, now)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = candidate, rank
+        if best is not None:
+            self._queues[best.account.address].remove(best)
+        return best
+
+    async def _dispatch(self):
+        while True:
+            request = self._next_request() if self._in_flight < self.max_in_flight else None
+            if request is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            address = request.account.address
+            self._in_flight += 1
+            self._account_in_flight[address] = self._account_in_flight.get(address, 0) + 1
+            asyncio.get_running_loop().create_task(self._execute(request))
+
+    def _next_nonce(self, address: str) -> int:
+        nonce = self._nonces.get(address)
+        if nonce is None:
+            nonce = self.w3.eth.get_transaction_count(address, "pending")
+        return nonce
+
+    def _nonce_lock(self, address: str) -> threading.Lock:
+        lock = self._nonce_locks.get(address)
+        if lock is None:
+            with self._nonce_locks_guard:
+                lock = self._nonce_locks.setdefault(address, threading.Lock())
+        return lock
+
+    def _send(self, request: TxRequest) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Build, sign and broadcast under the account's nonce lock so its nonces stay gap-free
+
+        Other accounts' sends (and their build() pre-flight reads) run concurrently.
+        """
+        address = request.account.address
+        with self._nonce_lock(address):
+            nonce = self._next_nonce(address)
+            tx = request.build(nonce, self.w3.eth.gas_price)
+            if tx is None:
+                return None, None
+            try:
+                signed = self.w3.eth.account.sign_transaction(tx, request.account.key)
+                tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+            except Exception:
+                # Resync from the node; the failed send may or may not have consumed the nonce
+                self._nonces.pop(address, None)
+                raise
+            self._nonces[address] = nonce + 1
+            return tx, tx_hash
+
+    async def _execute(self, request: TxRequest):
+        stats = self.stats[request.stats_priority]
+        address = request.account.address
+        dispatched = time.time()
+        try:
+            if request.deadline is not None and dispatched > request.deadline:
+                stats.dropped += 1
+                raise DeadlineMissedError(f"{request.label} missed its deadline by {dispatched - request.deadline:.1f}s")
+            if request.on_dispatch is not None:
+                request.on_dispatch()
+            tx, tx_hash = await asyncio.to_thread(self._send, request)
+            receipt = None
+            if tx_hash is not None:
+                receipt = await asyncio.to_thread(self.w3.eth.wait_for_transaction_receipt, tx_hash,
+                                                  self.receipt_timeout)
+            finished = time.time()
+            if tx is None:
+                stats.skipped += 1
+            else:
+                stats.completed += 1
+                gas_used = getattr(receipt, "gasUsed", 0) or 0
+                stats.gas_used += gas_used
+                stats.gas_cost += gas_used * (getattr(receipt, "effectiveGasPrice", 0) or tx.get("gasPrice", 0))
+                if request.deadline is not None and finished > request.deadline:
+                    stats.late += 1
+            stats.latencies.append(finished - request.submitted)
+            stats.queued.append(dispatched - request.submitted)
+            result = TxResult(request.label, tx, tx_hash, receipt, dispatched - request.submitted,
+                              finished - request.submitted)
+            if not request.future.done():
+                request.future.set_result(result)
+        except Exception as e:
+            if not isinstance(e, DeadlineMissedError):
+                stats.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+        finally:
+            if request.spends is not None:
+                key, amount = request.spends
+                self._reserved[key] = max(0, self._reserved.get(key, 0) - amount)
+            self._in_flight -= 1
+            self._account_in_flight[address] -= 1
+            self._wakeup.set()
+
+    async def close(self):
+        """Stop the dispatcher; queued requests that were never sent are cancelled"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for queue in self._queues.values():
+            for request in queue:
+                request.future.cancel()
+            queue.clear()
+
+    # --- reporting --------------------------------------------------------------
+
+    def report(self) -> Dict[str, Any]:
+        """Throughput, latency and deadline-miss rate per priority class and overall"""
+        elapsed = max(time.time() - self.started, 1e-9) if self.started else 0.0
+        classes = {}
+        totals = _ClassStats()
+        for priority in sorted(self.stats):
+            stats = self.stats[priority]
+            for name in ("submitted", "completed", "failed", "skipped", "dropped", "late", "gas_used", "gas_cost"):
+                setattr(totals, name, getattr(totals, name) + getattr(stats, name))
+            totals.latencies.extend(stats.latencies)
+            totals.queued.extend(stats.queued)
+            classes[PRIORITY_NAMES.get(priority, str(priority))] = self._summarize(stats, elapsed)
+        return {"policy": self.policy, "elapsed_s": round(elapsed, 3), "classes": classes,
+                "total": self._summarize(totals, elapsed)}
+
+    @staticmethod
+    def _summarize(stats: _ClassStats, elapsed: float) -> Dict[str, Any]:
+        settled = stats.completed + stats.skipped + stats.failed + stats.dropped
+        missed = stats.dropped + stats.late
+        return {
+            "submitted": stats.submitted,
+            "completed": stats.completed,
+            "skipped": stats.skipped,
+            "failed": stats.failed,
+            "deadline_dropped": stats.dropped,
+            "deadline_late": stats.late,
+            "deadline_missed": missed,
+            "deadline_miss_rate": round(missed / settled, 4) if settled else 0.0,
+            "gas_used": stats.gas_used,
+            "gas_cost_wei": stats.gas_cost,
+            "throughput_tps": round(stats.completed / elapsed, 3) if elapsed else 0.0,
+            "latency_p50_s": round(_percentile(stats.latencies, 0.5), 3),
+            "latency_p95_s": round(_percentile(stats.latencies, 0.95), 3),
+            "queued_p95_s": round(_percentile(stats.queued, 0.95), 3),
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"\n🚦 Transaction Scheduler ({report['policy']}, {report['elapsed_s']:.1f}s)")
+        print("-" * 30)
+        for name, stats in {**report["classes"], "total": report["total"]}.items():
+            print(f"{name:>8}: {stats['completed']}/{stats['submitted']} sent, "
+                  f"{stats['throughput_tps']:.2f} tx/s, p95 {stats['latency_p95_s']:.1f}s, "
+                  f"missed {stats['deadline_missed']} ({stats['deadline_miss_rate']:.1%})")
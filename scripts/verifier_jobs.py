@@ -0,0 +1,275 @@
+"""
+Idempotent, persistent retry layer for verifier calls
+
+A pot that is mined but never registered with the verifier cannot be hunted, and
+an attempt whose verification is lost stays open until it expires. Verifier work
+is therefore submitted as jobs keyed by (kind, key), e.g. ("register", "42"):
+submitting the same job twice is a no-op, pending jobs are persisted to a JSON
+file so a crash or restart resumes them, transient failures (timeouts,
+connection errors, 5xx/429) are retried with jittered exponential backoff, and
+jobs that keep failing or fail permanently are moved aside to a poison file.
+
+Only scheduling state is persisted; handlers rebuild and re-sign request bodies
+at execution time, so no password or signed payload ever touches the disk.
+Pot and attempt ids only mean something on one chain and contract, so a queue
+can be given a scope (e.g. chain_id and contract) that is stamped into every
+job's data; jobs from another scope found in the store are left alone.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Optional, Dict, Any, Awaitable, Callable, List
+
+STORE_VERSION = 1
+JOB_STATES = ("pending", "done", "poisoned", "orphaned")
+
+
+class VerifierUnavailableError(RuntimeError):
+    """Transient verifier failure (timeout, connection error, HTTP 5xx/429); safe to retry"""
+
+
+class PermanentJobError(RuntimeError):
+    """The verifier rejected the job; retrying cannot succeed"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: delay n is uniform in [0, min(cap, base * 2**n)]"""
+
+    __slots__ = ("base", "cap", "max_attempts", "timeout")
+
+    def __init__(self, base: float = 0.5, cap: float = 30.0, max_attempts: int = 8, timeout: float = 60.0):
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        # Upper bound for one execution of a handler, including every request it makes
+        self.timeout = timeout
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+
+class Job:
+    """One unit of verifier work and its retry state"""
+
+    __slots__ = ("kind", "key", "data", "state", "attempts", "next_at", "last_error", "created_at")
+
+    def __init__(self, kind: str, key: str, data: Optional[Dict[str, Any]] = None, state: str = "pending",
+                 attempts: int = 0, next_at: float = 0.0, last_error: Optional[str] = None,
+                 created_at: Optional[float] = None):
+        self.kind = kind
+        self.key = str(key)
+        self.data = data or {}
+        self.state = state
+        self.attempts = attempts
+        self.next_at = next_at
+        self.last_error = last_error
+        self.created_at = time.time() if created_at is None else created_at
+
+    @property
+    def id(self) -> str:
+        return f"{self.kind}:{self.key}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+class JobStore:
+    """Pending jobs in a JSON file (rewritten atomically) plus an append-only poison file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.poison_path = f"{path}.poison.jsonl"
+        self.jobs: Dict[str, Job] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable job store {self.path}: {e}")
+            return
+        if data.get("version") != STORE_VERSION:
+            print(f"⚠️  Ignoring job store {self.path} with unsupported version {data.get('version')}")
+            return
+        for item in data.get("jobs", []):
+            job = Job.from_dict(item)
+            self.jobs[job.id] = job
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": STORE_VERSION, "jobs": [job.to_dict() for job in self.jobs.values()]}, f)
+        os.replace(tmp_path, self.path)
+
+    def poison(self, job: Job):
+        """Move a job out of the pending set into the poison file for manual inspection"""
+        job.state = "poisoned"
+        self.jobs.pop(job.id, None)
+        with open(self.poison_path, "a") as f:
+            f.write(json.dumps({**job.to_dict(), "poisoned_at": time.time()}) + "\n")
+        self.save()
+
+    def pending(self) -> List[Job]:
+        return [job for job in self.jobs.values() if job.state == "pending"]
+
+
+# handler(job) performs the work; reconciler(job) returns True if the verifier already has the result
+JobHandler = Callable[[Job], Awaitable[None]]
+JobReconciler = Callable[[Job], Awaitable[bool]]
+
+
+class VerifierJobQueue:
+    """Runs verifier jobs with retries, persistence and startup reconciliation"""
+
+    def __init__(self, store: JobStore, handlers: Dict[str, JobHandler],
+                 reconcilers: Optional[Dict[str, JobReconciler]] = None,
+                 policy: Optional[RetryPolicy] = None, concurrency: int = 8,
+                 scope: Optional[Dict[str, Any]] = None):
+        self.store = store
+        self.handlers = handlers
+        self.reconcilers = reconcilers or {}
+        self.policy = policy or RetryPolicy()
+        # Merged into every submitted job's data; pending jobs whose data differs are skipped
+        self.scope = scope or {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def in_scope(self, job: Job) -> bool:
+        return all(job.data.get(name) == value for name, value in self.scope.items())
+
+    def pending(self) -> List[Job]:
+        """Pending jobs of this queue's scope"""
+        return [job for job in self.store.pending() if self.in_scope(job)]
+
+    def submit(self, kind: str, key: Any, data: Optional[Dict[str, Any]] = None) -> Job:
+        """Add a job unless one with the same kind and key is already pending"""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job = Job(kind, key, {**(data or {}), **self.scope})
+        existing = self.store.jobs.get(job.id)
+        if existing is not None:
+            if self.in_scope(existing):
+                return existing
+            print(f"⚠️  Replacing {existing.id} from another chain or contract ({existing.data})")
+        self.store.jobs[job.id] = job
+        self.store.save()
+        return job
+
+    async def _already_done(self, job: Job) -> bool:
+        reconciler = self.reconcilers.get(job.kind)
+        if reconciler is None:
+            return False
+        try:
+            return await asyncio.wait_for(reconciler(job), self.policy.timeout)
+        except Exception as e:
+            print(f"⚠️  Could not reconcile {job.id}: {e}")
+            return False
+
+    def _finish(self, job: Job):
+        job.state = "done"
+        self.store.jobs.pop(job.id, None)
+        self.store.save()
+
+    async def run_once(self, job: Job) -> str:
+        """Execute a job a single time and update its state; returns the new state"""
+        async with self._locks.setdefault(job.id, asyncio.Lock()), self._semaphore:
+            if job.state != "pending":
+                return job.state
+            # A retried job may have succeeded server-side even though the response was lost
+            if job.attempts and await self._already_done(job):
+                self._finish(job)
+                return job.state
+
+            job.attempts += 1
+            try:
+                await asyncio.wait_for(self.handlers[job.kind](job), self.policy.timeout)
+            except PermanentJobError as e:
+                job.last_error = str(e)
+                if job.state != "pending":
+                    return job.state
+                print(f"☠️  {job.id} failed permanently: {e}")
+                self.store.poison(job)
+                return job.state
+            except Exception as e:
+                job.last_error = f"{type(e).__name__}: {e}"
+            else:
+                self._finish(job)
+                return job.state
+
+            if job.state != "pending":
+                return job.state  # withdrawn by rollback() while the handler was running
+            if job.attempts >= self.policy.max_attempts:
+                print(f"☠️  {job.id} gave up after {job.attempts} attempts: {job.last_error}")
+                self.store.poison(job)
+                return job.state
+
+            delay = self.policy.delay(job.attempts)
+            job.next_at = time.time() + delay
+            self.store.save()
+            print(f"🔁 {job.id} attempt {job.attempts} failed ({job.last_error}); retrying in {delay:.1f}s")
+            return job.state
+
+    async def run(self, job: Job) -> Job:
+        """Run a job until it is done or poisoned, sleeping out its backoff between attempts"""
+        while job.state == "pending":
+            wait = job.next_at - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.run_once(job)
+        return job
+
+    async def drain(self) -> List[Job]:
+        """Run every pending job concurrently; one job's backoff never delays the others"""
+        jobs = self.pending()
+        if jobs:
+            await asyncio.gather(*(self.run(job) for job in jobs))
+        return jobs
+
+    def rollback(self, block_number: int) -> List[Job]:
+        """Withdraw pending jobs whose data["block"] is at or after a reorg's fork block
+
+        Their keys were read from event logs in orphaned blocks and may name a
+        different pot or attempt on the new chain. The submitter re-derives the key
+        from the re-mined receipt and submits again.
+        """
+        orphaned = [job for job in self.pending() if job.data.get("block", -1) >= block_number]
+        for job in orphaned:
+            job.state = "orphaned"
+            self.store.jobs.pop(job.id, None)
+        if orphaned:
+            self.store.save()
+        return orphaned
+
+    async def reconcile(self) -> Dict[str, int]:
+        """On startup, drop persisted jobs the verifier already completed; the rest stay pending
+
+        Jobs from another scope are kept in the store untouched, since their ids
+        would name different pots or attempts here.
+        """
+        counts = {"completed": 0, "pending": 0}
+        jobs = self.pending()
+        done = await asyncio.gather(*(self._already_done(job) for job in jobs))
+        for job, is_done in zip(jobs, done):
+            if is_done:
+                job.state = "done"
+                self.store.jobs.pop(job.id, None)
+                counts["completed"] += 1
+            else:
+                job.next_at = 0.0
+                counts["pending"] += 1
+        if jobs:
+            self.store.save()
+        return counts
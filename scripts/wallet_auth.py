@@ -0,0 +1,87 @@
+"""
+Wallet authentication for verifier requests
+
+The verifier's wallet middleware expects {"encrypted_payload": <hex of the JSON
+payload>, "signature": <EIP-191 signature>}. EncodedPayload canonicalizes a
+payload once into compact JSON (the same form JSON.stringify produces), keeping
+the text, bytes and hex together. SignatureCache memoizes personal_sign results
+per (address, message) with LRU eviction, so retries and repeated challenge
+fetches for the same attempt don't redo the secp256k1 signing.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Union
+
+
+class EncodedPayload:
+    """A payload serialized once to compact JSON, with its UTF-8 bytes and hex"""
+
+    __slots__ = ("payload", "text", "data", "hex")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self.text = json.dumps(payload, separators=(",", ":"))
+        self.data = self.text.encode("utf-8")
+        self.hex = self.data.hex()
+
+
+def encode_payload(payload: Union[Dict[str, Any], EncodedPayload]) -> EncodedPayload:
+    """Canonicalize a payload unless it already is"""
+    return payload if isinstance(payload, EncodedPayload) else EncodedPayload(payload)
+
+
+class SignatureCache:
+    """Bounded LRU of EIP-191 signatures keyed by (signer address, message text)"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def sign(self, account, message: str) -> str:
+        """0x-prefixed signature of `message` by `account`, signing only on a cache miss"""
+        key = (account.address, message)
+        signature = self._entries.get(key)
+        if signature is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return signature
+
+        from eth_account.messages import encode_defunct
+
+        self.misses += 1
+        signed = account.sign_message(encode_defunct(text=message))
+        signature = "0x" + bytes(signed.signature).hex()
+        self._entries[key] = signature
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return signature
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Shared by every verifier client in the process; keys include the signer address
+signature_cache = SignatureCache()
+
+
+def wallet_request(payload: Union[Dict[str, Any], EncodedPayload], account=None, message: Optional[str] = None,
+                   signature: Optional[str] = None, cache: Optional[SignatureCache] = None) -> Dict[str, str]:
+    """Build the wallet-middleware request body
+
+    The middleware verifies `challenge_id`, `attempt_id` or the whole payload
+    depending on the endpoint, so `message` defaults to the compact payload
+    JSON. Pass `signature` when it was produced elsewhere.
+    """
+    encoded = encode_payload(payload)
+    if signature is None:
+        signature = (cache or signature_cache).sign(account, encoded.text if message is None else message)
+    return {"encrypted_payload": encoded.hex, "signature": signature}